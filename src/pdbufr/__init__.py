@@ -17,14 +17,20 @@ except ImportError:  # pragma: no cover
 
 
 from .core.filters import WIGOSId
+from .core.handles import disable_handle_cache
+from .core.handles import enable_handle_cache
 from .readers.generic import stream_bufr
 
-__all__ = ["stream_bufr", "WIGOSId"]
+__all__ = ["stream_bufr", "WIGOSId", "enable_handle_cache", "disable_handle_cache"]
 
 try:
     from .bufr_read import read_bufr
+    from .bufr_read import read_bufr_many
+    from .bufr_read import to_parquet
+    from .bufr_scan import scan_bufr
+    from .bufr_tail import read_bufr_tail
 
-    __all__ += ["read_bufr"]
+    __all__ += ["read_bufr", "read_bufr_many", "to_parquet", "scan_bufr", "read_bufr_tail"]
 except ModuleNotFoundError:  # pragma: no cover
     pass
 
@@ -7,18 +7,47 @@
 # nor does it submit to any jurisdiction.
 
 import argparse
+import json
+import os
+import sys
 import typing as T
 
 import eccodes  # type: ignore
 
 
+def tail(args: argparse.Namespace) -> None:
+    from .bufr_tail import read_bufr_tail
+
+    if args.path is None or args.checkpoint is None:
+        raise RuntimeError("The tail command requires a path and --checkpoint")
+
+    columns = args.columns.split(",") if args.columns else []
+    filters = json.loads(args.filters) if args.filters else {}
+    df = read_bufr_tail(args.path, args.checkpoint, columns=columns, reader=args.reader, filters=filters)
+
+    if args.output:
+        # the rows are appended to the output file
+        header = not os.path.exists(args.output)
+        df.to_csv(args.output, mode="a", header=header, index=False)
+    else:
+        df.to_csv(sys.stdout, index=False)
+
+
 def main(argv: T.Optional[T.List[str]] = None) -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("command")
+    parser.add_argument("command", help="selfcheck, tail")
+    parser.add_argument("path", nargs="?", help="tail: the BUFR file")
+    parser.add_argument("--checkpoint", help="tail: the checkpoint file")
+    parser.add_argument("--reader", default="generic", help="tail: the reader")
+    parser.add_argument("--columns", help="tail: comma separated list of columns")
+    parser.add_argument("--filters", help="tail: the filters as a JSON object")
+    parser.add_argument("--output", help="tail: the CSV file to append the rows to")
     args = parser.parse_args(args=argv)
     if args.command == "selfcheck":
         print("Found: ecCodes v%s." % eccodes.codes_get_api_version())
         print("Your system is ready.")
+    elif args.command == "tail":
+        tail(args)
     else:
         raise RuntimeError("Command not recognised %r. See usage with --help." % args.command)
 
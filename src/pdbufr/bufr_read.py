@@ -9,13 +9,20 @@
 import os
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import Dict
 from typing import Iterable
+from typing import List
+from typing import Mapping
 from typing import MutableMapping
+from typing import Optional
 from typing import Sequence
 from typing import Union
 
 if TYPE_CHECKING:
     import pandas as pd  # type: ignore
+    import pyarrow as pa  # type: ignore
+
+    from .utils.cache import ResultCache
 
 
 def read_bufr(
@@ -23,16 +30,149 @@ def read_bufr(
     columns: Union[Sequence[str], str] = [],
     *,
     reader: str = "generic",
+    output: str = "pandas",
+    dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+    cache: Union[bool, str, "os.PathLike[Any]", "ResultCache"] = False,
+    nrows: Optional[int] = None,
+    head: Optional[int] = None,
     **kwargs: Any,
-) -> "pd.DataFrame":
+) -> Union["pd.DataFrame", "pa.Table"]:
     """
     Read selected observations from a BUFR file into DataFrame.
+
+    When ``output`` is "arrow" the result is a ``pyarrow.Table`` generated directly
+    from the decoded columns. This requires ``pyarrow`` to be installed.
+
+    ``dtypes`` controls the dtypes of the resulting columns. It can be "default",
+    "compact" (strings as categoricals, integers as the narrowest nullable integer type),
+    "compact_float32" (as "compact" with floats as float32), "categorical" (strings as
+    categoricals) or a dict mapping column names to dtypes, where the "*" key can specify
+    the mode for all the other columns.
+
+    When ``cache`` is enabled the result is stored in a persistent cache and reused
+    by subsequent calls with the same arguments on the same unchanged file. It can be
+    True (use the default cache directory), a directory or a
+    :class:`pdbufr.utils.cache.ResultCache`. Calls using callable filters or reading
+    messages instead of a file are not cached.
+
+    ``nrows`` (or its alias ``head``) limits the number of rows in the result. Decoding
+    stops as soon as ``nrows`` rows are extracted, even in the middle of a message.
     """
+    from .readers import check_nrows
+
+    nrows = check_nrows(nrows, head)
+
+    def _read() -> Union["pd.DataFrame", "pa.Table"]:
+        from .readers import get_reader
+
+        _kwargs = dict(**kwargs)
+        flat = _kwargs.pop("flat", False)
+        _reader = get_reader(reader, path_or_messages, flat=flat, columns=columns, **_kwargs)
+        return _reader.execute(output=output, dtypes=dtypes, nrows=nrows)
+
+    if cache is not False and cache is not None:
+        from .utils.cache import cached_result
 
+        if isinstance(columns, str):
+            columns = [columns]
+
+        return cached_result(
+            cache,
+            path_or_messages,
+            output,
+            _read,
+            reader=reader,
+            columns=columns,
+            dtypes=dtypes,
+            nrows=nrows,
+            **kwargs,
+        )
+
+    return _read()
+
+
+def to_parquet(
+    path_or_messages: Union[str, bytes, "os.PathLike[Any]", Iterable[MutableMapping[str, Any]]],
+    target: Union[str, "os.PathLike[Any]"],
+    columns: Union[Sequence[str], str] = [],
+    *,
+    reader: str = "generic",
+    row_group_size: int = 65536,
+    compression: Optional[str] = "snappy",
+    nrows: Optional[int] = None,
+    head: Optional[int] = None,
+    **kwargs: Any,
+) -> int:
+    """
+    Read selected observations from a BUFR file and write them into a Parquet file.
+
+    The results are written as row groups of at most ``row_group_size`` rows while the
+    messages are being decoded, so the whole result is never kept in memory. The Parquet
+    file contains all the columns of the row groups with the types promoted to store all
+    the values. Returns the number of rows
+    written. ``nrows`` (or its alias ``head``) limits the number of rows written. This
+    requires ``pyarrow`` to be installed.
+    """
+
+    from .readers import check_nrows
     from .readers import get_reader
 
+    nrows = check_nrows(nrows, head)
+
     kwargs = dict(**kwargs)
     flat = kwargs.pop("flat", False)
     reader = get_reader(reader, path_or_messages, flat=flat, columns=columns, **kwargs)
-    return reader.execute()
-    # return reader(columns=columns, **kwargs)
+    return reader.to_parquet(target, row_group_size=row_group_size, nrows=nrows, compression=compression)
+
+
+def read_bufr_many(
+    path_or_messages: Union[str, bytes, "os.PathLike[Any]", Iterable[MutableMapping[str, Any]]],
+    specs: Sequence[Mapping[str, Any]],
+) -> List[Union["pd.DataFrame", "pa.Table"]]:
+    """
+    Run several extractions on the same BUFR data in a single pass. Each message is only
+    read and unpacked once and fed to all the readers.
+
+    Each spec is a dict with the arguments of :func:`read_bufr`, e.g.
+    ``{"reader": "synop", "filters": {...}}`` or ``{"columns": ["latitude"]}``. The
+    ``cache`` argument is not supported. Decoding stops when all the specs using
+    ``nrows`` (or ``head``) have extracted enough rows. Returns the result of each spec
+    in order.
+    """
+    from .core.structure import StructureCache
+    from .readers import check_nrows
+    from .readers import get_reader
+    from .readers import read_many
+
+    # structure information is shared between the readers
+    structure_cache = StructureCache()
+    readers = []
+    outputs = []
+    limits = []
+    for spec in specs:
+        spec = dict(spec)
+        if spec.pop("cache", False):
+            raise ValueError("cache is not supported by read_bufr_many()")
+        reader = spec.pop("reader", "generic")
+        output = spec.pop("output", "pandas")
+        dtypes = spec.pop("dtypes", None)
+        flat = spec.pop("flat", False)
+        columns = spec.pop("columns", [])
+        limits.append(check_nrows(spec.pop("nrows", None), spec.pop("head", None)))
+
+        r = get_reader(reader, path_or_messages, flat=flat, columns=columns, **spec)
+        r.set_output(output)
+        r.structure_cache = structure_cache
+        readers.append(r)
+        outputs.append((output, dtypes))
+
+    if not readers:
+        return []
+
+    with readers[0].bufr_source() as bufr_obj:
+        stores = read_many(readers, bufr_obj, nrows=limits)
+
+    return [
+        r.finalise(store, output=output, dtypes=dtypes, nrows=nrows)
+        for r, store, (output, dtypes), nrows in zip(readers, stores, outputs, limits)
+    ]
@@ -0,0 +1,315 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import os
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import MutableMapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from .core.keys import HEADER_KEYS
+from .core.structure import StructureCache
+
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+
+# readers where the columns are BUFR keys, so the projection can be derived
+# from the aggregations
+KEY_COLUMN_READERS = ("generic",)
+
+
+def _same_filter(a: Any, b: Any) -> bool:
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+class QueryPlan:
+    """The execution plan of a :class:`LazyQuery`"""
+
+    def __init__(self, query: "LazyQuery") -> None:
+        self.reader = query.reader
+        self.options = dict(query.options)
+
+        # the filters passed to scan_bufr() are combined with the ones of the query
+        self.filters = dict(self.options.pop("filters", None) or {})
+        conflicts = [k for k in query.filters if k in self.filters]
+        if conflicts:
+            raise ValueError(f"filters={conflicts} are specified both in scan_bufr() and in filter()")
+        self.filters.update(query.filters)
+        self.limit = query.limit
+        self.group_by = list(query.by)
+        self.aggs = query.aggs
+
+        # projection
+        self.columns: Optional[List[str]] = list(query.columns) if query.columns is not None else None
+        self.derived_columns = False
+        if self.columns is None and self.aggs is not None and self.reader in KEY_COLUMN_READERS:
+            self.columns = list(dict.fromkeys(self.group_by + self._agg_columns(self.aggs)))
+            self.derived_columns = True
+
+        # header pushdown
+        self.header_filters = [k for k in self.filters if k in HEADER_KEYS]
+        if "prefilter_headers" not in self.options and self.header_filters:
+            self.options["prefilter_headers"] = True
+
+        # early termination on the message count
+        self.max_count = None
+        if "count" in self.filters:
+            from .core.filters import BufrFilter
+
+            self.max_count = BufrFilter.from_user(self.filters["count"], key="count").max()
+
+    @staticmethod
+    def _agg_columns(aggs: Tuple[Tuple[Any, ...], Dict[str, Any]]) -> List[str]:
+        args, kwargs = aggs
+        r = []
+        for a in args:
+            if isinstance(a, dict):
+                r.extend(a.keys())
+        for v in kwargs.values():
+            # named aggregation: name=(column, func)
+            if isinstance(v, tuple) and len(v) == 2:
+                r.append(v[0])
+        return r
+
+    def reader_kwargs(self) -> Dict[str, Any]:
+        kwargs = dict(self.options)
+        if self.columns is not None:
+            kwargs["columns"] = self.columns
+        if self.filters:
+            kwargs["filters"] = self.filters
+        return kwargs
+
+    def explain(self, structure_cache: StructureCache) -> str:
+        def _fmt(v: Any) -> str:
+            return ", ".join(str(x) for x in v) if v else "-"
+
+        lines = [f"reader: {self.reader}"]
+        columns = _fmt(self.columns) if self.columns is not None else "reader default"
+        if self.derived_columns:
+            columns += " (derived from aggregation)"
+        lines.append(f"projection: {columns}")
+        lines.append(f"filters: {_fmt([f'{k}={v}' for k, v in self.filters.items()])}")
+        if self.options.get("prefilter_headers", False):
+            header = _fmt(self.header_filters)
+            lines.append(f"header pushdown: {header} (filtered before unpacking)")
+        else:
+            lines.append("header pushdown: -")
+        lines.append(f"structure cache: {len(structure_cache)} cached entries")
+
+        stop = []
+        if self.max_count is not None:
+            stop.append(f"after message {self.max_count}")
+        if self.limit is not None:
+            stop.append(f"after {self.limit} rows")
+        lines.append(f"early termination: {_fmt(stop) if stop else '-'}")
+
+        if self.aggs is not None:
+            args, kwargs = self.aggs
+            agg = _fmt([*args, *[f"{k}={v}" for k, v in kwargs.items()]])
+            if self.group_by:
+                lines.append(f"aggregation: group by {_fmt(self.group_by)}, agg {agg}")
+            else:
+                lines.append(f"aggregation: {agg}")
+
+        return "\n".join(lines)
+
+
+class LazyQuery:
+    """Lazily defined query on BUFR data.
+
+    The query is only executed when :meth:`collect` or :meth:`iter_chunks` is called.
+    Each method defining the query returns a new :class:`LazyQuery` object. The
+    structure cache is shared between the queries derived from the same object so
+    subsequent executions do not need to analyse the message structure again.
+    """
+
+    def __init__(
+        self,
+        path_or_messages: Union[str, bytes, "os.PathLike[Any]", Iterable[MutableMapping[str, Any]]],
+        reader: str = "generic",
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        by: Sequence[str] = (),
+        aggs: Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        structure_cache: Optional[StructureCache] = None,
+    ) -> None:
+        self.path_or_messages = path_or_messages
+        self.reader = reader
+        self.columns = columns
+        self.filters = filters or {}
+        self.limit = limit
+        self.by = tuple(by)
+        self.aggs = aggs
+        self.options = options or {}
+        self.structure_cache = structure_cache if structure_cache is not None else StructureCache()
+
+    def _replace(self, **kwargs: Any) -> "LazyQuery":
+        d = dict(
+            path_or_messages=self.path_or_messages,
+            reader=self.reader,
+            columns=self.columns,
+            filters=self.filters,
+            limit=self.limit,
+            by=self.by,
+            aggs=self.aggs,
+            options=self.options,
+            structure_cache=self.structure_cache,
+        )
+        d.update(kwargs)
+        return LazyQuery(**d)
+
+    def select(self, *columns: Union[str, Sequence[str]]) -> "LazyQuery":
+        """Select the columns to extract"""
+        r: List[str] = []
+        for c in columns:
+            if isinstance(c, str):
+                r.append(c)
+            else:
+                r.extend(c)
+        return self._replace(columns=r)
+
+    def filter(self, filters: Optional[Dict[str, Any]] = None, **kwargs: Any) -> "LazyQuery":
+        """Add filters. They are combined with the already defined filters with the logical
+        AND operator. A key can only be filtered once, unless the conditions are the same.
+        """
+        f = dict(self.filters)
+        for k, v in {**(filters or {}), **kwargs}.items():
+            if k in f and not _same_filter(f[k], v):
+                raise ValueError(f"Conflicting filters for {k}: {f[k]!r} and {v!r}")
+            f[k] = v
+        return self._replace(filters=f)
+
+    def head(self, n: int) -> "LazyQuery":
+        """Only extract the first ``n`` rows"""
+        if n < 0:
+            raise ValueError(f"Invalid limit={n}")
+        limit = n if self.limit is None else min(n, self.limit)
+        return self._replace(limit=limit)
+
+    limit_rows = head
+
+    def group_by(self, *keys: str) -> "LazyQuery":
+        """Group the results by the given columns. Must be followed by :meth:`agg`"""
+        return self._replace(by=keys)
+
+    def agg(self, *args: Any, **kwargs: Any) -> "LazyQuery":
+        """Aggregate the results. The arguments are the same as for ``pandas.DataFrame.agg``
+        or, when :meth:`group_by` is used, for ``pandas.core.groupby.DataFrameGroupBy.agg``.
+        """
+        return self._replace(aggs=(args, kwargs))
+
+    def plan(self) -> QueryPlan:
+        return QueryPlan(self)
+
+    def explain(self) -> str:
+        """Return the description of the execution plan"""
+        return self.plan().explain(self.structure_cache)
+
+    @staticmethod
+    def _check(plan: QueryPlan) -> None:
+        if plan.group_by and plan.aggs is None:
+            raise ValueError("group_by() must be followed by agg()")
+
+    def _make_reader(self, plan: QueryPlan) -> Any:
+        from .readers import get_reader
+
+        reader = get_reader(plan.reader, self.path_or_messages, **plan.reader_kwargs())
+        reader.structure_cache = self.structure_cache
+        return reader
+
+    def _records(self, reader: Any, plan: QueryPlan, bufr_obj: Any) -> Iterator[Dict[str, Any]]:
+        # stops decoding as soon as enough rows are generated
+        return reader.iter_records(bufr_obj, nrows=plan.limit)
+
+    def collect(self, output: str = "pandas", dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> Any:
+        """Execute the query and return the result"""
+        from .core.columns import ColumnStore
+
+        plan = self.plan()
+        self._check(plan)
+        reader = self._make_reader(plan)
+        reader.set_output(output)
+
+        if plan.aggs is not None and output != "pandas":
+            raise ValueError("Aggregations are only supported with output=pandas")
+
+        with reader.bufr_source() as bufr_obj:
+            store = ColumnStore().extend(self._records(reader, plan, bufr_obj))
+
+        res = reader.finalise(store, output=output, dtypes=dtypes, nrows=plan.limit)
+
+        if plan.aggs is not None:
+            res = self._aggregate(res, plan)
+        return res
+
+    def iter_chunks(
+        self, chunk_size: int = 65536, dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> Iterator["pd.DataFrame"]:
+        """Execute the query and generate the result in DataFrames of at most ``chunk_size`` rows"""
+        from .core.columns import ColumnStore
+
+        plan = self.plan()
+        self._check(plan)
+        if plan.aggs is not None:
+            raise ValueError("Aggregations are not supported with iter_chunks()")
+
+        reader = self._make_reader(plan)
+        # the last records can generate more rows than needed
+        remaining = plan.limit
+        with reader.bufr_source() as bufr_obj:
+            store = ColumnStore()
+            for r in self._records(reader, plan, bufr_obj):
+                store.append(r)
+                if len(store) >= chunk_size:
+                    df = reader.finalise(store, dtypes=dtypes, nrows=remaining)
+                    if remaining is not None:
+                        remaining -= len(df)
+                    yield df
+                    store = ColumnStore()
+
+            if len(store) > 0:
+                yield reader.finalise(store, dtypes=dtypes, nrows=remaining)
+
+    @staticmethod
+    def _aggregate(df: "pd.DataFrame", plan: QueryPlan) -> "pd.DataFrame":
+        args, kwargs = plan.aggs
+        if plan.group_by:
+            return df.groupby(plan.group_by, sort=False).agg(*args, **kwargs).reset_index()
+        return df.agg(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"LazyQuery\n{self.explain()}"
+
+
+def scan_bufr(
+    path_or_messages: Union[str, bytes, "os.PathLike[Any]", Iterable[MutableMapping[str, Any]]],
+    *,
+    reader: str = "generic",
+    **kwargs: Any,
+) -> LazyQuery:
+    """
+    Create a lazy query on a BUFR file. No data is read until :meth:`LazyQuery.collect`
+    or :meth:`LazyQuery.iter_chunks` is called.
+
+    :param path_or_messages: the path to the BUFR file or the messages
+    :param reader: the name of the reader
+    :param kwargs: other options passed to the reader
+    """
+    return LazyQuery(path_or_messages, reader=reader, options=kwargs)
@@ -0,0 +1,145 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import json
+import logging
+import os
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+import eccodes  # type: ignore
+
+from .high_level_bufr.bufr import BufrFile
+
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+    import pyarrow as pa  # type: ignore
+
+LOG = logging.getLogger(__name__)
+
+
+class TailBufrFile(BufrFile):
+    """BUFR file reading the messages from the byte ``offset``. The iteration stops at
+    the first incomplete message, which is assumed to be still being written.
+
+    ``offset`` and ``count`` always refer to the end of the last complete message read
+    and the number of messages read so far in the whole file.
+    """
+
+    def __init__(self, filename: Union[str, "os.PathLike[Any]"], offset: int = 0, count: int = 0) -> None:
+        super().__init__(filename)
+        self.file_handle.seek(offset)
+        self.offset = offset
+        self.count = count
+        self.first_count = count + 1
+
+    def next(self) -> Any:
+        try:
+            msg = self.MessageClass(self)
+        except IOError:
+            raise StopIteration()
+        except eccodes.PrematureEndOfFileError:
+            LOG.debug(f"Incomplete message at offset={self.offset} in {self.name}")
+            raise StopIteration()
+
+        self.offset = self.file_handle.tell()
+        self.count += 1
+        return msg
+
+
+class Checkpoint:
+    """The position reached when reading a BUFR file incrementally. It is stored as a
+    JSON file.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, offset: int = 0, count: int = 0, inode: Optional[int] = None
+    ) -> None:
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.inode = inode
+
+    @classmethod
+    def load(cls, target: Union[str, "os.PathLike[Any]"]) -> "Checkpoint":
+        """Load the checkpoint. Return an empty checkpoint if ``target`` does not exist"""
+        if not os.path.exists(target):
+            return cls()
+        with open(target, "r") as f:
+            return cls(**json.load(f))
+
+    def save(self, target: Union[str, "os.PathLike[Any]"]) -> None:
+        tmp = f"{os.fspath(target)}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.as_dict(), f)
+        os.replace(tmp, target)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(path=self.path, offset=self.offset, count=self.count, inode=self.inode)
+
+    def resolve(self, path: Union[str, "os.PathLike[Any]"]) -> None:
+        """Check the checkpoint is valid for ``path``. When the file was replaced or
+        truncated since the last read the checkpoint is reset to the start of the file.
+        """
+        path = os.path.abspath(os.fspath(path))
+        if self.path is not None and self.path != path:
+            raise ValueError(f"Checkpoint belongs to file={self.path}, cannot be used for file={path}")
+
+        st = os.stat(path)
+        if self.path is not None and (st.st_ino != self.inode or st.st_size < self.offset):
+            LOG.warning(f"File={path} was replaced or truncated, reading it from the start")
+            self.offset = 0
+            self.count = 0
+
+        self.path = path
+        self.inode = st.st_ino
+
+
+def read_bufr_tail(
+    path: Union[str, "os.PathLike[Any]"],
+    checkpoint: Union[str, "os.PathLike[Any]"],
+    columns: Union[Sequence[str], str] = [],
+    *,
+    reader: str = "generic",
+    output: str = "pandas",
+    dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+    **kwargs: Any,
+) -> Union["pd.DataFrame", "pa.Table"]:
+    """
+    Read the messages appended to a BUFR file since the previous call.
+
+    The position reached is stored in the ``checkpoint`` JSON file, which is created
+    on the first call. A trailing incomplete message is ignored and read in full
+    by a subsequent call. The message count (e.g. used in the "count" filter) refers
+    to the position of the message in the whole file. The rest of the arguments are
+    the same as for :func:`read_bufr`.
+    """
+    from .readers import get_reader
+
+    cp = Checkpoint.load(checkpoint)
+    cp.resolve(path)
+
+    if kwargs.get("nrows") is not None or kwargs.get("head") is not None:
+        # the checkpoint can only be stored at message boundaries
+        raise ValueError("nrows and head are not supported by read_bufr_tail()")
+
+    kwargs = dict(**kwargs)
+    flat = kwargs.pop("flat", False)
+
+    with TailBufrFile(path, offset=cp.offset, count=cp.count) as bufr_obj:
+        r = get_reader(reader, bufr_obj, flat=flat, columns=columns, **kwargs)
+        res = r.execute(output=output, dtypes=dtypes)
+        cp.offset = bufr_obj.offset
+        cp.count = bufr_obj.count
+
+    cp.save(checkpoint)
+    return res
@@ -19,6 +19,7 @@ from typing import Union
 
 import pdbufr.core.param as PARAMS
 from pdbufr.core.keys import COMPUTED_KEYS
+from pdbufr.core.missing import is_missing
 from pdbufr.utils.exception import AllValueMissingException
 
 LOG = logging.getLogger(__name__)
@@ -133,14 +134,17 @@ class SimpleAccessor(Accessor):
                     v, units = value.get(key, (None, None))
 
                     # convert units
-                    if v is not None and units_converter is not None and param.units:
+                    if not is_missing(v) and units_converter is not None and param.units:
                         v, units = units_converter.convert(label, v, units)
 
                     # handle period
                     if param.is_period():
                         v = param.concat_units(v, units)
                     elif (
-                        v is not None and self.dtype is not None and self.param and self.param.label == label
+                        not is_missing(v)
+                        and self.dtype is not None
+                        and self.param
+                        and self.param.label == label
                     ):
                         try:
                             v = self.dtype(v)
@@ -246,6 +250,25 @@ class ComputedKeyAccessor(Accessor):
         return {self.labels[0]: val}
 
 
+class CoordLabels:
+    """The output labels of a :class:`CoordAccessor` for a given period"""
+
+    def __init__(self, accessor: "CoordAccessor", period: str) -> None:
+        keys = accessor.key_labels
+        self.values = {key: key + period for key in keys}
+        self.units = [(key + "_units", key + period + "_units") for key in keys]
+        self.coords = [
+            (coord, [key + period + "_" + coord.suffix for key in keys]) for coord in accessor.extract_coords
+        ]
+        self.fixed_coords = []
+        if not accessor.extract_coords:
+            self.fixed_coords = [
+                (key + period + "_" + coord.suffix, coord.value)
+                for key in keys
+                for coord in accessor.coords.values()
+            ]
+
+
 class CoordAccessor(SimpleAccessor):
     def __init__(
         self,
@@ -261,6 +284,7 @@ class CoordAccessor(SimpleAccessor):
         self.mandatory = [*self.bufr_keys]
         self.key_labels = [*self.labels]
         self.first = first
+        self._period_labels: Dict[str, CoordLabels] = {}
 
         # period coords
         self.period_bufr_key = None
@@ -312,37 +336,40 @@ class CoordAccessor(SimpleAccessor):
             if self.period.is_fixed():
                 return self.period.value
             period = record.pop("_period", None)
-            if not period or period is None:
+            if is_missing(period) or not period:
                 period = "nan"
             return period
         return None
 
+    def period_labels(self, period: str) -> "CoordLabels":
+        """Return the output labels for the given period. They are only built once per period."""
+        labels = self._period_labels.get(period)
+        if labels is None:
+            labels = CoordLabels(self, period)
+            self._period_labels[period] = labels
+        return labels
+
     def get_coords(self, record: Dict[str, Any], period) -> Dict[str, Any]:
         if self.coords:
+            labels = self.period_labels(period)
             coords = {}
             if self.extract_coords:
-                for coord in self.extract_coords:
+                for coord, coord_labels in labels.coords:
                     v = record.pop(coord.label, None)
-                    for key in self.key_labels:
-                        label = key + period + "_" + coord.suffix
+                    for label in coord_labels:
                         coords[label] = v
             else:
-                for key in self.key_labels:
-                    for k, coord in self.coords.items():
-                        label = key + period + "_" + coord.suffix
-                        coords[label] = coord.value
+                for label, value in labels.fixed_coords:
+                    coords[label] = value
 
             return coords
         return None
 
     def get_units(self, record: Dict[str, Any], period: str) -> Dict[str, Any]:
         units = {}
-        for key in self.key_labels:
-            label = key + "_units"
+        for label, target in self.period_labels(period).units:
             if label in record:
-                v = record.pop(label, None)
-                label = key + period + "_units"
-                units[label] = v
+                units[target] = record.pop(label, None)
         return units
 
     def relabel(
@@ -374,9 +401,11 @@ class CoordAccessor(SimpleAccessor):
                 self.key_labels
             ), f"Record {r} has more keys than expected: {self.key_labels}! {len(r)} != {len(self.key_labels)}"
 
+            value_labels = self.period_labels(period).values
             for k, v in r.items():
-                if k in self.key_labels:
-                    res[k + period] = v
+                label = value_labels.get(k)
+                if label is not None:
+                    res[label] = v
 
             if units:
                 res.update(units)
@@ -426,6 +455,7 @@ class CoordAccessor(SimpleAccessor):
 
 class MultiAccessorBase(Accessor):
     accessors: List[Accessor] = []
+    _needed_keys: Optional[List[str]] = None
 
     def __init__(self, accessors: Optional[List[Accessor]] = None, **kwargs: Any):
         self.accessors = accessors or self.accessors
@@ -436,17 +466,23 @@ class MultiAccessorBase(Accessor):
 
     @property
     def needed_keys(self) -> List[str]:
-        r = []
-        for a in self.accessors:
-            r.extend(a.needed_keys)
-        return r
+        if self._needed_keys is None:
+            r = []
+            for a in self.accessors:
+                r.extend(a.needed_keys)
+            self._needed_keys = r
+        return self._needed_keys
 
 
 class MultiFirstAccessor(MultiAccessorBase):
     def collect(self, collector: Any, **kwargs: Any) -> Dict[str, Any]:
         for a in self.accessors:
+            # the alternatives without any of their keys in the subset cannot succeed
+            sub = collector.restrict(a.needed_keys)
+            if not sub.filtered_keys:
+                continue
             try:
-                r = a.collect(collector, raise_on_missing=True, **kwargs)
+                r = a.collect(sub, raise_on_missing=True, **kwargs)
                 if r:
                     return r
             except AllValueMissingException:
@@ -463,7 +499,9 @@ class MultiAllAccessor(MultiAccessorBase):
     def collect(self, collector: Any, **kwargs: Any) -> Dict[str, Any]:
         res = {}
         for a in self.accessors:
-            r = a.collect(collector, raise_on_missing=False, **kwargs)
+            # an alternative without any of its keys in the subset can still generate
+            # the fixed coordinates
+            r = a.collect(collector.restrict(a.needed_keys), raise_on_missing=False, **kwargs)
             if r:
                 res.update(r)
 
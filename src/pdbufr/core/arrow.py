@@ -0,0 +1,273 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import logging
+import os
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from pdbufr.core.missing import is_missing
+
+LOG = logging.getLogger(__name__)
+
+
+def import_pyarrow() -> Any:
+    try:
+        import pyarrow  # type: ignore
+    except ImportError:
+        raise ModuleNotFoundError(
+            "pyarrow is required for Arrow and Parquet output. Install it with: pip install pyarrow"
+        )
+    return pyarrow
+
+
+def arrow_type(dtype: Any) -> Any:
+    """Convert a pandas/numpy dtype specification into an Arrow type. Return None for
+    categoricals, which are represented by dictionary encoding.
+    """
+    pa = import_pyarrow()
+    if isinstance(dtype, pa.DataType):
+        return dtype
+    if isinstance(dtype, str):
+        if dtype == "category":
+            return None
+        if dtype == "boolean":
+            return pa.bool_()
+        # nullable integer types, e.g. "Int16"
+        return pa.type_for_alias(dtype.lower())
+    return pa.from_numpy_dtype(dtype)
+
+
+def make_array(values: List[Any], dictionary: bool = True, dtype: Optional[Any] = None) -> Any:
+    """Create an Arrow array from the values of a column.
+
+    NaN values are regarded as missing and a column with only NaN values is a float column.
+    When the values cannot be converted into a single Arrow type (e.g. a mixture of numbers
+    and strings) they are stored as strings. String columns are dictionary encoded when
+    ``dictionary`` is True.
+    """
+    pa = import_pyarrow()
+    target = arrow_type(dtype) if dtype is not None else None
+    try:
+        arr = pa.array(values, type=target, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = pa.array([None if is_missing(v) else str(v) for v in values], type=pa.string())
+
+    if pa.types.is_null(arr.type) and any(v is not None for v in values):
+        # only NaN or pd.NA, i.e. a numeric column without any value
+        arr = arr.cast(pa.float64())
+
+    if (dictionary or dtype == "category") and pa.types.is_string(arr.type):
+        arr = arr.dictionary_encode()
+    return arr
+
+
+def columns_to_table(
+    data: Dict[str, List[Any]], dictionary: bool = True, dtypes: Optional[Union[str, Dict[str, Any]]] = None
+) -> Any:
+    """Create an Arrow Table from a dict of column values"""
+    from .columns import DtypePolicy
+
+    pa = import_pyarrow()
+    policy = dtypes if isinstance(dtypes, DtypePolicy) else DtypePolicy(dtypes)
+    return pa.table(
+        {
+            name: make_array(values, dictionary=dictionary, dtype=policy.dtype(name, values))
+            for name, values in data.items()
+        }
+    )
+
+
+def promote_type(a: Any, b: Any) -> Any:
+    """Return the Arrow type able to store the values of both types. Integers are promoted
+    to int64, mixed integers and floats to float64. When there is no common numeric type
+    the values are stored as strings, in the same way as by :func:`make_array`.
+    """
+    pa = import_pyarrow()
+    if a == b:
+        return a
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_null(b):
+        return a
+
+    dictionary = pa.types.is_dictionary(a) or pa.types.is_dictionary(b)
+    a = a.value_type if pa.types.is_dictionary(a) else a
+    b = b.value_type if pa.types.is_dictionary(b) else b
+
+    if a == b:
+        res = a
+    elif pa.types.is_integer(a) and pa.types.is_integer(b):
+        res = pa.int64()
+    elif (pa.types.is_integer(a) or pa.types.is_floating(a)) and (
+        pa.types.is_integer(b) or pa.types.is_floating(b)
+    ):
+        res = pa.float64()
+    else:
+        res = pa.string()
+
+    if dictionary and pa.types.is_string(res):
+        return pa.dictionary(pa.int32(), res)
+    return res
+
+
+def unify_schema(schema: Any, table_schema: Any) -> Any:
+    """Return the schema containing the columns of both schemas. The new columns are
+    added to the end and the types are promoted with :func:`promote_type`.
+    """
+    pa = import_pyarrow()
+    fields = []
+    for f in schema:
+        idx = table_schema.get_field_index(f.name)
+        if idx != -1:
+            f = f.with_type(promote_type(f.type, table_schema.field(idx).type))
+        fields.append(f)
+    for f in table_schema:
+        if schema.get_field_index(f.name) == -1:
+            fields.append(f)
+    return pa.schema(fields)
+
+
+class ParquetStreamWriter:
+    """Write Arrow tables into a Parquet file as separate row groups.
+
+    The schema of the file contains all the columns of the tables in the order they first
+    appeared, with the types promoted to store all the values (see :func:`unify_schema`).
+    The tables are written into a part file while the schema does not change. When a
+    table adds new columns or needs a wider type a new part file is started, and when
+    the writer is closed the parts are merged row group by row group into ``target``
+    using the final schema. Columns only containing missing values are stored as float64.
+    """
+
+    def __init__(self, target: Union[str, "os.PathLike[Any]"], **kwargs: Any) -> None:
+        self.target = os.fspath(target)
+        self.kwargs = kwargs
+        self.writer = None
+        self.schema = None
+        self.parts: List[str] = []
+        self.rows = 0
+
+    def __enter__(self) -> "ParquetStreamWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @staticmethod
+    def _file_schema(schema: Any) -> Any:
+        pa = import_pyarrow()
+        return pa.schema([f.with_type(pa.float64()) if pa.types.is_null(f.type) else f for f in schema])
+
+    @staticmethod
+    def _conform(table: Any, schema: Any) -> Any:
+        pa = import_pyarrow()
+        columns = []
+        for f in schema:
+            if f.name in table.column_names:
+                col = table.column(f.name)
+                if col.type != f.type:
+                    if pa.types.is_dictionary(col.type):
+                        col = col.cast(col.type.value_type)
+                    if pa.types.is_dictionary(f.type):
+                        # the dictionary types cannot be cast to directly
+                        col = col.cast(f.type.value_type).dictionary_encode()
+                        if col.type != f.type:
+                            col = col.cast(f.type)
+                    else:
+                        col = col.cast(f.type)
+            else:
+                col = pa.nulls(table.num_rows, type=f.type)
+            columns.append(col)
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def _open_part(self) -> None:
+        import pyarrow.parquet as pq  # type: ignore
+
+        if self.writer is not None:
+            self.writer.close()
+        path = f"{self.target}.part{len(self.parts)}"
+        self.parts.append(path)
+        self.writer = pq.ParquetWriter(path, self._file_schema(self.schema), **self.kwargs)
+
+    def write(self, table: Any) -> None:
+        import_pyarrow()
+
+        if self.schema is None:
+            self.schema = table.schema
+            self._open_part()
+        else:
+            schema = unify_schema(self.schema, table.schema)
+            if not schema.equals(self.schema):
+                self.schema = schema
+                self._open_part()
+
+        if table.num_rows > 0:
+            self.writer.write_table(self._conform(table, self._file_schema(self.schema)))
+            self.rows += table.num_rows
+
+    def close(self) -> None:
+        if self.writer is None:
+            return
+
+        import pyarrow.parquet as pq  # type: ignore
+
+        self.writer.close()
+        self.writer = None
+
+        try:
+            if len(self.parts) == 1:
+                os.replace(self.parts[0], self.target)
+            else:
+                schema = self._file_schema(self.schema)
+                with pq.ParquetWriter(self.target, schema, **self.kwargs) as writer:
+                    for path in self.parts:
+                        f = pq.ParquetFile(path)
+                        for i in range(f.num_row_groups):
+                            writer.write_table(self._conform(f.read_row_group(i), schema))
+        except Exception:
+            # a partially merged file is not left behind
+            if os.path.exists(self.target):
+                os.remove(self.target)
+            raise
+        finally:
+            self._remove_parts()
+
+    def abort(self) -> None:
+        """Close the writer without writing ``target`` and remove the part files"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self._remove_parts()
+
+    def _remove_parts(self) -> None:
+        for path in self.parts:
+            if os.path.exists(path):
+                os.remove(path)
+        self.parts = []
+
+    @property
+    def empty(self) -> bool:
+        return self.schema is None
+
+
+def write_parquet(
+    tables: Any, target: Union[str, "os.PathLike[Any]"], compression: Optional[str] = "snappy", **kwargs: Any
+) -> int:
+    """Write an iterable of Arrow tables into ``target``, each table as a separate row group.
+    Return the number of rows written.
+    """
+    with ParquetStreamWriter(target, compression=compression, **kwargs) as writer:
+        for t in tables:
+            writer.write(t)
+        return writer.rows
@@ -0,0 +1,189 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from pdbufr.core.columns import columns_to_dataframe
+from pdbufr.core.columns import concat_arrays
+from pdbufr.core.columns import series_values
+from pdbufr.core.missing import numeric_array
+from pdbufr.core.profiles import import_xarray
+
+CHANNEL = "channel"
+
+
+class ChannelBlock:
+    """The per-channel data of the observations of a single message.
+
+    Attributes
+    ----------
+    observations: dict
+        The per-observation data as a NumPy array per column.
+    channels: numpy.ndarray
+        The channel numbers.
+    values: dict
+        The per-channel data as a 2-D NumPy array (observation × channel) per column.
+    count: int
+        The number of observations.
+    """
+
+    def __init__(
+        self,
+        observations: Dict[str, np.ndarray],
+        channels: np.ndarray,
+        values: Dict[str, np.ndarray],
+        count: int,
+    ) -> None:
+        self.observations = observations
+        self.channels = channels
+        self.values = values
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def rows(self) -> int:
+        """The number of rows in the long layout (see :meth:`ChannelData.to_columns`)"""
+        return self.count * len(self.channels)
+
+
+class ChannelData:
+    """Per-channel data (e.g. brightness temperatures) of satellite observations.
+
+    Each observation (subset) has the same set of channels. When the messages contain
+    different channels the union of them is used and the values of the channels missing
+    from a message are NaN.
+
+    Attributes
+    ----------
+    observations: pandas.DataFrame
+        The per-observation data (e.g. the geolocation) with one row per observation.
+    channels: numpy.ndarray
+        The channel numbers.
+    values: dict
+        The per-channel data as a 2-D NumPy array (observation × channel) per column.
+    mask: numpy.ndarray
+        2-D boolean array (observation × channel), True where the channel is present
+        in the message of the observation.
+    """
+
+    def __init__(
+        self,
+        observations: pd.DataFrame,
+        channels: np.ndarray,
+        values: Dict[str, np.ndarray],
+        mask: Optional[np.ndarray] = None,
+    ) -> None:
+        self.observations = observations
+        self.channels = channels
+        self.values = values
+        if mask is None:
+            mask = np.ones((len(observations), len(channels)), dtype=bool)
+        self.mask = mask
+
+    @classmethod
+    def from_blocks(
+        cls, blocks: List[ChannelBlock], dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> "ChannelData":
+        """Create the data from the blocks collected for each message"""
+        blocks = [b for b in blocks if len(b) > 0]
+        if not blocks:
+            return cls(pd.DataFrame(), np.array([], dtype=np.int64), {})
+
+        channels = pd.unique(np.concatenate([b.channels for b in blocks]))
+        index = pd.Index(channels)
+        counts = [len(b) for b in blocks]
+        n, n_channel = sum(counts), len(channels)
+        starts = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+
+        obs_names: Dict[str, None] = {}
+        value_names: Dict[str, None] = {}
+        for b in blocks:
+            obs_names.update(dict.fromkeys(b.observations))
+            value_names.update(dict.fromkeys(b.values))
+
+        observations = {}
+        for name in obs_names:
+            parts = []
+            for b, count in zip(blocks, counts):
+                v = b.observations.get(name)
+                parts.append(v if v is not None else np.full(count, np.nan))
+            observations[name] = concat_arrays(parts)
+
+        values = {name: np.full((n, n_channel), np.nan) for name in value_names}
+        mask = np.zeros((n, n_channel), dtype=bool)
+        for i, b in enumerate(blocks):
+            rows = slice(starts[i], starts[i + 1])
+            cols = index.get_indexer(b.channels)
+            mask[rows, cols] = True
+            for name, v in b.values.items():
+                values[name][rows, cols] = v
+
+        observations = columns_to_dataframe(observations, dtypes=dtypes)
+        if observations.empty:
+            observations = pd.DataFrame(index=pd.RangeIndex(n))
+        return cls(observations, channels, values, mask)
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    def head(self, n: int) -> "ChannelData":
+        """Return the data of the first ``n`` rows of the long layout (see :meth:`to_columns`).
+        The channels of the last observation after these rows are masked out.
+        """
+        rows = np.cumsum(self.mask.sum(axis=1))
+        if len(rows) == 0 or n >= rows[-1]:
+            return self
+
+        count = int(np.searchsorted(rows, n)) + 1 if n > 0 else 0
+        mask = self.mask[:count].copy()
+        flat = mask.reshape(-1)
+        flat[np.flatnonzero(flat)[n:]] = False
+        values = {name: np.where(mask, v[:count], np.nan) for name, v in self.values.items()}
+        return ChannelData(self.observations.iloc[:count], self.channels, values, mask)
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Return the data in a long layout with one row per observation and channel.
+        The channels not present in the message of an observation are omitted.
+        """
+        if len(self) == 0:
+            return {}
+
+        rows, cols = np.nonzero(self.mask)
+        data = {name: series_values(self.observations[name])[rows] for name in self.observations.columns}
+        data[CHANNEL] = self.channels[cols]
+        for name, v in self.values.items():
+            data[name] = v[rows, cols]
+        return data
+
+    def to_dataframe(self, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+        """Convert the data into a DataFrame with one row per observation and channel"""
+        return columns_to_dataframe(self.to_columns(), dtypes=dtypes)
+
+    def to_xarray(self) -> Any:
+        """Convert the data into an xarray Dataset with "observation" and "channel" dimensions"""
+        xr = import_xarray()
+
+        data_vars = {
+            name: (("observation",), numeric_array(series_values(self.observations[name])))
+            for name in self.observations.columns
+        }
+        for name, v in self.values.items():
+            data_vars[name] = (("observation", CHANNEL), v)
+
+        coords = {"observation": np.arange(len(self)), CHANNEL: self.channels}
+        return xr.Dataset(data_vars, coords=coords)
@@ -0,0 +1,363 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import sys
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from pdbufr.core.missing import is_missing
+from pdbufr.core.missing import numeric_array
+
+
+def intern_strings(value: Any) -> Any:
+    """Intern the strings in a value fetched from a message.
+
+    String keys of compressed messages are returned by ecCodes as lists holding a separate
+    object for each subset, even when the values are the same (e.g. aircraft or station
+    identifiers). After interning, each distinct string is only stored once, across all
+    the messages, and the columns only hold references to it. This also speeds up the
+    conversion into categoricals or dictionary arrays, since the hash of each distinct
+    string is only computed once.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list) and value and isinstance(value[0], str):
+        return [sys.intern(v) if isinstance(v, str) else v for v in value]
+    return value
+
+
+def concat_arrays(parts: List[Any]) -> Any:
+    """Concatenate the parts of a column. When a part is a nullable integer array (see
+    :func:`pdbufr.core.missing.normalise_missing`) the result is a nullable integer array if
+    all the parts can be converted into one, e.g. integers and all-NaN fill values.
+    """
+    if not any(isinstance(p, pd.arrays.IntegerArray) for p in parts):
+        return np.concatenate(parts)
+    try:
+        return pd.concat([pd.Series(pd.array(p, dtype="Int64")) for p in parts], ignore_index=True).array
+    except (TypeError, ValueError):
+        return np.concatenate([numeric_array(p) for p in parts])
+
+
+def series_values(series: pd.Series) -> Any:
+    """Return the values of a DataFrame column as an array. Unlike ``to_numpy()`` the
+    nullable integers are kept typed.
+    """
+    if isinstance(series.array, pd.arrays.IntegerArray):
+        return series.array
+    return series.to_numpy()
+
+
+def make_column(values: List[Any]) -> pd.Series:
+    """Create a column with the inferred dtype. The missing integers are ``pd.NA`` (see
+    :func:`pdbufr.core.missing.normalise_missing`) so pandas would generate an object
+    column from them; instead the integers become a nullable "Int64" column and the
+    floats a float column with NaN.
+    """
+    s = pd.Series(values)
+    if s.dtype == object and len(s) > 0:
+        t = pd.api.types.infer_dtype(s, skipna=True)
+        if t == "integer":
+            return s.astype("Int64")
+        elif t in ("floating", "mixed-integer-float"):
+            return pd.to_numeric(s).astype(float)
+        elif t == "empty" and any(v is pd.NA for v in values):
+            # only missing integers
+            return pd.Series(np.nan, index=s.index)
+    return s
+
+
+class ColumnBlock:
+    """Column buffers for all the records sharing the same template, i.e. the same
+    ordered set of column names.
+
+    The values are buffered in lists and the dtypes are only inferred for the whole
+    column when the table is generated, since a column can contain a mixture of
+    integers, floats, None and strings across the records.
+    """
+
+    def __init__(self, columns: Tuple[str, ...]) -> None:
+        self.columns = columns
+        self.data: List[List[Any]] = [[] for _ in columns]
+        # the position of each record in the resulting table
+        self.rows: List[int] = []
+
+    def append(self, row: int, values: Iterable[Any]) -> None:
+        self.rows.append(row)
+        for col, v in zip(self.data, values):
+            col.append(v)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class ColumnStore:
+    """Collects records into per-template column buffers and builds the final table in
+    a single step.
+
+    Records with different sets of keys are stored in separate blocks so no per-record
+    alignment is needed. The schemas of the blocks are only unified once when the table
+    is generated. The column order is the order of the first appearance of each column,
+    the row order is the order in which the records were added.
+    """
+
+    def __init__(self) -> None:
+        self.blocks: Dict[Tuple[str, ...], ColumnBlock] = {}
+        self.count = 0
+
+    def append(self, record: Mapping[str, Any]) -> None:
+        columns = tuple(record)
+        block = self.blocks.get(columns)
+        if block is None:
+            block = ColumnBlock(columns)
+            self.blocks[columns] = block
+        block.append(self.count, record.values())
+        self.count += 1
+
+    def extend(self, records: Iterable[Mapping[str, Any]]) -> "ColumnStore":
+        for r in records:
+            self.append(r)
+        return self
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def first_count(self) -> int:
+        """Return the number of columns in the first record"""
+        for b in self.blocks.values():
+            return len(b.columns)
+        return 0
+
+    def columns(self) -> List[str]:
+        """Return the union of the columns of all the blocks in order of first appearance"""
+        r: Dict[str, None] = {}
+        for b in self.blocks.values():
+            r.update(dict.fromkeys(b.columns))
+        return list(r)
+
+    def column_data(self) -> Dict[str, List[Any]]:
+        """Return the data of each column aligned to the full length of the table.
+
+        Values missing from a block (i.e. the column is not part of the template) are
+        represented by NaN, just like when a DataFrame is generated from a list of dicts.
+        """
+        if len(self.blocks) == 1:
+            b = next(iter(self.blocks.values()))
+            return dict(zip(b.columns, b.data))
+
+        res: Dict[str, List[Any]] = {}
+        for name in self.columns():
+            res[name] = [np.nan] * self.count
+
+        for b in self.blocks.values():
+            for name, values in zip(b.columns, b.data):
+                col = res[name]
+                for row, v in zip(b.rows, values):
+                    col[row] = v
+
+        return res
+
+    def filter(self, func: Callable[[Dict[str, List[Any]]], np.ndarray]) -> "ColumnStore":
+        """Return a new store with the records selected by ``func``.
+
+        ``func`` is called with the data of each block and has to return a boolean mask
+        for the records of the block. The result is the same as if only the selected
+        records had been added to a new store. The column data of the blocks where all
+        the records are selected is shared with this store.
+        """
+        blocks = []
+        for b in self.blocks.values():
+            mask = np.asarray(func(dict(zip(b.columns, b.data))), dtype=bool)
+            if mask.all():
+                blocks.append((b, b.rows, b.data))
+            elif mask.any():
+                rows = [r for r, m in zip(b.rows, mask) if m]
+                data = [[v for v, m in zip(col, mask) if m] for col in b.data]
+                blocks.append((b, rows, data))
+
+        # the block order defines the column order so it has to follow the first
+        # selected record of each block
+        blocks.sort(key=lambda x: x[1][0])
+        rank = np.zeros(self.count, dtype=np.int64)
+        for _, rows, _ in blocks:
+            rank[rows] = 1
+        rank = np.cumsum(rank) - 1
+
+        res = ColumnStore()
+        for b, rows, data in blocks:
+            block = ColumnBlock(b.columns)
+            block.rows = rank[rows].tolist()
+            block.data = data
+            res.blocks[b.columns] = block
+            res.count += len(rows)
+        return res
+
+    def to_dataframe(self, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+        return columns_to_dataframe(self.column_data(), dtypes=dtypes)
+
+
+class DimensionStore:
+    """Collects the distinct rows of a dimension table (e.g. the stations) and assigns a
+    compact integer key to each of them.
+
+    The keys are the positions of the rows in the table starting at 0 and they are stored
+    in the ``key`` column of the table. Rows with the same columns and values get the same
+    key, missing values are treated as equal.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.keys: Dict[Tuple[Tuple[str, Any], ...], int] = {}
+        self.store = ColumnStore()
+
+    def add(self, record: Mapping[str, Any]) -> int:
+        """Add the row if it is not yet in the table and return its key"""
+        k = tuple((name, None if is_missing(v) else v) for name, v in record.items())
+        key = self.keys.get(k)
+        if key is None:
+            key = len(self.keys)
+            self.keys[k] = key
+            self.store.append({self.key: key, **record})
+        return key
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+INT_DTYPES = (
+    ("Int8", np.iinfo(np.int8)),
+    ("Int16", np.iinfo(np.int16)),
+    ("Int32", np.iinfo(np.int32)),
+)
+
+
+def narrow_int_dtype(values: List[Any]) -> str:
+    """Return the narrowest nullable integer dtype that can hold the values"""
+    v = [x for x in values if not is_missing(x)]
+    if v:
+        v_min = min(v)
+        v_max = max(v)
+        for name, info in INT_DTYPES:
+            if v_min >= info.min and v_max <= info.max:
+                return name
+    return "Int64"
+
+
+class DtypePolicy:
+    """Defines the dtypes of the resulting columns.
+
+    Parameters
+    ----------
+    dtypes: str, dict, None
+        The dtype specification. When it is a str it specifies the mode applied to all
+        the columns:
+
+        - "default": the dtypes are inferred from the values
+        - "compact": strings are stored as categoricals, integers as the narrowest
+          nullable integer type and booleans as the nullable boolean type
+        - "compact_float32": as "compact" but floats are stored as float32
+        - "categorical": strings are stored as categoricals, the other dtypes are inferred
+
+        When it is a dict it maps column names to dtypes. The special "*" key
+        can be used to specify the mode for all the other columns.
+    """
+
+    MODES = ("default", "compact", "compact_float32", "categorical")
+
+    def __init__(self, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> None:
+        self.mode = "default"
+        self.overrides: Dict[str, Any] = {}
+
+        if dtypes is None:
+            pass
+        elif isinstance(dtypes, str):
+            self.mode = dtypes
+        elif isinstance(dtypes, dict):
+            self.overrides = dict(dtypes)
+            self.mode = self.overrides.pop("*", "default")
+        else:
+            raise TypeError(f"dtypes must be a str or a dict, got {type(dtypes)}")
+
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unsupported dtypes mode={self.mode}. Available modes: {self.MODES}")
+
+    @property
+    def is_default(self) -> bool:
+        return self.mode == "default" and not self.overrides
+
+    @property
+    def float32(self) -> bool:
+        return self.mode == "compact_float32"
+
+    def kind(self, values: List[Any]) -> str:
+        """Return the kind of the values as used by the compact modes"""
+        t = pd.api.types.infer_dtype(values, skipna=True)
+        if t == "string":
+            return "string"
+        elif t == "integer":
+            return "integer"
+        elif t in ("floating", "mixed-integer-float"):
+            return "floating"
+        elif t == "boolean":
+            return "boolean"
+        return "other"
+
+    def dtype(self, name: str, values: List[Any]) -> Optional[Any]:
+        """Return the dtype for the column or None if it has to be inferred"""
+        dtype = self.overrides.get(name)
+        if dtype is not None:
+            return dtype
+
+        if self.mode == "default":
+            return None
+
+        kind = self.kind(values)
+        if kind == "string":
+            return "category"
+        elif self.mode == "categorical":
+            return None
+        elif kind == "integer":
+            return narrow_int_dtype(values)
+        elif kind == "floating":
+            return "float32" if self.float32 else None
+        elif kind == "boolean":
+            return "boolean"
+        return None
+
+    def make_series(self, name: str, values: List[Any]) -> pd.Series:
+        dtype = self.dtype(name, values)
+        if dtype is None:
+            return make_column(values)
+        if dtype in ("float32", "float64", float):
+            return make_column(values).astype(dtype)
+        return pd.Series(values, dtype=dtype)
+
+
+def columns_to_dataframe(
+    data: Dict[str, List[Any]], dtypes: Optional[Union[str, Dict[str, Any], DtypePolicy]] = None
+) -> pd.DataFrame:
+    """Create a DataFrame from a dict of column values"""
+    if not data:
+        return pd.DataFrame()
+
+    policy = dtypes if isinstance(dtypes, DtypePolicy) else DtypePolicy(dtypes)
+    if policy.is_default:
+        return pd.DataFrame({name: make_column(values) for name, values in data.items()})
+
+    return pd.DataFrame({name: policy.make_series(name, values) for name, values in data.items()})
@@ -0,0 +1,153 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import hashlib
+import logging
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Union
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+DEDUP_MODES = ("message", "header")
+
+# section 1 keys identifying a bulletin. The local section (e.g. the receipt time in
+# data coming from the ECMWF archive) is not used.
+HEADER_FINGERPRINT_KEYS = (
+    "bufrHeaderCentre",
+    "bufrHeaderSubCentre",
+    "updateSequenceNumber",
+    "dataCategory",
+    "internationalDataSubCategory",
+    "dataSubCategory",
+    "typicalDate",
+    "typicalTime",
+)
+
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.tobytes())
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def _hash_items(message: Any) -> bytes:
+    # messages not backed by ecCodes, e.g. dicts
+    h = hashlib.sha1()
+    for k in message:
+        v = message[k]
+        h.update(k.encode())
+        h.update(v.tobytes() if isinstance(v, np.ndarray) else repr(v).encode())
+    return h.digest()
+
+
+def message_fingerprint(message: Any, mode: str) -> Hashable:
+    """Return the fingerprint of the message computed without unpacking it.
+
+    With mode "message" it is the hash of the encoded message. With mode "header" it is
+    made of the section 1 keys (date, centre, update sequence number etc.) and the hash
+    of the encoded sections 3 and 4, i.e. the descriptors and the data. So the messages
+    only differing in the local section 2 are the same.
+    """
+    dump = getattr(message, "dump", None)
+    if dump is None:
+        return _hash_items(message)
+
+    if mode == "message":
+        return hashlib.sha1(dump()).digest()
+
+    header = tuple(_hashable(message.get(k)) for k in HEADER_FINGERPRINT_KEYS)
+    start = message["offsetSection3"]
+    end = message["offsetSection4"] + message["section4Length"]
+    return header + (hashlib.sha1(dump()[start:end]).digest(),)
+
+
+class Deduplicator:
+    """Remove the duplicate messages and rows while the data is being read.
+
+    When ``mode`` is "message" or "header" the duplicate messages are skipped before
+    unpacking, using the fingerprint computed by :func:`message_fingerprint`. When
+    ``keys`` is specified a row is skipped when the values of the ``keys`` columns were
+    already seen in an earlier row.
+    """
+
+    def __init__(self, mode: Optional[str] = None, keys: Optional[Union[str, Sequence[str]]] = None) -> None:
+        if mode is not None and mode not in DEDUP_MODES:
+            raise ValueError(f"Invalid dedup={mode!r}. Available modes: {DEDUP_MODES}")
+
+        if isinstance(keys, str):
+            keys = [keys]
+        if keys is not None and len(keys) == 0:
+            raise ValueError("dedup_keys cannot be empty")
+
+        self.mode = mode
+        self.keys = tuple(keys) if keys is not None else None
+        self.start()
+
+    @classmethod
+    def make(
+        cls, dedup: Any = None, dedup_keys: Optional[Union[str, Sequence[str]]] = None
+    ) -> Optional["Deduplicator"]:
+        if isinstance(dedup, Deduplicator):
+            return dedup
+        if dedup is None and dedup_keys is None:
+            return None
+        return cls(dedup, dedup_keys)
+
+    def start(self) -> None:
+        """Forget the messages and rows seen so far"""
+        self.seen_messages: Set[Hashable] = set()
+        self.seen_rows: Set[Hashable] = set()
+        self.skipped_messages = 0
+        self.skipped_rows = 0
+
+    def skip_message(self, message: Any) -> bool:
+        """Return True if the message is a duplicate and must not be processed"""
+        if self.mode is None:
+            return False
+
+        fp = message_fingerprint(message, self.mode)
+        if fp in self.seen_messages:
+            self.skipped_messages += 1
+            return True
+
+        self.seen_messages.add(fp)
+        return False
+
+    def filter_records(self, records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        if self.keys is None:
+            yield from records
+            return
+
+        keys = self.keys
+        seen = self.seen_rows
+        for r in records:
+            k = tuple(_hashable(r.get(c)) for c in keys)
+            if k in seen:
+                self.skipped_rows += 1
+                continue
+            seen.add(k)
+            yield r
+
+    def stats(self) -> Dict[str, int]:
+        return {"messages": self.skipped_messages, "rows": self.skipped_rows}
+
+    def report(self) -> None:
+        if self.skipped_messages or self.skipped_rows:
+            LOG.info(
+                f"Skipped {self.skipped_messages} duplicate messages and {self.skipped_rows} duplicate rows"
+            )
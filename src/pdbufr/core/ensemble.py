@@ -0,0 +1,237 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from pdbufr.core.columns import columns_to_dataframe
+from pdbufr.core.columns import concat_arrays
+from pdbufr.core.columns import series_values
+from pdbufr.core.missing import numeric_array
+from pdbufr.core.profiles import import_xarray
+
+STATION = "station"
+MEMBER = "member"
+STEP = "step"
+
+
+def _coords(values: np.ndarray) -> np.ndarray:
+    """Return the sorted distinct non-missing values. Integers are used when possible."""
+    v = np.unique(values[np.isfinite(values)])
+    if np.array_equal(v, np.round(v)):
+        return v.astype(np.int64)
+    return v
+
+
+class EnsembleBlock:
+    """The ensemble data of the subsets of a single message.
+
+    Attributes
+    ----------
+    stations: dict
+        The station data (e.g. the location) as a NumPy array per column with one
+        value per subset.
+    members: numpy.ndarray
+        The ensemble member number of each subset.
+    steps: numpy.ndarray
+        2-D array (subset × step) with the forecast steps. Steps not present in a subset
+        are NaN.
+    values: dict
+        The forecast values as a 2-D NumPy array (subset × step) per parameter.
+    """
+
+    def __init__(
+        self,
+        stations: Dict[str, np.ndarray],
+        members: np.ndarray,
+        steps: np.ndarray,
+        values: Dict[str, np.ndarray],
+    ) -> None:
+        self.stations = stations
+        self.members = members
+        self.steps = steps
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    @property
+    def rows(self) -> int:
+        """The number of rows in the long layout (see :meth:`EnsembleData.to_columns`).
+        The cells of a station, member and step present in several messages are only
+        counted once in the result, so this is an upper bound.
+        """
+        members = np.isfinite(np.asarray(self.members, dtype=float))
+        return int((np.isfinite(np.asarray(self.steps, dtype=float)) & members[:, np.newaxis]).sum())
+
+
+class EnsembleData:
+    """Ensemble forecasts at stations, e.g. ENS meteograms.
+
+    The values of each parameter are stored in a 3-D array (station × member × step), so
+    ``values[name][i]`` is the member × step array of station ``i``. The members and steps
+    are the union of the ones in the messages and the values not present in any of the
+    messages are NaN.
+
+    Attributes
+    ----------
+    stations: pandas.DataFrame
+        The station data with one row per station.
+    members: numpy.ndarray
+        The ensemble member numbers in ascending order.
+    steps: numpy.ndarray
+        The forecast steps in ascending order.
+    values: dict
+        The forecast values as a 3-D NumPy array (station × member × step) per parameter.
+    mask: numpy.ndarray
+        3-D boolean array (station × member × step), True where the step of the member is
+        present in the messages of the station.
+    """
+
+    def __init__(
+        self,
+        stations: pd.DataFrame,
+        members: np.ndarray,
+        steps: np.ndarray,
+        values: Dict[str, np.ndarray],
+        mask: Optional[np.ndarray] = None,
+    ) -> None:
+        self.stations = stations
+        self.members = members
+        self.steps = steps
+        self.values = values
+        if mask is None:
+            mask = np.ones((len(stations), len(members), len(steps)), dtype=bool)
+        self.mask = mask
+
+    @classmethod
+    def from_blocks(
+        cls, blocks: List[EnsembleBlock], dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> "EnsembleData":
+        """Create the data from the blocks collected for each message. The subsets with the
+        same station data belong to the same station, even when they are in different
+        messages.
+        """
+        blocks = [b for b in blocks if len(b) > 0]
+        if not blocks:
+            return cls(pd.DataFrame(), np.array([], dtype=np.int64), np.array([], dtype=np.int64), {})
+
+        counts = [len(b) for b in blocks]
+        n = sum(counts)
+
+        station_names: Dict[str, None] = {}
+        value_names: Dict[str, None] = {}
+        for b in blocks:
+            station_names.update(dict.fromkeys(b.stations))
+            value_names.update(dict.fromkeys(b.values))
+
+        stations = {}
+        for name in station_names:
+            parts = []
+            for b, count in zip(blocks, counts):
+                v = b.stations.get(name)
+                parts.append(v if v is not None else np.full(count, np.nan))
+            stations[name] = concat_arrays(parts)
+
+        # the station of each subset
+        if stations:
+            df = pd.DataFrame(stations)
+            station_index = df.groupby(list(df.columns), sort=False, dropna=False).ngroup().to_numpy()
+            first = np.unique(station_index, return_index=True)[1]
+            stations = {name: v[first] for name, v in stations.items()}
+        else:
+            station_index = np.zeros(n, dtype=np.int64)
+        n_station = int(station_index.max()) + 1
+
+        all_members = np.concatenate([np.asarray(b.members, dtype=float) for b in blocks])
+        members = _coords(all_members)
+        member_index = pd.Index(members).get_indexer(all_members)
+
+        steps = _coords(np.concatenate([np.asarray(b.steps, dtype=float).ravel() for b in blocks]))
+        step_index = pd.Index(steps)
+
+        shape = (n_station, len(members), len(steps))
+        values = {name: np.full(shape, np.nan) for name in value_names}
+        mask = np.zeros(shape, dtype=bool)
+        start = 0
+        for b, count in zip(blocks, counts):
+            rows = slice(start, start + count)
+            start += count
+            cols = step_index.get_indexer(np.asarray(b.steps, dtype=float).ravel()).reshape(b.steps.shape)
+            # the cells without a step or a member are skipped
+            valid = (cols >= 0) & (member_index[rows] >= 0)[:, np.newaxis]
+            r, c = np.nonzero(valid)
+            idx = (station_index[rows][r], member_index[rows][r], cols[r, c])
+            mask[idx] = True
+            for name, v in b.values.items():
+                values[name][idx] = v[r, c]
+
+        stations = columns_to_dataframe(stations, dtypes=dtypes)
+        if stations.empty:
+            stations = pd.DataFrame(index=pd.RangeIndex(n_station))
+        return cls(stations, members, steps, values, mask)
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    def head(self, n: int) -> "EnsembleData":
+        """Return the data of the first ``n`` rows of the long layout (see :meth:`to_columns`).
+        The cells of the last station after these rows are masked out.
+        """
+        if len(self) == 0:
+            return self
+
+        rows = np.cumsum(self.mask.reshape(len(self), -1).sum(axis=1))
+        if n >= rows[-1]:
+            return self
+
+        count = int(np.searchsorted(rows, n)) + 1 if n > 0 else 0
+        mask = self.mask[:count].copy()
+        flat = mask.reshape(-1)
+        flat[np.flatnonzero(flat)[n:]] = False
+        values = {name: np.where(mask, v[:count], np.nan) for name, v in self.values.items()}
+        return EnsembleData(self.stations.iloc[:count], self.members, self.steps, values, mask)
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Return the data in a long layout with one row per station, member and step.
+        The steps not present in the messages are omitted.
+        """
+        if len(self) == 0:
+            return {}
+
+        stations, members, steps = np.nonzero(self.mask)
+        data = {name: series_values(self.stations[name])[stations] for name in self.stations.columns}
+        data[MEMBER] = self.members[members]
+        data[STEP] = self.steps[steps]
+        for name, v in self.values.items():
+            data[name] = v[stations, members, steps]
+        return data
+
+    def to_dataframe(self, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+        """Convert the data into a DataFrame with one row per station, member and step"""
+        return columns_to_dataframe(self.to_columns(), dtypes=dtypes)
+
+    def to_xarray(self) -> Any:
+        """Convert the data into an xarray Dataset with "station", "member" and "step" dimensions"""
+        xr = import_xarray()
+
+        data_vars = {
+            name: ((STATION,), numeric_array(series_values(self.stations[name])))
+            for name in self.stations.columns
+        }
+        for name, v in self.values.items():
+            data_vars[name] = ((STATION, MEMBER, STEP), v)
+
+        coords = {STATION: np.arange(len(self)), MEMBER: self.members, STEP: self.steps}
+        return xr.Dataset(data_vars, coords=coords)
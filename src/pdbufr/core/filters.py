@@ -7,15 +7,25 @@
 # nor does it submit to any jurisdiction.
 
 import logging
+import numbers
 from abc import ABCMeta
 from abc import abstractmethod
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import Iterable
+from typing import List
 from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import Union
 
+import numpy as np
+
+from pdbufr.core.missing import is_missing
+from pdbufr.core.missing import numeric_array
+
 LOG = logging.getLogger(__name__)
 
 WIGOS_ID_KEY = "WIGOS_station_id"
@@ -44,6 +54,11 @@ class BufrFilter(metaclass=ABCMeta):
     def max(self) -> Any:
         pass
 
+    def match_array(self, values: Sequence[Any]) -> np.ndarray:
+        """Vectorised version of :meth:`match`. Return a boolean array with the result for
+        each value."""
+        return np.fromiter((self.match(v) for v in values), dtype=bool, count=len(values))
+
     @staticmethod
     def from_user(value: Any, key: Union[str, None] = None) -> "BufrFilter":
         if isinstance(value, slice):
@@ -76,7 +91,7 @@ class SliceBufrFilter(BufrFilter):
             LOG.warning(f"slice filters ignore the step={self.slice.step} in slice={self.slice}")
 
     def match(self, value: Any) -> bool:
-        if value is None:
+        if is_missing(value):
             return False
         if self.slice.start is not None and value < self.slice.start:
             return False
@@ -87,6 +102,22 @@ class SliceBufrFilter(BufrFilter):
     def max(self) -> Any:
         return self.slice.stop
 
+    def match_array(self, values: Sequence[Any]) -> np.ndarray:
+        v = numeric_array(values)
+        start, stop = self.slice.start, self.slice.stop
+        if v.dtype.kind not in "iuf" or not all(
+            x is None or isinstance(x, numbers.Number) for x in (start, stop)
+        ):
+            return super().match_array(values)
+
+        # NaN is the missing value
+        mask = v == v
+        if start is not None:
+            mask &= v >= start
+        if stop is not None:
+            mask &= v <= stop
+        return mask
+
     def __repr__(self) -> str:
         return f"SliceBufrFilter({self.slice.start}, {self.slice.stop})"
 
@@ -96,7 +127,7 @@ class CallableBufrFilter(BufrFilter):
         self.callable = v
 
     def match(self, value: Any) -> bool:
-        if value is None:
+        if is_missing(value):
             return False
         return bool(self.callable(value))
 
@@ -112,32 +143,55 @@ class ValueBufrFilter(BufrFilter):
             self.set = {v}
 
     def match(self, value: Any) -> bool:
-        if value is None:
+        if is_missing(value):
             return False
         return value in self.set
 
     def max(self) -> Any:
         return max(self.set)
 
+    def numeric_array(self, values: Sequence[Any]) -> Optional[np.ndarray]:
+        """Return the values as an array if they can be matched in a vectorised way"""
+        v = numeric_array(values)
+        if v.dtype.kind in "iuf" and all(isinstance(x, numbers.Number) for x in self.set):
+            return v
+        return None
+
+    def match_array(self, values: Sequence[Any]) -> np.ndarray:
+        v = self.numeric_array(values)
+        if v is None:
+            return super().match_array(values)
+        # NaN is never in the set
+        return np.isin(v, list(self.set))
+
 
 class NotValueBufrFilter(ValueBufrFilter):
     def match(self, value: Any) -> bool:
-        if value is None:
+        if is_missing(value):
             return False
         return value not in self.set
 
     def max(self) -> Any:
         return None
 
+    def match_array(self, values: Sequence[Any]) -> np.ndarray:
+        v = self.numeric_array(values)
+        if v is None:
+            return BufrFilter.match_array(self, values)
+        return (v == v) & ~np.isin(v, list(self.set))
+
 
 class WigosValueBufrFilter(ValueBufrFilter):
     def match(self, value: Any) -> bool:
-        if value is None:
+        if is_missing(value):
             return False
         if isinstance(value, (str, WIGOSId)):
             return value in self.set
         return False
 
+    def match_array(self, values: Sequence[Any]) -> np.ndarray:
+        return BufrFilter.match_array(self, values)
+
 
 class WIGOSId:
     def __init__(
@@ -149,7 +203,7 @@ class WIGOSId:
     ) -> None:
 
         def _convert(v):
-            return int(v) if v is not None else None
+            return None if is_missing(v) else int(v)
 
         self.series = _convert(series)
         self.issuer = _convert(issuer)
@@ -255,28 +309,58 @@ def filters_match_header(
 
 
 class ParamFilter(dict):
+    """Filters on the parameters (i.e. the output columns) of a reader.
+
+    The filters to be checked are resolved only once for each distinct set of keys
+    the records are generated with. Since the actual keys depend on the data (e.g.
+    the periods of the parameters) they cannot be determined when the reader is
+    created.
+    """
+
     def __init__(self, filters, period=False) -> None:
         filters = filters or {}
         super().__init__(filters)
         self.period = period
-        self.ignore = set()
-
-    def match(self, data):
-        for k, v in data.items():
-            if k in self.ignore:
-                continue
-            self._register_period_key(k)
-            if k in self:
-                if not self[k].match(v):
-                    return False
-        return True
-
-    def _register_period_key(self, key: str) -> None:
+        self.checks: Dict[Tuple[str, ...], List[Tuple[str, BufrFilter]]] = {}
+
+    def get_checks(self, keys: Tuple[str, ...]) -> List[Tuple[str, BufrFilter]]:
+        """Return the keys having a filter along with the filter"""
+        checks = self.checks.get(keys)
+        if checks is None:
+            checks = []
+            for k in keys:
+                f = self.find(k)
+                if f is not None:
+                    checks.append((k, f))
+            self.checks[keys] = checks
+        return checks
+
+    def find(self, key: str) -> Optional[BufrFilter]:
+        """Return the filter to be used for the given key"""
         from pdbufr.core.accessor import parse_period_key
 
         if key not in self and self.period:
             simple_name, full_name = parse_period_key(key)
             if simple_name and full_name and simple_name in self:
-                self[full_name] = self[simple_name]
-            else:
-                self.ignore.add(key)
+                return self[simple_name]
+        return self.get(key)
+
+    def match(self, data: Mapping[str, Any]) -> bool:
+        if not self:
+            return True
+        for k, f in self.get_checks(tuple(data)):
+            if not f.match(data[k]):
+                return False
+        return True
+
+    def mask(self, data: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Vectorised version of :meth:`match` for column data where all the columns
+        have the same length. Return a boolean array with the result for each row."""
+        n = len(next(iter(data.values()))) if data else 0
+        mask = np.ones(n, dtype=bool)
+        if self:
+            for k, f in self.get_checks(tuple(data)):
+                mask &= f.match_array(data[k])
+                if not mask.any():
+                    break
+        return mask
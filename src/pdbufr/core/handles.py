@@ -0,0 +1,155 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import collections
+import logging
+import os
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import eccodes  # type: ignore
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_MAX_MEMORY = 512 * 1024**2
+
+# The memory used by an unpacked handle relative to the size of the encoded
+# message. These are rough, conservative estimates measured on observation
+# data; ecCodes provides no way to query the actual memory usage.
+UNPACKED_SIZE_FACTOR = 4000
+UNPACKED_SIZE_FACTOR_WITH_ATTRIBUTES = 8000
+
+
+class HandleEntry:
+    def __init__(self, codes_id: Any, skip_extra_attributes: int, size: int) -> None:
+        self.codes_id = codes_id
+        self.skip_extra_attributes = skip_extra_attributes
+        self.size = size
+        # number of messages currently using the handle
+        self.refs = 0
+        self.evicted = False
+        # all the keys of the message, see BufrMessage.bufr_keys()
+        self.bufr_keys: Optional[List[Any]] = None
+
+
+class HandleCache:
+    """Process-level LRU cache of unpacked ecCodes BUFR handles.
+
+    The handles are keyed by the identity of the file (path, inode, size and
+    modification time) and the offset of the message. Since cloned handles are not
+    unpacked, the cached handles themselves are lent out to the messages reading them.
+    An unpacked message donates its handle to the cache when closed. Handles unpacked
+    without the extra key attributes (e.g. units) can only be reused by readers
+    skipping them too.
+
+    The cache is bounded by the estimated memory used by the unpacked handles.
+    """
+
+    def __init__(self, max_memory: int = DEFAULT_MAX_MEMORY) -> None:
+        self.enabled = False
+        self.max_memory = max_memory
+        self.memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries: Dict[Tuple[Hashable, ...], HandleEntry] = collections.OrderedDict()
+
+    @staticmethod
+    def file_key(file_handle: Any) -> Tuple[Hashable, ...]:
+        st = os.fstat(file_handle.fileno())
+        return (os.path.realpath(file_handle.name), st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def estimate_size(codes_id: Any, skip_extra_attributes: int) -> int:
+        factor = UNPACKED_SIZE_FACTOR if skip_extra_attributes else UNPACKED_SIZE_FACTOR_WITH_ATTRIBUTES
+        return eccodes.codes_get(codes_id, "totalLength") * factor
+
+    def lookup(self, key: Tuple[Hashable, ...], skip_extra_attributes: int) -> Optional[HandleEntry]:
+        """Return the cached handle usable for the message. It must be given back with
+        :meth:`release`.
+        """
+        entry = self.entries.get(key)
+        # a handle with the extra attributes can be used by any reader
+        if entry is None or (entry.skip_extra_attributes and not skip_extra_attributes):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        entry.refs += 1
+        return entry
+
+    def release(self, entry: HandleEntry) -> None:
+        entry.refs -= 1
+        if entry.evicted and entry.refs == 0:
+            eccodes.codes_release(entry.codes_id)
+
+    def add(self, key: Tuple[Hashable, ...], codes_id: Any, skip_extra_attributes: int) -> bool:
+        """Add an unpacked handle. Return True if the cache took the ownership of the handle"""
+        if not self.enabled:
+            return False
+
+        entry = self.entries.get(key)
+        if entry is not None and (not entry.skip_extra_attributes or skip_extra_attributes):
+            return False
+
+        size = self.estimate_size(codes_id, skip_extra_attributes)
+        if size > self.max_memory:
+            return False
+
+        if entry is not None:
+            self._remove(key)
+
+        self.entries[key] = HandleEntry(codes_id, skip_extra_attributes, size)
+        self.memory += size
+        self.evict()
+        return True
+
+    def _remove(self, key: Tuple[Hashable, ...]) -> None:
+        entry = self.entries.pop(key)
+        self.memory -= entry.size
+        # handles still in use are released when given back
+        if entry.refs > 0:
+            entry.evicted = True
+        else:
+            eccodes.codes_release(entry.codes_id)
+
+    def evict(self) -> None:
+        while self.memory > self.max_memory and self.entries:
+            self._remove(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        while self.entries:
+            self._remove(next(iter(self.entries)))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+HANDLE_CACHE = HandleCache()
+
+
+def enable_handle_cache(max_memory: int = DEFAULT_MAX_MEMORY) -> None:
+    """Enable the process-level cache of unpacked BUFR message handles.
+
+    ``max_memory`` is the maximum estimated memory in bytes used by the cached handles.
+    """
+    HANDLE_CACHE.max_memory = max_memory
+    HANDLE_CACHE.enabled = True
+    HANDLE_CACHE.evict()
+
+
+def disable_handle_cache() -> None:
+    """Disable the cache of unpacked BUFR message handles and release all the cached handles"""
+    HANDLE_CACHE.enabled = False
+    HANDLE_CACHE.clear()
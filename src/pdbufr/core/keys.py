@@ -88,6 +88,34 @@ class UncompressedBufrKey:
 
 IS_KEY_COORD = {"subsetNumber": True, "operator": False}
 
+# keys available in the header (sections 0-3) of BUFR messages, i.e. before unpacking
+HEADER_KEYS = {
+    "edition",
+    "masterTableNumber",
+    "bufrHeaderCentre",
+    "bufrHeaderSubCentre",
+    "updateSequenceNumber",
+    "dataCategory",
+    "internationalDataSubCategory",
+    "dataSubCategory",
+    "masterTablesVersionNumber",
+    "localTablesVersionNumber",
+    "typicalYear",
+    "typicalMonth",
+    "typicalDay",
+    "typicalHour",
+    "typicalMinute",
+    "typicalSecond",
+    "typicalDate",
+    "typicalTime",
+    "rdbType",
+    "oldSubtype",
+    "ident",
+    "numberOfSubsets",
+    "observedData",
+    "compressedData",
+}
+
 
 def datetime_from_bufr(
     observation: Dict[str, Any], prefix: str, datetime_keys: List[str]
@@ -0,0 +1,81 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+from typing import Any
+
+import eccodes  # type: ignore
+import numpy as np
+import pandas as pd  # type: ignore
+
+#: The types of the values holding an element per subset, e.g. the values of a compressed
+#: message, as returned by :func:`normalise_missing`
+ARRAY_TYPES = (np.ndarray, pd.arrays.IntegerArray, list)
+
+
+def normalise_missing(value: Any) -> Any:
+    """Replace the ecCodes missing values in a value fetched from a message.
+
+    Missing floats are replaced by NaN and missing integers by ``pd.NA``. Arrays (e.g. the
+    values of all the subsets of a compressed message) are processed in a single step, so
+    the elements extracted from them need no further check. Float arrays stay float
+    arrays, integer arrays containing missing values are converted into pandas nullable
+    "Int64" arrays. Both keep the values typed when the arrays are used as columns as a
+    whole.
+    """
+    if isinstance(value, np.ndarray):
+        kind = value.dtype.kind
+        if kind == "f":
+            mask = value == eccodes.CODES_MISSING_DOUBLE
+            if mask.any():
+                value = value.copy()
+                value[mask] = np.nan
+        elif kind in "iu" and value.ndim == 1:
+            mask = value == eccodes.CODES_MISSING_LONG
+            if mask.any():
+                return pd.arrays.IntegerArray(value.astype(np.int64, copy=False), mask)
+        return value
+
+    if isinstance(value, float):
+        if value == eccodes.CODES_MISSING_DOUBLE:
+            return np.nan
+    elif isinstance(value, (int, np.integer)):
+        if value == eccodes.CODES_MISSING_LONG:
+            return pd.NA
+    return value
+
+
+def float_array(value: Any) -> np.ndarray:
+    """Return a numeric value fetched from a message as a float array with NaN as the
+    missing value. Unlike :func:`normalise_missing` it supports integer arrays of any
+    shape, e.g. the values of several keys stacked into a 2-D array.
+    """
+    v = np.asarray(value)
+    if v.dtype == object:
+        # e.g. the column values with pd.NA as the missing integers
+        v = np.where(pd.isna(v), np.nan, v)
+    if v.dtype.kind == "f":
+        return normalise_missing(v.astype(float, copy=False))
+
+    mask = v == eccodes.CODES_MISSING_LONG
+    v = normalise_missing(v.astype(float))
+    v[mask] = np.nan
+    return v
+
+
+def is_missing(value: Any) -> bool:
+    """Return True if the value is None, NaN or the missing value of the nullable arrays"""
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+def numeric_array(values: Any) -> np.ndarray:
+    """Return the values as a NumPy array. The nullable integer arrays are converted into
+    float arrays with NaN as the missing value.
+    """
+    if isinstance(values, pd.arrays.IntegerArray):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    return np.asarray(values)
@@ -11,6 +11,8 @@ from typing import List
 from typing import Optional
 from typing import Union
 
+from pdbufr.core.missing import is_missing
+
 if TYPE_CHECKING:
     pass
 
@@ -55,7 +57,7 @@ class PeriodParameter(Parameter):
 
     def concat_units(self, v: Optional[Union[int, float]], units: str) -> Optional[str]:
         period = v
-        if period is not None:
+        if not is_missing(period):
             period = str(-period)
             # units = value.get(key + "->units", "")
             period = period + units
@@ -155,6 +157,39 @@ WIND = Parameter("wind", desc="wind", units=["m/s", "deg"])
 WIND_SPEED = Parameter("wind_speed", desc="wind speed", units="m/s")
 WIND_DIR = Parameter("wind_dir", desc="wind direction", units="deg")
 
+# satellite
+SATELLITE_ID = Parameter("satellite_id", desc="satellite identifier")
+SCANLINE = Parameter("scanline", desc="scan line number")
+FOV = Parameter("fov", desc="field of view number")
+SAT_ZENITH = Parameter("sat_zenith", desc="satellite zenith angle", units="deg")
+SAT_AZIMUTH = Parameter("sat_azimuth", desc="satellite azimuth angle", units="deg")
+SOLAR_ZENITH = Parameter("solar_zenith", desc="solar zenith angle", units="deg")
+SOLAR_AZIMUTH = Parameter("solar_azimuth", desc="solar azimuth angle", units="deg")
+CHANNEL = Parameter("channel", desc="channel number")
+TB = Parameter("tb", desc="brightness temperature", units="K")
+RADIANCE = Parameter("radiance", desc="channel radiance", units="W m-2 sr-1 cm")
+
+# ensemble
+MEMBER = Parameter("member", desc="ensemble member number")
+STEP = Parameter("step", desc="forecast step", units="h")
+
+# aircraft
+FLIGHT_ID = Parameter("flight_id", desc="aircraft flight number")
+AIRCRAFT_ID = Parameter("aircraft_id", desc="aircraft registration number or other identification")
+FLIGHT_LEVEL = Parameter("flight_level", desc="flight level", units="m")
+FLIGHT_PHASE = Parameter("flight_phase", desc="phase of aircraft flight")
+MIXING_RATIO = Parameter("mixing_ratio", desc="mixing ratio", units="kg/kg")
+
+# gnss
+ZWD = Parameter("zwd", desc="zenith wet delay", units="m")
+PWV = Parameter("pwv", desc="precipitable water", units="kg m-2")
+SATELLITE_CLASS = Parameter("satellite_class", desc="satellite classification")
+TRANSMITTER_ID = Parameter("transmitter_id", desc="platform transmitter id number")
+AZIMUTH = Parameter("azimuth", desc="azimuth of the signal path", units="deg")
+ELEVATION_ANGLE = Parameter("elevation_angle", desc="elevation angle of the signal path", units="deg")
+PATH_DELAY = Parameter("path_delay", desc="atmospheric path delay in satellite signal", units="m")
+PATH_DELAY_ERROR = Parameter("path_delay_error", desc="estimated error in atmospheric path delay", units="m")
+
 
 UNITS = {}
 for item in PARAMETERS.values():
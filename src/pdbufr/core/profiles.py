@@ -0,0 +1,223 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.columns import columns_to_dataframe
+from pdbufr.core.columns import concat_arrays
+from pdbufr.core.columns import series_values
+from pdbufr.core.missing import numeric_array
+
+
+def import_xarray() -> Any:
+    try:
+        import xarray  # type: ignore
+    except ImportError:
+        raise ModuleNotFoundError("xarray is required for xarray output. Install it with: pip install xarray")
+    return xarray
+
+
+def fill_value(dtype: Any) -> Any:
+    """Return the value used for padding an array of the given dtype"""
+    if dtype.kind == "f":
+        return np.nan
+    if dtype.kind in "mM":
+        return np.array("NaT", dtype=dtype)
+    return None
+
+
+class ProfileBlock:
+    """The profiles of the subsets of a single message.
+
+    Attributes
+    ----------
+    stations: dict
+        The station/header data as a NumPy array per column with one value per subset.
+    levels: dict
+        The level data of all the subsets concatenated into a NumPy array per column.
+    counts: numpy.ndarray
+        The number of levels of each subset.
+    """
+
+    def __init__(
+        self, stations: Dict[str, np.ndarray], levels: Dict[str, np.ndarray], counts: np.ndarray
+    ) -> None:
+        self.stations = stations
+        self.levels = levels
+        self.counts = counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def rows(self) -> int:
+        """The number of rows in the long layout (see :meth:`Profiles.to_columns`)"""
+        return int(self.counts.sum())
+
+
+class Profiles:
+    """Vertical profiles (e.g. soundings) stored in a ragged array layout.
+
+    The levels of all the profiles are concatenated into a single array per column.
+    The levels of profile ``i`` are at positions ``offsets[i]:offsets[i+1]``.
+
+    Attributes
+    ----------
+    stations: pandas.DataFrame
+        The station/header data with one row per profile.
+    levels: dict
+        The concatenated level data as a NumPy array per column.
+    offsets: numpy.ndarray
+        The start of each profile in the level arrays followed by the total number of levels.
+    """
+
+    def __init__(self, stations: pd.DataFrame, levels: Dict[str, np.ndarray], offsets: np.ndarray) -> None:
+        self.stations = stations
+        self.levels = levels
+        self.offsets = offsets
+
+    @classmethod
+    def from_stores(
+        cls,
+        stations: pd.DataFrame,
+        levels: List[Union[ColumnStore, Dict[str, List[Any]]]],
+        dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+    ) -> "Profiles":
+        """Create the profiles from the level data collected for each profile"""
+        counts = []
+        data: Dict[str, List[Any]] = {}
+        total = 0
+        for store in levels:
+            d = store.column_data() if isinstance(store, ColumnStore) else store
+            n = len(next(iter(d.values()))) if d else 0
+            for name, values in d.items():
+                col = data.get(name)
+                if col is None:
+                    # the column did not appear in the earlier profiles
+                    col = data[name] = [np.nan] * total
+                col.extend(values)
+            total += n
+            for col in data.values():
+                if len(col) < total:
+                    col.extend([np.nan] * (total - len(col)))
+            counts.append(n)
+
+        df = columns_to_dataframe(data, dtypes=dtypes)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(stations, {name: df[name].to_numpy() for name in df.columns}, offsets)
+
+    @classmethod
+    def from_blocks(
+        cls, blocks: List[ProfileBlock], dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> "Profiles":
+        """Create the profiles from the blocks collected for each message. Each subset
+        is a profile.
+        """
+        blocks = [b for b in blocks if len(b) > 0]
+
+        station_names: Dict[str, None] = {}
+        level_names: Dict[str, None] = {}
+        for b in blocks:
+            station_names.update(dict.fromkeys(b.stations))
+            level_names.update(dict.fromkeys(b.levels))
+
+        def _concat(name: str, attr: str, sizes: List[int]) -> np.ndarray:
+            parts = []
+            for b, size in zip(blocks, sizes):
+                v = getattr(b, attr).get(name)
+                parts.append(v if v is not None else np.full(size, np.nan))
+            return concat_arrays(parts)
+
+        counts = [b.counts for b in blocks]
+        stations = {name: _concat(name, "stations", [len(b) for b in blocks]) for name in station_names}
+        levels = {name: _concat(name, "levels", [int(c.sum()) for c in counts]) for name in level_names}
+
+        counts = np.concatenate(counts) if counts else np.array([], dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        stations = columns_to_dataframe(stations, dtypes=dtypes)
+        if stations.empty:
+            stations = pd.DataFrame(index=pd.RangeIndex(len(counts)))
+        return cls(stations, levels, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        """The number of levels in each profile"""
+        return np.diff(self.offsets)
+
+    def head(self, n: int) -> "Profiles":
+        """Return the profiles of the first ``n`` rows of the long layout (see
+        :meth:`to_columns`). The levels of the last profile after these rows are removed.
+        """
+        if n >= self.offsets[-1]:
+            return self
+
+        count = int(np.searchsorted(self.offsets, n))
+        offsets = np.minimum(self.offsets[: count + 1], n)
+        levels = {name: v[:n] for name, v in self.levels.items()}
+        return Profiles(self.stations.iloc[:count], levels, offsets)
+
+    def profile(self, i: int) -> Dict[str, np.ndarray]:
+        """Return the level data of profile ``i``. The arrays are views into the level arrays."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return {name: v[start:end] for name, v in self.levels.items()}
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Return the data in a long layout with one row per level. The station data is
+        repeated for each level of the profile and the profiles without levels are omitted.
+        """
+        rows = np.repeat(np.arange(len(self)), self.counts)
+        data = {name: series_values(self.stations[name])[rows] for name in self.stations.columns}
+        data.update(self.levels)
+        return data
+
+    def to_dataframe(self, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+        """Convert the profiles into a DataFrame with one row per level"""
+        return columns_to_dataframe(self.to_columns(), dtypes=dtypes)
+
+    def to_xarray(self) -> Any:
+        """Convert the profiles into an xarray Dataset with "profile" and "level" dimensions.
+        The profiles shorter than the longest one are padded with missing values.
+        """
+        xr = import_xarray()
+
+        counts = self.counts
+        n = len(counts)
+        n_level = int(counts.max()) if n else 0
+        rows = np.repeat(np.arange(n), counts)
+        cols = np.arange(self.offsets[-1]) - np.repeat(self.offsets[:-1], counts)
+
+        data_vars = {
+            name: (("profile",), numeric_array(series_values(self.stations[name])))
+            for name in self.stations.columns
+        }
+        for name, v in self.levels.items():
+            fill = fill_value(v.dtype)
+            dtype = v.dtype if fill is not None else object
+            if v.dtype.kind in "iub":
+                # integers and booleans cannot represent the padding
+                dtype = np.float64
+                fill = np.nan
+            padded = np.full((n, n_level), fill, dtype=dtype)
+            padded[rows, cols] = v
+            data_vars[name] = (("profile", "level"), padded)
+
+        return xr.Dataset(data_vars, coords={"profile": np.arange(n), "level": np.arange(n_level)})
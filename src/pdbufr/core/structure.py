@@ -144,6 +144,84 @@ class IsCoordWrapper(MessageWrapper):
             return False
 
 
+class SharedMessage:
+    """Message processed by several readers in turn, which are separated by calls to
+    :meth:`reset`.
+
+    The data section is only unpacked once, when first requested by a reader. Since
+    the extra key attributes (e.g. units) cannot be added by unpacking again, whether
+    they are skipped is decided upfront by ``skip_extra_attributes`` and the
+    "skipExtraKeyAttributes" values set by the readers are ignored. Until the current
+    reader requests unpacking, iterating the message only gives the header keys.
+    """
+
+    def __init__(self, message: T.Any, skip_extra_attributes: bool = False) -> None:
+        self.message = message
+        self.skip_extra_attributes = int(skip_extra_attributes)
+        self.header_keys: T.Optional[T.List[str]] = None
+        self.unpacked = False
+        self.reader_unpacked = False
+        # structure of the unpacked message computed only once for all the readers
+        self._uid: T.Optional[T.Tuple[T.Optional[int], ...]] = None
+        self._bufr_keys: T.Optional[T.List[BufrKey]] = None
+
+    def reset(self) -> None:
+        self.reader_unpacked = False
+
+    def _keys(self) -> T.Iterator[str]:
+        if not self.unpacked or self.reader_unpacked:
+            return iter(self.message)
+        return iter(self.header_keys)
+
+    def __iter__(self) -> T.Iterator[str]:
+        return self._keys()
+
+    def keys(self) -> T.List[str]:
+        return list(self._keys())
+
+    def __getitem__(self, key: str) -> T.Any:
+        return self.message[key]
+
+    def __setitem__(self, key: str, value: T.Any) -> None:
+        if key == "skipExtraKeyAttributes":
+            pass
+        elif key == "unpack":
+            if not self.unpacked:
+                self.header_keys = list(self.message)
+                self.message["skipExtraKeyAttributes"] = self.skip_extra_attributes
+                self.message["unpack"] = value
+                self.unpacked = True
+            self.reader_unpacked = True
+        else:
+            self.message[key] = value
+
+    def message_uid(self) -> T.Tuple[T.Optional[int], ...]:
+        if not self.reader_unpacked:
+            return make_message_uid(self.message)
+        if self._uid is None:
+            self._uid = make_message_uid(self.message)
+        return self._uid
+
+    def bufr_keys(self) -> T.Optional[T.List[BufrKey]]:
+        """Return all the keys of the unpacked message"""
+        if not self.reader_unpacked:
+            return None
+        if self._bufr_keys is None:
+            self._bufr_keys = cached_bufr_keys(self.message)
+            if self._bufr_keys is None:
+                self._bufr_keys = list(filter_keys(self.message))
+        return self._bufr_keys
+
+    def get(self, key: str, default: T.Any = None) -> T.Any:
+        return self.message.get(key, default)
+
+    def is_coord(self, key: str) -> bool:
+        return self.message.is_coord(key)
+
+    def __getattr__(self, name: str) -> T.Any:
+        return getattr(self.message, name)
+
+
 class IsCoordCache:
     """Caches if a BUFR key is a coordinate descriptor"""
 
@@ -200,6 +278,9 @@ def filter_keys(
 
 
 def make_message_uid(message: T.Mapping[str, T.Any]) -> T.Tuple[T.Optional[int], ...]:
+    if isinstance(message, SharedMessage):
+        return message.message_uid()
+
     message_uid: T.Tuple[T.Optional[int], ...]
 
     message_uid = (
@@ -234,6 +315,14 @@ def make_message_uid(message: T.Mapping[str, T.Any]) -> T.Tuple[T.Optional[int],
     return message_uid
 
 
+def cached_bufr_keys(message: T.Any) -> T.Optional[T.List[BufrKey]]:
+    """Return all the keys of the message if they are already available without walking
+    the message structure, e.g. for shared messages or cached handles.
+    """
+    f = getattr(message, "bufr_keys", None)
+    return f() if f is not None else None
+
+
 def filter_keys_cached(
     message: T.Mapping[str, T.Any],
     cache: T.Dict[T.Tuple[T.Hashable, ...], T.List[BufrKey]],
@@ -243,10 +332,52 @@ def filter_keys_cached(
     include_uid = tuple(sorted(include))
     filtered_message_uid: T.Tuple[T.Hashable, ...] = message_uid + include_uid
     if filtered_message_uid not in cache:
-        cache[filtered_message_uid] = list(filter_keys(message, include_uid))
+        bufr_keys = cached_bufr_keys(message)
+        if bufr_keys is not None:
+            include_set = set(include_uid)
+            cache[filtered_message_uid] = [
+                k for k in bufr_keys if not include_set or k.name in include_set or k.key in include_set
+            ]
+        else:
+            cache[filtered_message_uid] = list(filter_keys(message, include_uid))
     return cache[filtered_message_uid]
 
 
+class StructureCache:
+    """Caches the structure related information of messages per message template.
+
+    It can be shared between readers and between subsequent reads of the same data.
+    """
+
+    def __init__(self) -> None:
+        # filtered keys, see filter_keys_cached()
+        self.filtered_keys: T.Dict[T.Tuple[T.Hashable, ...], T.List[BufrKey]] = {}
+        # compiled key plans used by the flat reader
+        self.flat_plans: T.Dict[T.Tuple[T.Hashable, ...], T.Any] = {}
+        # key positions of the accessors used by the synop and temp readers,
+        # see BufrSubsetCollector.restrict()
+        self.accessor_plans: T.Dict[T.Tuple[T.Hashable, ...], T.Any] = {}
+        # channel key plans used by the satellite reader
+        self.channel_plans: T.Dict[T.Tuple[T.Hashable, ...], T.Any] = {}
+        # member/step key plans used by the ensemble reader
+        self.ensemble_plans: T.Dict[T.Tuple[T.Hashable, ...], T.Any] = {}
+        # array extraction plans used by the aircraft reader
+        self.aircraft_plans: T.Dict[T.Tuple[T.Hashable, ...], T.Any] = {}
+        # signal path key plans used by the gnss reader
+        self.gnss_plans: T.Dict[T.Tuple[T.Hashable, ...], T.Any] = {}
+
+    def _maps(self) -> T.List[T.Dict[T.Tuple[T.Hashable, ...], T.Any]]:
+        return [v for v in vars(self).values() if isinstance(v, dict)]
+
+    def __len__(self) -> int:
+        """Return the number of cached entries in all the maps"""
+        return sum(len(m) for m in self._maps())
+
+    def clear(self) -> None:
+        for m in self._maps():
+            m.clear()
+
+
 # def add_computed_keys(
 #     observation: T.Dict[str, T.Any],
 #     included_keys: T.Container[str],
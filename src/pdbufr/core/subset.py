@@ -16,8 +16,9 @@ from typing import Mapping
 from typing import Optional
 from typing import Tuple
 
-import eccodes  # type: ignore
-import numpy as np
+from pdbufr.core.columns import intern_strings
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import normalise_missing
 
 
 def subset_info(message: Mapping[str, Any]) -> Tuple[int, bool, bool]:
@@ -64,16 +65,70 @@ def uncompressed_subset_ranges(filtered_keys: List[Any], subset_count: int) -> T
     return subset_start, subset_end, header_end
 
 
+def key_positions(filtered_keys: List[Any]) -> Dict[str, List[int]]:
+    """Return the positions of the keys of a subset visited by
+    :meth:`BufrSubsetCollector.collect` grouped by name
+    """
+    res: Dict[str, List[int]] = {}
+    for i, bufr_key in enumerate(filtered_keys):
+        name = bufr_key.name
+        if name.startswith("firstOrderStatistics"):
+            break
+        pos = res.get(name)
+        if pos is None:
+            res[name] = [i]
+        else:
+            pos.append(i)
+    return res
+
+
 class BufrSubsetCollector:
     def __init__(
         self,
         owner: "BufrSubsetReader",
         filtered_keys: List[Any],
         subset_number: int,
+        structure: Optional[Tuple[Any, ...]] = None,
     ):
         self.owner = owner
         self.filtered_keys = filtered_keys
         self.subset_number = subset_number
+        # identifies the keys of the subset within the message template
+        self.structure = structure
+        self._positions: Optional[Dict[str, List[int]]] = None
+
+    def restrict_keys(self, keys: List[str]) -> List[Any]:
+        """Return the keys of the subset visited by :meth:`collect` when collecting ``keys``"""
+        if self._positions is None:
+            self._positions = key_positions(self.filtered_keys)
+
+        positions = self._positions
+        idx = [i for name in set(keys) for i in positions.get(name, ())]
+        idx.sort()
+        filtered_keys = self.filtered_keys
+        return [filtered_keys[i] for i in idx]
+
+    def restrict(self, keys: List[str]) -> "BufrSubsetCollector":
+        """Return a collector only visiting the positions of ``keys`` in the subset.
+
+        Since :meth:`collect` skips all the other keys the results are the same, but
+        the subset is not walked again for each accessor. The positions are computed
+        once per message template and subset structure, and are stored in the plans of
+        the owner.
+        """
+        structure = (self.structure, tuple(keys))
+        plans = self.owner.plans
+        if plans is None or self.structure is None:
+            return BufrSubsetCollector(self.owner, self.restrict_keys(keys), self.subset_number)
+
+        # the filtered keys of the template are stored to detect if the plan belongs
+        # to a different template that happened to get the same id
+        plan = plans.get(structure)
+        if plan is None or plan[0] is not self.owner.filtered_keys:
+            plan = (self.owner.filtered_keys, self.restrict_keys(keys))
+            plans[structure] = plan
+
+        return BufrSubsetCollector(self.owner, plan[1], self.subset_number, structure=structure)
 
     def collect(
         self,
@@ -83,7 +138,8 @@ class BufrSubsetCollector:
         units_keys: Optional[List[str]] = None,
         value_and_units: bool = True,
     ) -> Generator[Dict[str, Any], None, None]:
-        value_cache = {}
+        # the values are shared by all the subsets and accessors of the message
+        value_cache = self.owner.cache
         current_observation = collections.OrderedDict({})
         current_levels = [0]
         failed_match_level = None
@@ -121,28 +177,26 @@ class BufrSubsetCollector:
                 current_levels.pop()
 
             if bufr_key.key not in value_cache:
-                value_cache[bufr_key.key] = self.owner.message.get(bufr_key.key)
+                # the missing values of all the subsets are replaced in one step
+                value_cache[bufr_key.key] = intern_strings(
+                    normalise_missing(self.owner.message.get(bufr_key.key))
+                )
                 # try:
                 #     value_cache[bufr_key.key] = self.owner.message[bufr_key.key]
                 # except KeyError:
                 #     value_cache[bufr_key.key] = None
             value = value_cache[bufr_key.key]
 
-            # extract compressed BUFR values. They are either numpy arrays (for numeric types)
+            # extract compressed BUFR values. They are either arrays (for numeric types)
             # or lists of strings
             if (
                 self.owner.is_compressed
                 and name != "unexpandedDescriptors"
-                and isinstance(value, (np.ndarray, list))
+                and isinstance(value, ARRAY_TYPES)
                 and len(value) == self.owner.subset_count
             ):
                 value = value[self.subset_number]
 
-            if isinstance(value, float) and value == eccodes.CODES_MISSING_DOUBLE:
-                value = None
-            elif isinstance(value, int) and value == eccodes.CODES_MISSING_LONG:
-                value = None
-
             if name in filters:
                 if filters[name].match(value):
                     failed_match_level = None
@@ -153,7 +207,10 @@ class BufrSubsetCollector:
             if name in keys:
                 units = None
                 if units_keys and name in units_keys:
-                    units = self.owner.message.get(bufr_key.key + "->units")
+                    units_key = bufr_key.key + "->units"
+                    if units_key not in value_cache:
+                        value_cache[units_key] = self.owner.message.get(units_key)
+                    units = value_cache[units_key]
                 if value_and_units:
                     current_observation[name] = (value, units)
                 else:
@@ -168,19 +225,43 @@ class BufrSubsetCollector:
 
 
 class BufrSubsetReader:
-    def __init__(self, message: Mapping[str, Any], filtered_keys: List[Any]):
+    """Generates the subsets of a message.
+
+    Parameters
+    ----------
+    message: mapping
+        The message.
+    filtered_keys: list
+        The keys of the message template needed for the extraction.
+    plans: dict, None
+        Stores the positions of the keys used by each accessor per message template (see
+        :meth:`BufrSubsetCollector.restrict`). It should be shared between the messages
+        together with ``filtered_keys``. When None, the positions are computed for each
+        subset.
+    """
+
+    def __init__(
+        self,
+        message: Mapping[str, Any],
+        filtered_keys: List[Any],
+        plans: Optional[Dict[Tuple[Any, ...], Any]] = None,
+    ):
         self.message = message
         self.filtered_keys = filtered_keys
         self.subset_count, self.is_uncompressed, self.is_compressed = subset_info(self.message)
-        self.cache = {}
+        # the values fetched from the message, see BufrSubsetCollector.collect()
+        self.cache: Dict[str, Any] = {}
+        self.plans = plans
 
     def subsets(self) -> Generator[BufrSubsetCollector, None, None]:
+        template = id(self.filtered_keys)
         if not self.is_compressed and not self.is_uncompressed:
-            yield BufrSubsetCollector(self, self.filtered_keys, 0)
+            yield BufrSubsetCollector(self, self.filtered_keys, 0, structure=(template,))
 
         elif self.is_compressed:
+            # all the subsets have the same keys
             for subset in range(self.subset_count):
-                yield BufrSubsetCollector(self, self.filtered_keys, subset)
+                yield BufrSubsetCollector(self, self.filtered_keys, subset, structure=(template,))
 
         elif self.is_uncompressed:
             subset_start, subset_end, header_end = uncompressed_subset_ranges(
@@ -192,5 +273,8 @@ class BufrSubsetReader:
 
             for i in range(self.subset_count):
                 yield BufrSubsetCollector(
-                    self, header_keys + self.filtered_keys[subset_start[i] : subset_end[i]], i
+                    self,
+                    header_keys + self.filtered_keys[subset_start[i] : subset_end[i]],
+                    i,
+                    structure=(template, i),
                 )
@@ -0,0 +1,118 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import TypeVar
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import is_missing
+from pdbufr.core.missing import normalise_missing
+from pdbufr.core.structure import make_message_uid
+
+#: The keys of the datetime. The first four of them are mandatory.
+TIME_KEYS = ("year", "month", "day", "hour", "minute", "second")
+
+T = TypeVar("T", bound="TemplatePlan")
+
+
+class TemplatePlan:
+    """Base class of the keys to extract from a message template.
+
+    The plan is built by the constructor with a single iteration over the message keys
+    and can be reused for all the messages with the same template (see
+    :func:`make_message_uid`). The subclasses store the first occurrence of the
+    per-subset keys by name in :attr:`observation_keys`.
+    """
+
+    #: The keys of the datetime. The first four of them are mandatory.
+    TIME_KEYS: Tuple[str, ...] = TIME_KEYS
+
+    observation_keys: Dict[str, str]
+
+    def __init__(self, message: Mapping[str, Any]) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def from_message(
+        cls: Type[T], message: Mapping[str, Any], cache: Optional[Dict[Tuple[Hashable, ...], T]] = None
+    ) -> T:
+        if cache is None:
+            return cls(message)
+
+        try:
+            uid: Tuple[Hashable, ...] = make_message_uid(message)
+        except Exception:
+            # messages without the keys defining the template cannot be cached
+            return cls(message)
+
+        plan = cache.get(uid)
+        if plan is None:
+            plan = cls(message)
+            cache[uid] = plan
+        return plan
+
+    @staticmethod
+    def subset_array(v: Any, n: int) -> np.ndarray:
+        """Return a key value as an array with a value for all the subsets. The integer
+        arrays with missing values are nullable "Int64" arrays.
+        """
+        v = normalise_missing(v)
+        if isinstance(v, (np.ndarray, pd.arrays.IntegerArray)) and len(v) == n:
+            return v
+        if isinstance(v, list) and len(v) == n:
+            return np.asarray(v, dtype=object)
+        # the same value for all the subsets
+        if isinstance(v, ARRAY_TYPES):
+            v = v[0] if len(v) > 0 else None
+        return np.full(n, np.nan if is_missing(v) else v)
+
+    def observation(self, message: Mapping[str, Any], name: str, n: int) -> Optional[np.ndarray]:
+        """Return the values of an observation key for all the subsets"""
+        key = self.observation_keys.get(name)
+        if key is None:
+            return None
+        return self.subset_array(message.get(key), n)
+
+    def first_observation(
+        self, message: Mapping[str, Any], names: Iterable[str], n: int
+    ) -> Optional[np.ndarray]:
+        """Return the values of the first observation key found in the message"""
+        for name in names:
+            v = self.observation(message, name, n)
+            if v is not None:
+                return v
+        return None
+
+    def time(self, message: Mapping[str, Any], n: int) -> Optional[np.ndarray]:
+        """Return the datetime for all the subsets. Computed in one step from the date
+        and time keys.
+        """
+        values = {}
+        for name in self.TIME_KEYS:
+            v = self.observation(message, name, n)
+            if v is None:
+                if name in self.TIME_KEYS[:4]:
+                    return None
+                v = np.zeros(n)
+            values[name] = np.asarray(v, dtype=float)
+
+        date = pd.to_datetime(
+            pd.DataFrame({name: values[name] for name in self.TIME_KEYS[:3]}), errors="coerce"
+        ).to_numpy()
+        seconds = values["hour"] * 3600 + values.get("minute", 0) * 60 + values.get("second", 0)
+        return date + pd.to_timedelta(seconds, unit="s").to_numpy()
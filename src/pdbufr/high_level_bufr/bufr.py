@@ -13,6 +13,7 @@ Author: Daniel Lee, DWD, 2016
 
 import eccodes
 
+from ..core.handles import HANDLE_CACHE
 from .codesfile import CodesFile
 from .codesmessage import CodesMessage
 
@@ -43,6 +44,14 @@ class BufrMessage(CodesMessage):
         super(self.__class__, self).__init__(codes_file, clone, sample, headers_only)
         # self._unpacked = False
 
+        # state used by the cache of unpacked handles
+        self._handle_key = None
+        self._handle_entry = None
+        self._skip_extra_attributes = 0
+        self._unpacked_skip = None
+        if codes_file is not None and getattr(codes_file, "handle_key", None) is not None:
+            self._handle_key = (codes_file.handle_key, eccodes.codes_get(self.codes_id, "offset", int))
+
     # def get(self, key, ktype=None):
     #    """Return requested value, unpacking data values if necessary."""
     #    # TODO: Only do this if accessing arrays that need unpacking
@@ -93,6 +102,46 @@ class BufrMessage(CodesMessage):
     #    super(self.__class__, self).__setitem__(key, value)
     #    eccodes.codes_set(self.codes_id, "pack", True)
 
+    def __setitem__(self, key, value):
+        if self._handle_key is not None:
+            if self._handle_entry is not None:
+                # the cached handle is already unpacked
+                return
+            if key == "skipExtraKeyAttributes":
+                self._skip_extra_attributes = value
+            elif key == "unpack":
+                entry = HANDLE_CACHE.lookup(self._handle_key, self._skip_extra_attributes)
+                if entry is not None:
+                    eccodes.codes_release(self.codes_id)
+                    self.codes_id = entry.codes_id
+                    self._handle_entry = entry
+                    return
+                self._unpacked_skip = self._skip_extra_attributes
+        super().__setitem__(key, value)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._handle_entry is not None:
+            HANDLE_CACHE.release(self._handle_entry)
+            self._handle_entry = None
+            self.codes_id = -1
+        elif self.codes_id != -1 and self._unpacked_skip is not None:
+            if HANDLE_CACHE.add(self._handle_key, self.codes_id, self._unpacked_skip):
+                self.codes_id = -1
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+    def bufr_keys(self):
+        """Return all the keys of the message as BufrKeys when it uses a cached handle.
+        They are computed only once for each cached handle.
+        """
+        entry = self._handle_entry
+        if entry is None:
+            return None
+        if entry.bufr_keys is None:
+            from ..core.structure import filter_keys
+
+            entry.bufr_keys = list(filter_keys(self))
+        return entry.bufr_keys
+
     def copy_data(self, destMsg):
         """Copy data values from this message to another message"""
         return eccodes.codes_bufr_copy_data(self.codes_id, destMsg.codes_id)
@@ -112,3 +161,8 @@ class BufrFile(CodesFile):
     )
 
     MessageClass = BufrMessage
+
+    def __init__(self, filename, mode="rb"):
+        super().__init__(filename, mode)
+        #: identity of the file used by the cache of unpacked handles
+        self.handle_key = HANDLE_CACHE.file_key(self.file_handle) if HANDLE_CACHE.enabled else None
@@ -46,15 +46,16 @@ class CodesFile(io.FileIO):
         self.file_handle = open(filename, mode)
         #: Number of message in file currently being read
         self.message = 0
-        #: Open messages
-        self.open_messages = []
+        #: Open messages by id. They are removed when closed so only the messages
+        #: still in use are kept alive
+        self.open_messages = {}
         self.name = filename
 
     def __exit__(self, exception_type, exception_value, traceback):
         """Close all open messages, release file handle and close file."""
         while self.open_messages:
-            # Note: if the message was manually closed, this has no effect
-            self.open_messages.pop().close()
+            _, msg = self.open_messages.popitem()
+            msg.close()
         self.file_handle.close()
 
     def __len__(self):
@@ -109,7 +109,7 @@ class CodesMessage(object):
                 raise IOError("CodesFile %s is exhausted" % codes_file.name)
             self.codes_file = codes_file
             self.codes_file.message += 1
-            self.codes_file.open_messages.append(self)
+            self.codes_file.open_messages[id(self)] = self
         elif clone is not None:
             self.codes_id = eccodes.codes_clone(clone.codes_id)
         elif sample is not None:
@@ -181,6 +181,8 @@ class CodesMessage(object):
         if self.codes_id != -1:
             eccodes.codes_release(self.codes_id)
             self.codes_id = -1
+        if self.codes_file is not None:
+            self.codes_file.open_messages.pop(id(self), None)
 
     def __enter__(self):
         return self
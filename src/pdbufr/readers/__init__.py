@@ -10,24 +10,51 @@ import logging
 import os
 from abc import ABCMeta
 from abc import abstractmethod
+from contextlib import contextmanager
 from importlib import import_module
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import Iterable
 from typing import Iterator
 from typing import List
 from typing import MutableMapping
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 import pandas as pd  # type: ignore
 
+from ..core.columns import ColumnStore
+from ..core.columns import columns_to_dataframe
+from ..core.dedup import Deduplicator
+from ..core.structure import MessageWrapper
+from ..core.structure import SharedMessage
+from ..core.structure import StructureCache
 from ..high_level_bufr.bufr import BufrFile
 
 LOG = logging.getLogger(__name__)
 
 
+class ReadState:
+    """The compiled reading options used while processing the messages"""
+
+    def __init__(self, max_count: Optional[int] = None, **kwargs: Any) -> None:
+        self.max_count = max_count
+        self.__dict__.update(kwargs)
+
+    def stop(self, count: int) -> bool:
+        """Return True when no more messages have to be read after message ``count``"""
+        return self.max_count is not None and count >= self.max_count
+
+
 class Reader(metaclass=ABCMeta):
+    #: Whether the extra attributes of the data keys (e.g. units) are needed when unpacking
+    extra_attributes = True
+
+    #: Removes the duplicate messages and rows, see :class:`pdbufr.core.dedup.Deduplicator`
+    dedup: Optional[Deduplicator] = None
+
     def __init__(
         self,
         path_or_messages: Union[str, bytes, "os.PathLike[Any]", Iterable[MutableMapping[str, Any]]],
@@ -40,19 +67,142 @@ class Reader(metaclass=ABCMeta):
             self.bufr_obj = path_or_messages
 
         self._kwargs = {**kwargs}
+        self.structure_cache = StructureCache()
 
-    def execute(self) -> pd.DataFrame:
-        def _read(bufr_obj) -> pd.DataFrame:
-            rows = self.read_records(bufr_obj, **self._kwargs)
-            df = pd.DataFrame.from_records(rows)
-            df = self.adjust_dataframe(df)
-            return df
+    OUTPUTS = ("pandas", "arrow")
 
+    #: The output the records are generated for, see :meth:`set_output`
+    output = "pandas"
+
+    @contextmanager
+    def bufr_source(self) -> Iterator[Iterable[MutableMapping[str, Any]]]:
         if hasattr(self, "path"):
             with BufrFile(self.path) as bufr_obj:
-                return _read(bufr_obj)
+                yield bufr_obj
+        else:
+            yield self.bufr_obj
+
+    def execute(
+        self,
+        output: str = "pandas",
+        dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+        nrows: Optional[int] = None,
+    ) -> Any:
+        self.set_output(output)
+
+        with self.bufr_source() as bufr_obj:
+            store = ColumnStore().extend(self.iter_records(bufr_obj, nrows=nrows))
+
+        return self.finalise(store, output=output, dtypes=dtypes, nrows=nrows)
+
+    def check_output(self, output: str) -> None:
+        if output not in self.OUTPUTS:
+            raise ValueError(f"Unsupported output={output}. Available outputs: {self.OUTPUTS}")
+
+    def set_output(self, output: str) -> None:
+        """Check the output and configure the reader to generate it. Must be called
+        before the records are read.
+        """
+        self.check_output(output)
+        self.output = output
+
+    @staticmethod
+    def enumerate_messages(bufr_obj: Iterable[MutableMapping[str, Any]]) -> Iterator[Tuple[int, Any]]:
+        """Enumerate the messages. The count starts at 1 unless the source resumes
+        reading at a later message (see :class:`pdbufr.bufr_tail.TailBufrFile`).
+        """
+        return enumerate(bufr_obj, getattr(bufr_obj, "first_count", 1))
+
+    def iter_records(
+        self, bufr_obj: Iterable[MutableMapping[str, Any]], nrows: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Generate the records. When ``nrows`` is specified decoding stops as soon as
+        the records generating ``nrows`` rows (see :meth:`record_rows`) are generated.
+        """
+        return limit_records(self.read_records(bufr_obj, **self._kwargs), nrows, rows=self.record_rows)
+
+    def record_rows(self, record: Dict[str, Any]) -> int:
+        """Return the number of rows of the result generated from a record"""
+        return 1
+
+    def finalise(
+        self,
+        store: ColumnStore,
+        output: str = "pandas",
+        dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+        nrows: Optional[int] = None,
+    ) -> Any:
+        """Generate the result from the collected columns. The result is truncated to
+        ``nrows`` rows, which is only needed when a record generates several rows (see
+        :meth:`record_rows`).
+        """
+        if output == "arrow":
+            table = self.make_table(store, dtypes=dtypes)
+            return table if nrows is None else table.slice(0, nrows)
+
+        df = self.make_dataframe(store, dtypes=dtypes)
+        if nrows is not None and len(df) > nrows:
+            df = df.iloc[:nrows]
+        df = self.adjust_dataframe(df)
+        if self.dedup is not None:
+            df.attrs["duplicates"] = self.dedup.stats()
+        return df
+
+    def iter_stores(self, row_group_size: int, nrows: Optional[int] = None) -> Iterator[ColumnStore]:
+        """Generate the results in chunks of at most ``row_group_size`` rows while
+        the messages are being decoded.
+        """
+        with self.bufr_source() as bufr_obj:
+            store = ColumnStore()
+            for r in self.iter_records(bufr_obj, nrows=nrows):
+                store.append(r)
+                if len(store) >= row_group_size:
+                    yield store
+                    store = ColumnStore()
+
+            if len(store) > 0:
+                yield store
+
+    def to_parquet(
+        self,
+        target: Union[str, "os.PathLike[Any]"],
+        row_group_size: int = 65536,
+        nrows: Optional[int] = None,
+        **kwargs: Any,
+    ) -> int:
+        from ..core.arrow import write_parquet
+
+        def _tables() -> Iterator[Any]:
+            empty = True
+            remaining = nrows
+            for store in self.iter_stores(row_group_size, nrows=nrows):
+                empty = False
+                table = self.make_table(store)
+                if remaining is not None:
+                    # the last records can generate more rows than needed
+                    table = table.slice(0, remaining)
+                    remaining -= table.num_rows
+                yield table
+
+            # an empty result still generates a file
+            if empty:
+                yield self.make_table(ColumnStore())
+
+        return write_parquet(_tables(), target, **kwargs)
 
-        return _read(self.bufr_obj)
+    def adjust_columns(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Adjust the column data before the resulting table is generated"""
+        return data
+
+    def make_dataframe(
+        self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> pd.DataFrame:
+        return columns_to_dataframe(self.adjust_columns(store.column_data()), dtypes=dtypes)
+
+    def make_table(self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> Any:
+        from ..core.arrow import columns_to_table
+
+        return columns_to_table(self.adjust_columns(store.column_data()), dtypes=dtypes)
 
     # def read(self, **kwargs: Any) -> pd.DataFrame:
     #     if hasattr(self, "path"):
@@ -65,10 +215,51 @@ class Reader(metaclass=ABCMeta):
     #     rows = self._read(bufr_obj)
     #     return pd.DataFrame.from_records(rows)
 
-    @abstractmethod
     def read_records(
         self, bufr_obj: Iterable[MutableMapping[str, Any]], **kwargs: Any
     ) -> Iterator[Dict[str, Any]]:
+        state = self.prepare(**kwargs)
+        if self.dedup is not None:
+            self.dedup.start()
+
+        try:
+            for count, msg in self.enumerate_messages(bufr_obj):
+                # we use a context manager to automatically delete the handle of the BufrMessage.
+                # We have to use a wrapper object here because a message can also be a dict
+                with MessageWrapper.wrap_context(msg) as message:
+                    yield from self.process_message(state, count, message)
+
+                    # optimisation: skip decoding messages above max_count
+                    if state.stop(count):
+                        break
+        finally:
+            if self.dedup is not None:
+                self.dedup.report()
+
+    def process_message(self, state: ReadState, count: int, message: Any) -> Iterator[Dict[str, Any]]:
+        """Generate the records from a single message with the duplicates removed"""
+        if self.dedup is None:
+            return self.message_records(state, count, message)
+
+        # duplicate messages are skipped before unpacking
+        if self.dedup.skip_message(message):
+            return iter(())
+
+        records = self.message_records(state, count, message)
+        if self.dedup.keys is not None:
+            records = self.dedup.filter_records(records)
+        return records
+
+    @abstractmethod
+    def prepare(self, **kwargs: Any) -> ReadState:
+        """Compile the reading options into the state used for processing the messages"""
+        pass
+
+    @abstractmethod
+    def message_records(self, state: ReadState, count: int, message: Any) -> Iterator[Dict[str, Any]]:
+        """Generate the records from a single message. ``count`` is the position of the message
+        in the input starting at 1.
+        """
         pass
 
     @abstractmethod
@@ -76,11 +267,105 @@ class Reader(metaclass=ABCMeta):
         pass
 
 
+def check_nrows(nrows: Optional[int] = None, head: Optional[int] = None) -> Optional[int]:
+    """Return the maximum number of rows specified either by ``nrows`` or ``head``"""
+    if nrows is not None and head is not None:
+        raise ValueError("Only one of nrows and head can be specified")
+    if head is not None:
+        nrows = head
+    if nrows is not None and (not isinstance(nrows, int) or nrows < 0):
+        raise ValueError(f"nrows must be a non-negative integer, got {nrows!r}")
+    return nrows
+
+
+def limit_records(
+    records: Iterator[Dict[str, Any]],
+    nrows: Optional[int] = None,
+    rows: Optional[Callable[[Dict[str, Any]], int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Generate the records until they make up ``nrows`` rows. The number of rows of a
+    record is returned by ``rows``, by default each record is a row. The next record is
+    never requested after the last one, so no more data is decoded, and ``records`` is
+    closed so the message being processed is released.
+    """
+    if nrows is None:
+        return records
+    return _limit_records(records, nrows, rows)
+
+
+def _limit_records(
+    records: Iterator[Dict[str, Any]], nrows: int, rows: Optional[Callable[[Dict[str, Any]], int]]
+) -> Iterator[Dict[str, Any]]:
+    try:
+        count = 0
+        if nrows > 0:
+            for r in records:
+                yield r
+                count += rows(r) if rows is not None else 1
+                if count >= nrows:
+                    break
+    finally:
+        close = getattr(records, "close", None)
+        if close is not None:
+            close()
+
+
+def read_many(
+    readers: List[Reader],
+    bufr_obj: Iterable[MutableMapping[str, Any]],
+    nrows: Optional[List[Optional[int]]] = None,
+) -> List[ColumnStore]:
+    """Process the messages with several readers, each message is read and unpacked only once.
+    Return the collected records of each reader. ``nrows`` can specify the maximum number
+    of rows for each reader (see :meth:`Reader.record_rows`).
+    """
+    states = [r.prepare(**r._kwargs) for r in readers]
+    for r in readers:
+        if r.dedup is not None:
+            r.dedup.start()
+    stores = [ColumnStore() for _ in readers]
+    n_rows = [0] * len(readers)
+    nrows = nrows if nrows is not None else [None] * len(readers)
+
+    # the extra attributes can only be skipped when no reader needs them
+    skip_extra_attributes = not any(r.extra_attributes for r in readers)
+    active = [i for i in range(len(readers)) if nrows[i] != 0]
+
+    for count, msg in Reader.enumerate_messages(bufr_obj):
+        with MessageWrapper.wrap_context(msg) as message:
+            shared = SharedMessage(message, skip_extra_attributes=skip_extra_attributes)
+            for i in list(active):
+                shared.reset()
+                reader = readers[i]
+                remaining = nrows[i] - n_rows[i] if nrows[i] is not None else None
+                records = reader.process_message(states[i], count, shared)
+                for r in limit_records(records, remaining, rows=reader.record_rows):
+                    stores[i].append(r)
+                    n_rows[i] += reader.record_rows(r)
+                if states[i].stop(count) or (nrows[i] is not None and n_rows[i] >= nrows[i]):
+                    active.remove(i)
+
+        if not active:
+            break
+
+    for r in readers:
+        if r.dedup is not None:
+            r.dedup.report()
+
+    return stores
+
+
 class ReaderMaker:
     READERS = {}
 
     def __call__(
-        self, name_or_reader: Union[str, Reader], *args: Any, flat: bool = False, **kwargs
+        self,
+        name_or_reader: Union[str, Reader],
+        *args: Any,
+        flat: bool = False,
+        dedup: Optional[Any] = None,
+        dedup_keys: Optional[Union[str, List[str]]] = None,
+        **kwargs,
     ) -> Reader:
         if isinstance(name_or_reader, Reader):
             return name_or_reader
@@ -106,6 +391,8 @@ class ReaderMaker:
         if getattr(reader, "name", None) is None:
             reader.name = name
 
+        reader.dedup = Deduplicator.make(dedup, dedup_keys)
+
         return reader
 
     def __getattr__(self, name: str) -> Reader:
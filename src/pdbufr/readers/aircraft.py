@@ -0,0 +1,480 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import logging
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import Hashable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+import pdbufr.core.param as PARAMS
+from pdbufr.core.accessor import Accessor
+from pdbufr.core.accessor import AccessorManager
+from pdbufr.core.accessor import AccessorManagerCache
+from pdbufr.core.accessor import CoordAccessor
+from pdbufr.core.accessor import DatetimeAccessor
+from pdbufr.core.accessor import LatLonAccessor
+from pdbufr.core.accessor import MultiAccessorBase
+from pdbufr.core.accessor import MultiFirstAccessor
+from pdbufr.core.accessor import SimpleAccessor
+from pdbufr.core.columns import intern_strings
+from pdbufr.core.filters import ParamFilter
+from pdbufr.core.keys import datetime_from_bufr
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import float_array
+from pdbufr.core.missing import is_missing
+from pdbufr.core.missing import normalise_missing
+from pdbufr.core.subset import BufrSubsetReader
+from pdbufr.core.subset import subset_info
+
+from .custom import StationReader
+
+LOG = logging.getLogger(__name__)
+
+
+class FlightIdAccessor(SimpleAccessor):
+    param: PARAMS.Parameter = PARAMS.FLIGHT_ID
+    keys: Dict[str, PARAMS.Parameter] = {"aircraftFlightNumber": PARAMS.FLIGHT_ID}
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(dtype=str, **kwargs)
+
+
+class AircraftIdAccessor(MultiFirstAccessor):
+    param: PARAMS.Parameter = PARAMS.AIRCRAFT_ID
+    accessors: List[Accessor] = [
+        SimpleAccessor(
+            keys={"aircraftRegistrationNumberOrOtherIdentification": PARAMS.AIRCRAFT_ID}, dtype=str
+        ),
+        SimpleAccessor(keys={"aircraftTailNumber": PARAMS.AIRCRAFT_ID}, dtype=str),
+    ]
+
+
+class FlightLevelAccessor(MultiFirstAccessor):
+    param: PARAMS.Parameter = PARAMS.FLIGHT_LEVEL
+    accessors: List[Accessor] = [
+        SimpleAccessor(keys={"flightLevel": PARAMS.FLIGHT_LEVEL}),
+        SimpleAccessor(keys={"height": PARAMS.FLIGHT_LEVEL}),
+        SimpleAccessor(keys={"globalNavigationSatelliteSystemAltitude": PARAMS.FLIGHT_LEVEL}),
+    ]
+
+
+class FlightPhaseAccessor(MultiFirstAccessor):
+    param: PARAMS.Parameter = PARAMS.FLIGHT_PHASE
+    accessors: List[Accessor] = [
+        SimpleAccessor(keys={"detailedPhaseOfFlight": PARAMS.FLIGHT_PHASE}),
+        SimpleAccessor(keys={"phaseOfAircraftFlight": PARAMS.FLIGHT_PHASE}),
+    ]
+
+
+class PressureAccessor(MultiFirstAccessor):
+    param: PARAMS.Parameter = PARAMS.PRESSURE
+    accessors: List[Accessor] = [
+        SimpleAccessor(keys={"pressure": PARAMS.PRESSURE}),
+        SimpleAccessor(keys={"nonCoordinatePressure": PARAMS.PRESSURE}),
+    ]
+
+
+class TemperatureAccessor(SimpleAccessor):
+    param: PARAMS.Parameter = PARAMS.T
+    keys: Dict[str, PARAMS.Parameter] = {"airTemperature": PARAMS.T}
+
+
+class DewpointAccessor(SimpleAccessor):
+    param: PARAMS.Parameter = PARAMS.TD
+    keys: Dict[str, PARAMS.Parameter] = {"dewpointTemperature": PARAMS.TD}
+
+
+class RelativeHumidityAccessor(SimpleAccessor):
+    param: PARAMS.Parameter = PARAMS.RH
+    keys: Dict[str, PARAMS.Parameter] = {"relativeHumidity": PARAMS.RH}
+
+
+class MixingRatioAccessor(SimpleAccessor):
+    param: PARAMS.Parameter = PARAMS.MIXING_RATIO
+    keys: Dict[str, PARAMS.Parameter] = {"mixingRatio": PARAMS.MIXING_RATIO}
+
+
+class WindAccessor(SimpleAccessor):
+    param: PARAMS.Parameter = PARAMS.WIND
+    keys: Dict[str, PARAMS.Parameter] = {"windSpeed": PARAMS.WIND_SPEED, "windDirection": PARAMS.WIND_DIR}
+
+
+LOCATION_ACCESSORS = (LatLonAccessor,)
+STATION_ACCESSORS: tuple = (FlightIdAccessor, AircraftIdAccessor)
+
+DEFAULT_OBS_ACCESSORS: tuple = (
+    DatetimeAccessor,
+    LatLonAccessor,
+    FlightLevelAccessor,
+    PressureAccessor,
+    TemperatureAccessor,
+    DewpointAccessor,
+    RelativeHumidityAccessor,
+    MixingRatioAccessor,
+    WindAccessor,
+)
+EXTRA_OBS_ACCESSORS: tuple = (FlightPhaseAccessor,)
+
+DEFAULT_ACCESSORS = STATION_ACCESSORS + DEFAULT_OBS_ACCESSORS
+
+
+class AircraftAccessorManagerCache(AccessorManagerCache):
+    def make(self, user_accessors: Optional[Dict[str, Accessor]] = None) -> AccessorManager:
+        return AccessorManager(
+            DEFAULT_ACCESSORS,
+            station=STATION_ACCESSORS,
+            location=LOCATION_ACCESSORS,
+            _extra=EXTRA_OBS_ACCESSORS,
+            user_accessors=user_accessors,
+        )
+
+
+MANAGER_CACHE = AircraftAccessorManagerCache()
+
+DATETIME_KEYS = ("year", "month", "day", "hour", "minute", "second")
+
+#: The key of the columns computed from the date and time keys in an :class:`ArrayPlan`
+DATETIME = "data_datetime"
+
+
+def missing_values(ac: Accessor) -> Dict[str, Any]:
+    """Return the value of each column of an accessor when it is missing from the message.
+
+    The numeric columns are NaN and the datetime is NaT, so the columns keep their dtype
+    and the same columns are generated for all the messages, even when a parameter is not
+    part of the message template. Only the string identifiers are None.
+    """
+    if isinstance(ac, DatetimeAccessor):
+        value = pd.NaT
+    else:
+        a = ac.accessors[0] if isinstance(ac, MultiAccessorBase) else ac
+        value = None if a.dtype is str else np.nan
+    return dict.fromkeys(ac.empty_result(), value)
+
+
+def fill_missing(value: Dict[str, Any], missing: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the columns missing from the result of an accessor"""
+    if len(value) >= len(missing) and all(v is not None for v in value.values()):
+        return value
+    res = dict(missing)
+    res.update((k, v) for k, v in value.items() if v is not None or k not in missing)
+    return res
+
+
+class ArrayPlan:
+    """The keys extracting the parameters of a message template with one array access per
+    key, i.e. without iterating over the subsets.
+
+    For each accessor the same alternative is chosen as when collecting the subsets one by
+    one: the first one with any of its keys in the template. Then the first occurrence of
+    each key is used. When an accessor is not supported ``columns`` is None and the subsets
+    have to be collected one by one.
+
+    Attributes
+    ----------
+    columns: list, None
+        The accessor name and the (label, key, dtype) of each generated column in the order
+        of the records. The key is None when the value is missing and it is :data:`DATETIME`
+        for the datetime computed from the date and time keys.
+    missing: dict
+        The value of each column when its key is missing (see :func:`missing_values`).
+    """
+
+    def __init__(self, filtered_keys: List[Any], accessors: Dict[str, Accessor]) -> None:
+        # the first occurrence of each key in the template
+        self.filtered_keys = filtered_keys
+        first: Dict[str, str] = {}
+        for k in filtered_keys:
+            first.setdefault(k.name, k.key)
+        self.first = first
+
+        self.columns: Optional[List[Tuple[str, str, Optional[str], Any]]] = []
+        self.missing: Dict[str, Any] = {}
+        for name, ac in accessors.items():
+            self.missing.update(missing_values(ac))
+            if isinstance(ac, DatetimeAccessor):
+                self.columns.append((name, ac.labels[0], DATETIME, None))
+                continue
+
+            alternatives = ac.accessors if isinstance(ac, MultiFirstAccessor) else [ac]
+
+            chosen = None
+            for a in alternatives:
+                if not isinstance(a, SimpleAccessor) or isinstance(a, CoordAccessor):
+                    self.columns = None
+                    return
+                if any(k in first for k in a.bufr_keys):
+                    chosen = a
+                    break
+
+            if chosen is not None:
+                for key, param in chosen.keys.items():
+                    if param is not None:
+                        dtype = (
+                            chosen.dtype
+                            if chosen.param is not None and chosen.param.label == param.label
+                            else None
+                        )
+                        self.columns.append((name, param.label, first.get(key), dtype))
+            else:
+                # the columns are generated with the missing values
+                for label in missing_values(ac):
+                    self.columns.append((name, label, None, None))
+
+    @classmethod
+    def make(
+        cls,
+        filtered_keys: List[Any],
+        accessors: Dict[str, Accessor],
+        cache: Optional[Dict[Tuple[Hashable, ...], "ArrayPlan"]] = None,
+    ) -> "ArrayPlan":
+        if cache is None:
+            return cls(filtered_keys, accessors)
+
+        # the filtered keys are cached per template so their identity defines the layout
+        uid = (id(filtered_keys),) + tuple(accessors)
+        plan = cache.get(uid)
+        if plan is None or plan.filtered_keys is not filtered_keys:
+            plan = cls(filtered_keys, accessors)
+            cache[uid] = plan
+        return plan
+
+    @staticmethod
+    def values(message: Mapping[str, Any], key: Optional[str], n: int, is_compressed: bool) -> List[Any]:
+        """Return the values of a key for all the subsets as a list"""
+        if key is None:
+            return [None] * n
+        v = intern_strings(normalise_missing(message.get(key)))
+        if is_compressed and isinstance(v, ARRAY_TYPES) and len(v) == n:
+            return v if isinstance(v, list) else v.tolist()
+        return [v] * n
+
+    def datetime(self, message: Mapping[str, Any], n: int, is_compressed: bool) -> List[Any]:
+        """Return the datetime computed from the date and time keys for all the subsets.
+        The same values are generated as by the "data_datetime" computed key.
+        """
+        if n == 1:
+            # a single subset is cheaper to convert without arrays
+            observation = {
+                name: self.values(message, self.first[name], 1, is_compressed)[0]
+                for name in DATETIME_KEYS
+                if name in self.first
+            }
+            try:
+                return [datetime_from_bufr(observation, "", DATETIME_KEYS)]
+            except Exception:
+                return [None]
+
+        values = {}
+        for name in DATETIME_KEYS:
+            key = self.first.get(name)
+            if key is None:
+                if name in DATETIME_KEYS[:3]:
+                    return [None] * n
+                values[name] = np.zeros(n)
+            else:
+                values[name] = np.broadcast_to(float_array(message.get(key)), n)
+
+        year, month, day = values["year"], values["month"], values["day"]
+        hour, minute, second = values["hour"], values["minute"], values["second"]
+        with np.errstate(invalid="ignore"):
+            # the values rejected by datetime.datetime()
+            valid = (
+                (year >= 1)
+                & (year <= 9999)
+                & (month >= 1)
+                & (month <= 12)
+                & (day >= 1)
+                & (hour >= 0)
+                & (hour < 24)
+                & (minute >= 0)
+                & (minute < 60)
+                & (second >= 0)
+                & (second < 60)
+            )
+
+        months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype(np.int64)
+        month_start = months.astype("datetime64[M]")
+        date = month_start.astype("datetime64[D]") + np.where(valid, day - 1, 0).astype(np.int64)
+        # days beyond the end of the month
+        valid &= date.astype("datetime64[M]") == month_start
+
+        second = np.where(valid, second, 0)
+        us = (np.where(valid, hour * 3600 + minute * 60, 0) + np.trunc(second)).astype(np.int64) * 1_000_000
+        us += np.trunc(second * 1_000_000).astype(np.int64) % 1_000_000
+        res = date.astype("datetime64[us]") + us
+        res[~valid] = np.datetime64("NaT")
+        return res.tolist()
+
+    def collect(self, message: Mapping[str, Any], n: int, is_compressed: bool) -> Dict[str, List[Any]]:
+        """Return the values of all the columns for all the subsets"""
+        assert self.columns is not None
+        data = {}
+        for _, label, key, dtype in self.columns:
+            if key == DATETIME:
+                v = self.datetime(message, n, is_compressed)
+            elif key is None:
+                v = [self.missing.get(label)] * n
+            else:
+                v = self.values(message, key, n, is_compressed)
+                if dtype is not None:
+                    v = [cast(x, dtype) for x in v]
+            data[label] = v
+        return data
+
+
+def cast(value: Any, dtype: Any) -> Any:
+    if is_missing(value):
+        return value
+    try:
+        return dtype(value)
+    except Exception:
+        return value
+
+
+class AircraftReader(StationReader):
+    """Reader for aircraft observations (e.g. AMDAR, AIREP, ADS-B).
+
+    The parameters are defined by accessors in the same way as for the synop reader. For
+    compressed messages and messages with a single subset, the values of all the subsets
+    are extracted with one array access per key using an :class:`ArrayPlan` compiled once
+    per message template. Uncompressed messages with multiple subsets and the options
+    needing the units are processed subset by subset.
+
+    When the output is "normalized" the station table contains the flight and aircraft
+    identifiers.
+    """
+
+    STATION_PARAMS = ("flight_id", "aircraft_id")
+
+    def __init__(
+        self,
+        *args: Any,
+        columns: Optional[Union[str, List[str]]] = "default",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        if columns == []:
+            columns = "default"
+        self.params = columns
+
+        self.manager = MANAGER_CACHE.get()
+        self.accessors = self.manager.get(self.params)
+        self.missing = {name: missing_values(ac) for name, ac in self.accessors.items()}
+
+        self.param_filters = {}
+        for name, ac in self.manager.accessors.items():
+            # the filters can use the accessor name or the column names
+            for key in dict.fromkeys([name, *ac.labels]):
+                if key in self.bufr_filters:
+                    if name not in self.accessors:
+                        raise ValueError(f"Parameter={key} cannot be used in filters unless it is in columns")
+                    self.param_filters[key] = self.bufr_filters.pop(key)
+        self.param_filters = ParamFilter(self.param_filters)
+
+    def filter_header(self, message: Mapping[str, Any]) -> bool:
+        return message["dataCategory"] == 4
+
+    def read_message(
+        self,
+        message: Mapping[str, Any],
+        bufr_filters: Optional[Dict[str, Any]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        bufr_filters = bufr_filters or {}
+        filtered_keys = self.get_filtered_keys(message, self.accessors, bufr_filters)
+
+        n, is_uncompressed, is_compressed = subset_info(message)
+        if not is_uncompressed and not bufr_filters and self.units_converter is None and not self.add_units:
+            plan = ArrayPlan.make(filtered_keys, self.accessors, self.structure_cache.aircraft_plans)
+            if plan.columns is not None:
+                yield from self.read_arrays(message, plan, n, is_compressed)
+                return
+
+        yield from self.read_subsets(message, filtered_keys, bufr_filters)
+
+    def read_arrays(
+        self, message: Mapping[str, Any], plan: ArrayPlan, n: int, is_compressed: bool
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Generate the records of all the subsets from the arrays of the message"""
+        data = plan.collect(message, n, is_compressed)
+        if not data:
+            return
+
+        rows = range(n)
+        if self.param_filters:
+            rows = np.flatnonzero(self.param_filters.mask(data)).tolist()
+
+        station_labels = [label for name, label, _, _ in plan.columns if self.is_station_param(name)]
+        if station_labels:
+            station = {label: data.pop(label) for label in station_labels}
+            for i in rows:
+                d = {self.STATION_KEY: self.stations.add({k: v[i] for k, v in station.items()})}
+                d.update((k, v[i]) for k, v in data.items())
+                yield d
+        else:
+            names = list(data)
+            columns = list(data.values())
+            for i in rows:
+                yield dict(zip(names, [c[i] for c in columns]))
+
+    def read_subsets(
+        self, message: Mapping[str, Any], filtered_keys: List[Any], bufr_filters: Dict[str, Any]
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Generate the records by collecting the subsets one by one"""
+        reader = BufrSubsetReader(message, filtered_keys, plans=self.structure_cache.accessor_plans)
+
+        for subset in reader.subsets():
+            d = {}
+            station = {}
+
+            # check generic filters first, this should be BUFR key filters
+            if bufr_filters:
+                r = subset.collect(
+                    keys=list(bufr_filters.keys()),
+                    filters=bufr_filters,
+                )
+                if not list(r):
+                    continue
+
+            # extract the parameters
+            for name, ac in self.accessors.items():
+                r = ac.collect(
+                    subset.restrict(ac.needed_keys),
+                    units_converter=self.units_converter,
+                    add_units=self.add_units,
+                )
+                r = fill_missing(r, self.missing[name])
+
+                if self.param_filters.match(r):
+                    if self.is_station_param(name):
+                        station.update(r)
+                    else:
+                        d.update(r)
+                else:
+                    d = {}
+                    station = {}
+                    break
+
+            if self.stations is not None and (d or station):
+                d = {self.STATION_KEY: self.stations.add(station), **d}
+
+            if d:
+                yield d
+
+
+reader = AircraftReader
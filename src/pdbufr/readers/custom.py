@@ -11,17 +11,28 @@ from abc import abstractmethod
 from typing import Any
 from typing import Dict
 from typing import Generator
+from typing import Iterator
+from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
+import numpy as np
 import pandas as pd  # type: ignore
 
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.columns import DimensionStore
+from pdbufr.core.columns import columns_to_dataframe
 from pdbufr.core.filters import BufrFilter
 from pdbufr.core.filters import filters_match_header
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import normalise_missing
 from pdbufr.core.structure import MessageWrapper
 from pdbufr.core.structure import filter_keys_cached
 
 from . import Reader
+from . import ReadState
 
 LOG = logging.getLogger(__name__)
 
@@ -51,11 +62,10 @@ class CustomReader(Reader):
     def filter_header(self, message: MessageWrapper) -> bool:
         pass
 
-    @staticmethod
     def get_filtered_keys(
-        message: MessageWrapper, accessors: Dict[str, Any], filters: Dict[str, Any]
+        self, message: MessageWrapper, accessors: Dict[str, Any], filters: Dict[str, Any]
     ) -> Dict[str, Any]:
-        keys_cache = {}
+        keys_cache = self.structure_cache.filtered_keys
         included_keys = set()
         for _, p in accessors.items():
             included_keys |= set(p.needed_keys)
@@ -92,44 +102,35 @@ class CustomReader(Reader):
 
         return value_filters, count_filter, max_count
 
-    def read_records(
-        self,
-        bufr_obj: Any,
-        **kwargs: Any,
-    ) -> Generator[Dict[str, Any], None, None]:
-
-        for count, msg in enumerate(bufr_obj, 1):
-            # we use a context manager to automatically delete the handle of the BufrMessage.
-            # We have to use a wrapper object here because a message can also be a dict
-            with MessageWrapper.wrap_context(msg) as message:
-                # skip decoding messages above max_count
-                if self.max_count is not None and count > self.max_count:
-                    break
+    def prepare(self, **kwargs: Any) -> ReadState:
+        # the options are compiled in the constructor
+        return ReadState(max_count=self.max_count)
 
-                # count filter
-                if self.count_filter is not None and not self.count_filter.match(count):
-                    continue
+    def message_records(self, state: ReadState, count: int, message: Any) -> Iterator[Dict[str, Any]]:
+        # count filter
+        if self.count_filter is not None and not self.count_filter.match(count):
+            return
 
-                # this uses the header so can be called before unpacking
-                if not self.filter_header(message):
-                    continue
+        # this uses the header so can be called before unpacking
+        if not self.filter_header(message):
+            return
 
-                bufr_filters = self.bufr_filters
+        bufr_filters = self.bufr_filters
 
-                if self.prefilter_headers and self.bufr_filters:
-                    header_keys = [k for k in message]
-                    match, matched_keys = filters_match_header(message, header_keys, self.bufr_filters)
-                    if not match:
-                        continue
-                    elif matched_keys:
-                        # remove header keys from filters
-                        bufr_filters = {k: v for k, v in self.bufr_filters.items() if k not in matched_keys}
+        if self.prefilter_headers and self.bufr_filters:
+            header_keys = [k for k in message]
+            match, matched_keys = filters_match_header(message, header_keys, self.bufr_filters)
+            if not match:
+                return
+            elif matched_keys:
+                # remove header keys from filters
+                bufr_filters = {k: v for k, v in self.bufr_filters.items() if k not in matched_keys}
 
-                # message["skipExtraKeyAttributes"] = 1
-                message["unpack"] = 1
+        if not self.extra_attributes:
+            message["skipExtraKeyAttributes"] = 1
+        message["unpack"] = 1
 
-                for d in self.read_message(message, bufr_filters=bufr_filters):
-                    yield d
+        yield from self.read_message(message, bufr_filters=bufr_filters)
 
     @abstractmethod
     def read_message(
@@ -143,7 +144,143 @@ class CustomReader(Reader):
         return df
 
 
+class BlockReader(CustomReader):
+    """Base class of the readers generating a single block of columnar data per message.
+
+    Each message generates a single record holding the block in the :attr:`BLOCK`
+    field. The "pandas" and "arrow" outputs and the outputs in :attr:`BLOCK_OUTPUTS` are
+    generated from the object returned by :meth:`block_data`, which has to implement
+    ``to_dataframe()``, ``to_columns()``, ``to_xarray()`` and ``head()``. The blocks have
+    to provide the number of rows they generate in ``rows``, so the messages are only
+    read until ``nrows`` rows are extracted and the result is truncated to ``nrows`` rows.
+    """
+
+    extra_attributes = False
+
+    #: The outputs returning the object generated by :meth:`block_data` or its xarray
+    #: Dataset ("xarray"). They have to be added to ``OUTPUTS`` too.
+    BLOCK_OUTPUTS: Tuple[str, ...] = ()
+
+    #: The record field holding the data of a message
+    BLOCK = "block"
+
+    #: The name of the reader used in the messages
+    NAME = ""
+
+    def set_output(self, output: str) -> None:
+        super().set_output(output)
+        if self.dedup is not None and self.dedup.keys is not None:
+            raise ValueError(f"dedup_keys cannot be used with the {self.NAME} reader")
+
+    def filter_header(self, message: Mapping[str, Any]) -> bool:
+        # the messages without data are skipped when processing the data
+        return True
+
+    def record_rows(self, record: Dict[str, Any]) -> int:
+        return record[self.BLOCK].rows
+
+    @staticmethod
+    def select_subsets(
+        message: Mapping[str, Any], bufr_filters: Optional[Dict[str, Any]], n: int
+    ) -> Optional[np.ndarray]:
+        """Return the mask of the subsets matching the BUFR key filters. Only the first
+        occurrence of the keys is used. When a key has a single value not matching the
+        filter the whole message is rejected and None is returned.
+        """
+        selected = np.ones(n, dtype=bool)
+        for name, f in (bufr_filters or {}).items():
+            v = normalise_missing(message.get(name))
+            if isinstance(v, ARRAY_TYPES) and len(v) == n:
+                selected &= f.match_array(v)
+            elif not f.match(v):
+                return None
+        return selected
+
+    @abstractmethod
+    def block_data(self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> Any:
+        """Return the object combining the blocks of all the messages"""
+        pass
+
+    def finalise(
+        self,
+        store: ColumnStore,
+        output: str = "pandas",
+        dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+        nrows: Optional[int] = None,
+    ) -> Any:
+        if output not in self.BLOCK_OUTPUTS:
+            return super().finalise(store, output=output, dtypes=dtypes, nrows=nrows)
+
+        data = self.block_data(store, dtypes=dtypes)
+        if nrows is not None:
+            data = data.head(nrows)
+        if output == "xarray":
+            return data.to_xarray()
+        return data
+
+    def make_dataframe(
+        self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> pd.DataFrame:
+        return self.block_data(store, dtypes=dtypes).to_dataframe(dtypes=dtypes)
+
+    def make_table(self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> Any:
+        from pdbufr.core.arrow import columns_to_table
+
+        return columns_to_table(self.block_data(store).to_columns(), dtypes=dtypes)
+
+
 class StationReader(CustomReader):
+    """Base class of the readers extracting station data.
+
+    When the output is "normalized" the result is a pair of DataFrames. The first one is
+    the station table containing each distinct combination of the station parameters
+    (see :attr:`STATION_PARAMS`) only once. The second one is the observation table where
+    the station parameters are replaced by the "station_key" column referring to the
+    corresponding row of the station table.
+    """
+
+    OUTPUTS = CustomReader.OUTPUTS + ("normalized",)
+
+    #: The parameters stored in the station table when the output is "normalized"
+    STATION_PARAMS = ("stnid", "latlon", "elevation", "station_name")
+    STATION_KEY = "station_key"
+
+    #: The station table collected while reading when the output is "normalized"
+    stations: Optional[DimensionStore] = None
+
+    def set_output(self, output: str) -> None:
+        super().set_output(output)
+        if output == "normalized" and self.dedup is not None and self.dedup.keys is not None:
+            raise ValueError("dedup_keys cannot be used with output=normalized")
+
+    def prepare(self, **kwargs: Any) -> ReadState:
+        self.stations = DimensionStore(self.STATION_KEY) if self.output == "normalized" else None
+        return super().prepare(**kwargs)
+
+    def is_station_param(self, name: str) -> bool:
+        """Return True if the parameter goes into the station table"""
+        return self.stations is not None and name in self.STATION_PARAMS
+
+    def finalise(
+        self,
+        store: ColumnStore,
+        output: str = "pandas",
+        dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+        nrows: Optional[int] = None,
+    ) -> Any:
+        if output != "normalized":
+            return super().finalise(store, output=output, dtypes=dtypes, nrows=nrows)
+
+        stations = self.stations if self.stations is not None else DimensionStore(self.STATION_KEY)
+        data = self.adjust_station_columns(stations.store.column_data())
+        stations = columns_to_dataframe(data, dtypes=dtypes)
+        observations = super().finalise(store, dtypes=dtypes, nrows=nrows)
+        return stations, observations
+
+    def adjust_station_columns(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Adjust the column data of the station table"""
+        return data
+
     @staticmethod
     def make_manager(manager_cache, stnid_keys: Optional[Union[str, list]] = None) -> None:
         if stnid_keys:
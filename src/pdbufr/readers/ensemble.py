@@ -0,0 +1,344 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+import pdbufr.core.param as PARAMS
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.ensemble import EnsembleBlock
+from pdbufr.core.ensemble import EnsembleData
+from pdbufr.core.filters import ParamFilter
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import float_array
+from pdbufr.core.subset import subset_info
+from pdbufr.core.template import TemplatePlan
+
+from . import ReadState
+from .custom import BlockReader
+from .custom import CustomReader
+
+#: The keys of the station parameters. The first one found in the message is used.
+STATION_KEYS: Dict[str, Tuple[str, ...]] = {
+    PARAMS.LAT.label: ("latitude", "latitudeHighAccuracy"),
+    PARAMS.LON.label: ("longitude", "longitudeHighAccuracy"),
+    PARAMS.ELEVATION.label: ("heightOfStationGroundAboveMeanSeaLevel", "heightOfStation"),
+}
+
+#: The keys of the WMO station id
+SID_KEYS = ("blockNumber", "stationNumber")
+
+#: The keys of the forecast reference time
+TIME_KEYS = ("year", "month", "day", "hour", "minute")
+
+MEMBER_KEY = "ensembleMemberNumber"
+
+#: The key of the forecast step. Each occurrence starts a new step.
+STEP_KEY = "timePeriod"
+
+#: The length of a step unit in hours by the descriptor of the step key
+STEP_UNITS = {"004023": 24, "004024": 1, "004025": 1 / 60, "004026": 1 / 3600}
+
+SID = PARAMS.SID.label
+TIME = PARAMS.TIME.label
+MEMBER = PARAMS.MEMBER.label
+STEP = PARAMS.STEP.label
+
+STATION_PARAMS = (SID, TIME, *STATION_KEYS)
+
+# the keys that cannot be forecast parameters
+NON_VALUE_KEYS = {MEMBER_KEY, STEP_KEY, "subsetNumber", "dataType", *SID_KEYS, *TIME_KEYS}
+NON_VALUE_KEYS.update(k for keys in STATION_KEYS.values() for k in keys)
+
+
+class EnsemblePlan(TemplatePlan):
+    """The keys to extract from a message template.
+
+    Each occurrence of the member key starts a new subset (uncompressed messages only) and
+    each occurrence of the step key starts a new step within it. The keys following a
+    step until the next one belong to that step.
+
+    For each step and forecast value key the subset ("row") and the step index within
+    the subset ("col") are stored. In compressed messages all the subsets share the
+    same keys so there is only one row.
+    """
+
+    TIME_KEYS = TIME_KEYS
+
+    def __init__(self, message: Mapping[str, Any]) -> None:
+        # the first occurrence of the station keys in each subset by name,
+        # e.g. "latitude" -> ["#1#latitude"]
+        self.station_keys: Dict[str, List[str]] = {}
+        self.member_keys: List[str] = []
+        self.step_keys: List[str] = []
+        self.step_rows: List[int] = []
+        self.step_cols: List[int] = []
+        # the forecast value keys and their position by name
+        self.value_keys: Dict[str, List[str]] = {}
+        self.value_rows: Dict[str, List[int]] = {}
+        self.value_cols: Dict[str, List[int]] = {}
+
+        station_names = {k for keys in STATION_KEYS.values() for k in keys}
+        station_names.update(SID_KEYS)
+        station_names.update(TIME_KEYS)
+
+        row = col = -1
+        for key in message:
+            if "->" in key:
+                continue
+            name = key.rpartition("#")[2]
+
+            if name == MEMBER_KEY:
+                self.member_keys.append(key)
+                row += 1
+                col = -1
+            elif name == STEP_KEY:
+                if row < 0:
+                    continue
+                col += 1
+                self.step_keys.append(key)
+                self.step_rows.append(row)
+                self.step_cols.append(col)
+            elif name == "subsetNumber":
+                col = -1
+            elif col >= 0:
+                if name not in NON_VALUE_KEYS:
+                    cols = self.value_cols.setdefault(name, [])
+                    rows = self.value_rows.setdefault(name, [])
+                    # only the first value of a step is used
+                    if not cols or cols[-1] != col or rows[-1] != row:
+                        self.value_keys.setdefault(name, []).append(key)
+                        rows.append(row)
+                        cols.append(col)
+            elif row >= 0 and name in station_names:
+                keys = self.station_keys.setdefault(name, [])
+                if len(keys) == row:
+                    keys.append(key)
+
+        self.n_row = len(self.member_keys)
+        self.n_step = max(self.step_cols) + 1 if self.step_cols else 0
+
+        # the steps are converted into hours
+        self.step_factor = 1.0
+        if self.step_keys:
+            code = message.get(self.step_keys[0] + "->code")
+            self.step_factor = STEP_UNITS.get(code, 1.0) if isinstance(code, str) else 1.0
+
+    def observation(self, message: Mapping[str, Any], name: str, n: int) -> Optional[np.ndarray]:
+        """Return the values of a station or member key for all the subsets. Only the
+        first occurrence of the key in each subset is used.
+        """
+        keys = self.member_keys if name == MEMBER_KEY else self.station_keys.get(name)
+        if not keys:
+            return None
+
+        v = message.get(name)
+        if isinstance(v, ARRAY_TYPES) and len(v) != n:
+            # the key occurs more than once in the subsets
+            v = [message.get(k) for k in keys] if self.n_row > 1 else message.get(keys[0])
+        return self.subset_array(v, n)
+
+    def sid(self, message: Mapping[str, Any], n: int) -> Optional[np.ndarray]:
+        """Return the WMO station id for all the subsets"""
+        block, station = (self.observation(message, name, n) for name in SID_KEYS)
+        if block is None or station is None:
+            return None
+        sid = np.asarray(block, dtype=float) * 1000 + np.asarray(station, dtype=float)
+        return np.asarray([None if np.isnan(x) else int(x) for x in sid], dtype=object)
+
+    def cells(
+        self, message: Mapping[str, Any], name: str, keys: List[str], rows: List[int], cols: List[int], n: int
+    ) -> np.ndarray:
+        """Return the values of a key as a 2-D array (subset × step).
+
+        The values of all the steps are read in one step, since ecCodes returns all the
+        occurrences of a key one after the other. The cells without a value are NaN.
+        """
+        k = len(keys)
+        v = message.get(name)
+        res = np.full((n, self.n_step), np.nan)
+        if self.n_row > 1:
+            # uncompressed: each key belongs to a single subset
+            if not isinstance(v, np.ndarray) or v.size != k:
+                v = np.array([message.get(key) for key in keys])
+            res[rows, cols] = float_array(v)
+        else:
+            # compressed: each key has a value for all the subsets
+            if isinstance(v, np.ndarray) and v.size == k * n:
+                v = v.reshape(k, n)
+            elif isinstance(v, np.ndarray) and v.size == k:
+                v = v[:, np.newaxis]
+            else:
+                # the key has other occurrences than the ones in the plan
+                v = np.array([np.broadcast_to(message.get(key), n) for key in keys])
+            res[:, cols] = float_array(v).T
+        return res
+
+    def steps(self, message: Mapping[str, Any], n: int) -> np.ndarray:
+        """Return the forecast steps in hours as a 2-D array (subset × step)"""
+        steps = self.cells(message, STEP_KEY, self.step_keys, self.step_rows, self.step_cols, n)
+        if self.step_factor != 1:
+            steps *= self.step_factor
+        return steps
+
+    def values(self, message: Mapping[str, Any], name: str, n: int) -> Optional[np.ndarray]:
+        """Return the values of a forecast parameter as a 2-D array (subset × step)"""
+        keys = self.value_keys.get(name)
+        if not keys:
+            return None
+        return self.cells(message, name, keys, self.value_rows[name], self.value_cols[name], n)
+
+
+class EnsembleReader(BlockReader):
+    """Reader for ensemble forecasts at stations where each subset is an ensemble member
+    and the forecast steps are replicated, e.g. ENS meteograms.
+
+    The member numbers and steps are decoded once per message and the forecast values
+    are extracted with a single array access per parameter. ``nrows`` limits the number
+    of rows of the "pandas" output, the other outputs only contain the values of these
+    rows. The result is generated from the per-message blocks:
+
+    - "pandas", "arrow": one row per station, member and step
+    - "ensemble": a :class:`pdbufr.core.ensemble.EnsembleData` object with the values
+      as 3-D arrays (station × member × step)
+    - "xarray": an xarray Dataset with "station", "member" and "step" dimensions
+    """
+
+    OUTPUTS = CustomReader.OUTPUTS + ("ensemble", "xarray")
+    BLOCK_OUTPUTS = ("ensemble", "xarray")
+    NAME = "ensemble"
+
+    def __init__(
+        self,
+        *args: Any,
+        columns: Optional[Union[str, List[str]]] = "default",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        if columns in (None, [], "default"):
+            self.station_params = list(STATION_PARAMS)
+            # all the forecast parameters found in the messages
+            self.value_params: Optional[List[str]] = None
+        else:
+            if isinstance(columns, str):
+                columns = [columns]
+            for name in columns:
+                if name in NON_VALUE_KEYS:
+                    raise ValueError(f"Key={name} cannot be used as a forecast parameter")
+            self.station_params = [p for p in STATION_PARAMS if p in columns]
+            # the member and step are always extracted
+            self.value_params = [p for p in columns if p not in (*STATION_PARAMS, MEMBER, STEP)]
+
+        param_filters = {}
+        for name in list(self.bufr_filters):
+            if name in STATION_PARAMS:
+                if name not in self.station_params:
+                    raise ValueError(f"Parameter={name} cannot be used in filters unless it is in columns")
+                param_filters[name] = self.bufr_filters.pop(name)
+            elif self.value_params and name in self.value_params:
+                raise ValueError(f"Forecast parameter={name} cannot be used in filters")
+
+        self.param_filters = ParamFilter(param_filters)
+        self.member_filter = self.bufr_filters.pop(MEMBER, None)
+        self.step_filter = self.bufr_filters.pop(STEP, None)
+
+        # the forecast parameters found in the messages read, None when there were no
+        # ensemble messages
+        self.found_params: Optional[Set[str]] = None
+
+    def prepare(self, **kwargs: Any) -> ReadState:
+        self.found_params = None
+        return super().prepare(**kwargs)
+
+    def read_message(
+        self,
+        message: Mapping[str, Any],
+        bufr_filters: Optional[Dict[str, Any]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        n, _, _ = subset_info(message)
+
+        plan = EnsemblePlan.from_message(message, self.structure_cache.ensemble_plans)
+        if not plan.member_keys or not plan.step_keys:
+            return
+
+        if self.found_params is None:
+            self.found_params = set()
+        self.found_params.update(plan.value_keys)
+
+        # the subsets to keep
+        selected = self.select_subsets(message, bufr_filters, n)
+        if selected is None:
+            return
+
+        members = plan.observation(message, MEMBER_KEY, n)
+        if self.member_filter is not None:
+            selected &= self.member_filter.match_array(members)
+
+        stations = {}
+        for name in self.station_params:
+            if name == TIME:
+                v = plan.time(message, n)
+            elif name == SID:
+                v = plan.sid(message, n)
+            else:
+                v = plan.first_observation(message, STATION_KEYS[name], n)
+            if v is not None:
+                stations[name] = v
+
+        if self.param_filters:
+            selected &= self.param_filters.mask(stations)
+
+        if not selected.any():
+            return
+
+        steps = plan.steps(message, n)
+        if self.step_filter is not None:
+            steps[~self.step_filter.match_array(steps.ravel()).reshape(steps.shape)] = np.nan
+            if np.isnan(steps).all():
+                return
+
+        names = self.value_params if self.value_params is not None else plan.value_keys
+        values = {}
+        for name in names:
+            v = plan.values(message, name, n)
+            if v is not None:
+                values[name] = v
+
+        if not selected.all():
+            stations = {k: v[selected] for k, v in stations.items()}
+            members = members[selected]
+            steps = steps[selected]
+            values = {k: v[selected] for k, v in values.items()}
+
+        yield {self.BLOCK: EnsembleBlock(stations, members, steps, values)}
+
+    def block_data(
+        self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> EnsembleData:
+        # the forecast parameters are ecCodes keys so they can only be checked against
+        # the keys found in the messages
+        if self.value_params and self.found_params is not None:
+            for name in self.value_params:
+                if name not in self.found_params:
+                    raise ValueError(
+                        f"Unknown parameter={name}. Available: {[*STATION_PARAMS, *sorted(self.found_params)]}"
+                    )
+        return EnsembleData.from_blocks(store.column_data().get(self.BLOCK, []), dtypes=dtypes)
+
+
+reader = EnsembleReader
@@ -6,28 +6,131 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
-import collections
 from typing import Any
 from typing import Dict
+from typing import Hashable
 from typing import Iterable
 from typing import Iterator
+from typing import List
 from typing import Mapping
-from typing import MutableMapping
+from typing import Optional
 from typing import Sequence
 from typing import Set
+from typing import Tuple
 from typing import Union
 
-import eccodes  # type: ignore
-import numpy as np
 import pandas as pd  # type: ignore
 
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.columns import intern_strings
 from pdbufr.core.filters import BufrFilter
 from pdbufr.core.filters import filters_match_header
 from pdbufr.core.keys import COMPUTED_KEYS
 from pdbufr.core.keys import UncompressedBufrKey
-from pdbufr.core.structure import MessageWrapper
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import normalise_missing
+from pdbufr.core.structure import make_message_uid
 
 from . import Reader
+from . import ReadState
+
+SKIP_KEYS = {
+    "unexpandedDescriptors",
+    "shortDelayedDescriptorReplicationFactor",
+    "delayedDescriptorReplicationFactor",
+    "extendedDelayedDescriptorReplicationFactor",
+    "delayedDescriptorAndDataRepetitionFactor",
+    "extendedDelayedDescriptorAndDataRepetitionFactor" "associatedFieldSignificance",
+    "dataPresentIndicator",
+    "operator",
+}
+
+
+class FlatKeyPlan:
+    """Compiled list of the keys to extract from a message.
+
+    The plan is built with a single iteration over the message keys and can be
+    reused for all the subsets of the message and for all the other messages
+    with the same template (see :func:`make_message_uid`).
+
+    For messages with uncompressed subsets consider this:
+
+    - for each data key we have a single value
+    - there is no way to identify the subset from the key
+    - we cannot directly iterate over a given subset
+    - if we iterate over the keys a new subset is indicated by the
+      appearance of the "subsetNumber" key, which contains the same array
+      of values each time (the subset index for all the subsets). This key is
+      generated by ecCodes and does not contain any ranking so its name is
+      always "subsetNumber".
+
+    So for uncompressed subsets the plan stores the position where each subset
+    starts and the keys are stored with a rank relative to the start of the subset.
+    """
+
+    def __init__(self, message: Mapping[str, Any], is_uncompressed: bool) -> None:
+        # the keys to read from the message
+        self.keys: List[str] = []
+        # the key names without the rank
+        self.names: List[str] = []
+        # the keys used in the resulting observation
+        self.out_keys: List[str] = []
+        # uncompressed subsets: the index of the "subsetNumber" key for each subset
+        self.subset_start: List[int] = []
+
+        uncompressed_keys: Dict[str, UncompressedBufrKey] = {}
+
+        for key in message:
+            name = key.rpartition("#")[2]
+            if name in SKIP_KEYS or "->" in key:
+                continue
+
+            out_key = key
+            if is_uncompressed:
+                if key == "subsetNumber":
+                    if self.subset_start:
+                        for v in uncompressed_keys.values():
+                            v.adjust_ref_rank()
+                    self.subset_start.append(len(self.keys))
+
+                if name not in uncompressed_keys:
+                    uncompressed_keys[name] = UncompressedBufrKey.from_key(key)
+                else:
+                    uncompressed_keys[name].update_rank(key)
+                out_key = uncompressed_keys[name].relative_key
+
+            self.keys.append(key)
+            self.names.append(name)
+            self.out_keys.append(out_key)
+
+    @classmethod
+    def from_message(
+        cls,
+        message: Mapping[str, Any],
+        is_uncompressed: bool,
+        cache: Optional[Dict[Tuple[Hashable, ...], "FlatKeyPlan"]] = None,
+        unpacked: bool = True,
+    ) -> "FlatKeyPlan":
+        if cache is None:
+            return cls(message, is_uncompressed)
+
+        try:
+            # the key layout also depends on the compression
+            uid: Tuple[Hashable, ...] = make_message_uid(message) + (message["compressedData"], unpacked)
+        except Exception:
+            # messages without the keys defining the template cannot be cached
+            return cls(message, is_uncompressed)
+
+        plan = cache.get(uid)
+        if plan is None:
+            plan = cls(message, is_uncompressed)
+            cache[uid] = plan
+        return plan
+
+    def subset_ranges(self) -> List[Tuple[int, int]]:
+        """Return the (start, end) index range of the uncompressed subsets"""
+        ends = self.subset_start[1:] + [len(self.keys)]
+        return list(zip(self.subset_start, ends))
 
 
 def extract_message(
@@ -36,8 +139,9 @@ def extract_message(
     base_observation: Dict[str, Any] = {},
     required_columns: Set[str] = set(),
     header_keys: Set[str] = set(),
+    keys_cache: Optional[Dict[Tuple[Hashable, ...], FlatKeyPlan]] = None,
+    unpacked: bool = True,
 ) -> Iterator[Dict[str, Any]]:
-    value_cache = {}
     try:
         is_compressed = bool(message["compressedData"])
     except KeyError:
@@ -50,102 +154,35 @@ def extract_message(
         is_uncompressed = int(message["numberOfSubsets"]) > 1
         subset_count = 1
 
-    # For messages with uncompressed subsets consider this:
-    # - for each data key we have a single value
-    # - there is no way to identify the subset from the key
-    # - we cannot directly iterate over a given subset
-    # - if we iterate over the keys a new subset is indicated by the
-    #   appearance of the "subsetNumber" key, which contains the same array
-    #   of values each time (the subset index for all the subsets). This key is
-    #   generated by ecCodes and does not contain any ranking so its name is
-    #   always "subsetNumber".
-
-    uncompressed_keys: Dict["str", Any]
-    uncompressed_keys = dict()
-    skip_keys = {
-        "unexpandedDescriptors",
-        "shortDelayedDescriptorReplicationFactor",
-        "delayedDescriptorReplicationFactor",
-        "extendedDelayedDescriptorReplicationFactor",
-        "delayedDescriptorAndDataRepetitionFactor",
-        "extendedDelayedDescriptorAndDataRepetitionFactor" "associatedFieldSignificance",
-        "dataPresentIndicator",
-        "operator",
-    }
-
-    for subset in range(subset_count):
-        filters_match = {k: False for k in filters.keys()}
-        required_columns_match = {k: False for k in required_columns}
-        current_observation: Dict[str, Any]
-        current_observation = collections.OrderedDict(base_observation)
-
-        uncompressed_subset = 0
-        for key in message:
-            name = key.rpartition("#")[2]
-            if name in skip_keys or "->" in key:
-                continue
-
-            if is_uncompressed and key == "subsetNumber":
-                if uncompressed_subset > 0:
-                    if (
-                        current_observation
-                        and all(filters_match.values())
-                        and all(required_columns_match.values())
-                    ):
-                        yield dict(current_observation)
-
-                    # header keys appear only once so we need to keep the match info for them
-                    for k in filters_match:
-                        if k not in header_keys:
-                            filters_match[k] = False
-
-                    for k in required_columns_match:
-                        if k not in header_keys:
-                            required_columns_match[k] = False
-
-                    # only keep the header keys in the result because they are the
-                    # same for all the subsets
-                    while len(current_observation) and "subsetNumber" in current_observation:
-                        # OrderedDict.popitem uses LIFO order
-                        current_observation.popitem()
-
-                    for v in uncompressed_keys.values():
-                        v.adjust_ref_rank()
-
-                uncompressed_subset += 1
-
-            if is_compressed:
-                if key not in value_cache:
-                    value_cache[key] = message.get(key)
-                value = value_cache[key]
-            else:
-                value = message.get(key)
-
-            # extract compressed BUFR values. They are either numpy arrays (for numeric types)
-            # or lists of strings
-            if (
-                is_compressed
-                and name != "unexpandedDescriptors"
-                and isinstance(value, (np.ndarray, list))
-                and len(value) == subset_count
-            ):
+    plan = FlatKeyPlan.from_message(message, is_uncompressed, cache=keys_cache, unpacked=unpacked)
+
+    # each key is only read once from the message
+    values = []
+    per_subset = []
+    for key, name in zip(plan.keys, plan.names):
+        # the missing values of all the subsets are replaced in one step
+        value = intern_strings(normalise_missing(message.get(key)))
+        values.append(value)
+        # compressed BUFR values are either arrays (for numeric types) or lists of strings
+        per_subset.append(is_compressed and isinstance(value, ARRAY_TYPES) and len(value) == subset_count)
+
+    def _add(
+        observation: Dict[str, Any],
+        filters_match: Dict[str, bool],
+        required_columns_match: Dict[str, bool],
+        start: int,
+        end: int,
+        subset: int,
+    ) -> None:
+        for i in range(start, end):
+            name = plan.names[i]
+            value = values[i]
+            if per_subset[i]:
                 value = value[subset]
 
-            if isinstance(value, float) and value == eccodes.CODES_MISSING_DOUBLE:
-                value = None
-            elif isinstance(value, int) and value == eccodes.CODES_MISSING_LONG:
-                value = None
-
-            if is_uncompressed:
-                if name not in uncompressed_keys:
-                    uncompressed_keys[name] = UncompressedBufrKey.from_key(key)
-                else:
-                    uncompressed_keys[name].update_rank(key)
-                key = uncompressed_keys[name].relative_key
-
-                # subsetNumber is an array and we need the current value
-                if key == "subsetNumber":
-                    value = uncompressed_subset
+            # subsetNumber is an array and we need the current value
+            if is_uncompressed and name == "subsetNumber":
+                value = subset + 1
 
             if name in filters:
                 if filters[name].match(value):
@@ -154,11 +191,49 @@ def extract_message(
             if name in required_columns:
                 required_columns_match[name] = True
 
-            current_observation[key] = value
+            observation[plan.out_keys[i]] = value
+
+    def _matched(filters_match: Dict[str, bool], required_columns_match: Dict[str, bool]) -> bool:
+        return all(filters_match.values()) and all(required_columns_match.values())
+
+    filters_match = {k: False for k in filters.keys()}
+    required_columns_match = {k: False for k in required_columns}
+
+    if is_uncompressed and plan.subset_start:
+        # header keys appear only once so we need to keep the match info for them
+        header: Dict[str, Any] = dict(base_observation)
+        _add(header, filters_match, required_columns_match, 0, plan.subset_start[0], 0)
 
-        # yield the last observation
-        if current_observation and all(filters_match.values()) and all(required_columns_match.values()):
-            yield dict(current_observation)
+        for k in filters_match:
+            if k not in header_keys:
+                filters_match[k] = False
+
+        for k in required_columns_match:
+            if k not in header_keys:
+                required_columns_match[k] = False
+
+        for subset, (start, end) in enumerate(plan.subset_ranges()):
+            current_observation = dict(header)
+            subset_filters_match = dict(filters_match)
+            subset_required_columns_match = dict(required_columns_match)
+            _add(current_observation, subset_filters_match, subset_required_columns_match, start, end, subset)
+            if current_observation and _matched(subset_filters_match, subset_required_columns_match):
+                yield current_observation
+    else:
+        for subset in range(subset_count):
+            current_observation = dict(base_observation)
+            subset_filters_match = dict(filters_match)
+            subset_required_columns_match = dict(required_columns_match)
+            _add(
+                current_observation,
+                subset_filters_match,
+                subset_required_columns_match,
+                0,
+                len(plan.keys),
+                subset,
+            )
+            if current_observation and _matched(subset_filters_match, subset_required_columns_match):
+                yield current_observation
 
 
 def test_computed_keys(
@@ -182,9 +257,7 @@ def test_computed_keys(
 
 
 class FlatReader(Reader):
-    class ColumnInfo:
-        def __init__(self) -> None:
-            self.first_count = 0
+    extra_attributes = False
 
     def __init__(
         self,
@@ -192,37 +265,18 @@ class FlatReader(Reader):
         columns: Union[Sequence[str], str] = [],
         **kwargs: Any,
     ):
-        class ColumnInfo:
-            def __init__(self) -> None:
-                self.first_count = 0
-
-        self.column_info = ColumnInfo()
-        super().__init__(path_or_messages, columns=columns, column_info=self.column_info, **kwargs)
+        super().__init__(path_or_messages, columns=columns, **kwargs)
 
-    def execute(
-        self,
-        # columns: Union[Sequence[str], str] = [],
-        # filters: Mapping[str, Any] = {},
-        # required_columns: Union[bool, Iterable[str]] = True,
-        # **kwargs,
+    def make_dataframe(
+        self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None
     ) -> pd.DataFrame:
-        # class ColumnInfo:
-        #     def __init__(self) -> None:
-        #         self.first_count = 0
-
-        # column_info = ColumnInfo()
-        df = super().execute(
-            # columns=columns,
-            # filters=filters,
-            # required_columns=required_columns,
-            # column_info=column_info,
-            # **kwargs,
-        )
+        df = super().make_dataframe(store, dtypes=dtypes)
 
         # compare the column count in the first record to that of the
         # dataframe. If the latter is larger, then there were non-aligned columns,
         # which were appended to the end of the dataframe columns.
-        if self.column_info.first_count > 0 and self.column_info.first_count < len(df.columns):
+        first_count = store.first_count
+        if first_count > 0 and first_count < len(df.columns):
             import warnings
 
             # temporarily overwrite warnings formatter
@@ -231,8 +285,8 @@ class FlatReader(Reader):
             warnings.warn(
                 (
                     "not all BUFR messages/subsets have the same structure in the input file. "
-                    "Non-overlapping columns (starting with column[{column_info.first_count-1}] ="
-                    f"{df.columns[self.column_info.first_count-1]}) were added to end of the resulting dataframe"
+                    f"Non-overlapping columns (starting with column[{first_count}] = "
+                    f"{df.columns[first_count]}) were added to end of the resulting dataframe "
                     "altering the original column order for these messages."
                 )
             )
@@ -240,15 +294,14 @@ class FlatReader(Reader):
 
         return df
 
-    def read_records(
+    def prepare(
         self,
-        bufr_obj: Iterable[MutableMapping[str, Any]],
         columns: Union[Sequence[str], str],
         filters: Mapping[str, Any] = {},
         required_columns: Union[bool, Iterable[str]] = True,
         prefilter_headers: bool = False,
         column_info: Any = None,
-    ) -> Iterator[Dict[str, Any]]:
+    ) -> ReadState:
         if isinstance(columns, str):
             columns = (columns,)
 
@@ -295,71 +348,80 @@ class FlatReader(Reader):
         if column_info is not None:
             column_info.first_count = 0
 
-        for count, msg in enumerate(bufr_obj, 1):
-            # We use a context manager to automatically delete the handle of the BufrMessage.
-            # We have to use a wrapper object here because a message can also be a dict
-            with MessageWrapper.wrap_context(msg) as message:
-                # count filter
-                if count_filter is not None and not count_filter.match(count):
-                    continue
-
-                message_value_filters = value_filters_without_computed
-                message_required_columns = required_columns
-
-                header_keys = set()
-
-                if not add_header or prefilter_headers or message_value_filters or message_required_columns:
-                    header_keys = set(message)
-
-                    if message_required_columns:
-                        message_required_columns = message_required_columns - header_keys
-
-                    # test filters on header keys before unpacking
-                    if prefilter_headers and message_value_filters:
-                        # we assume that computed keys are not in headers
-                        match, matched_keys = filters_match_header(
-                            message, header_keys, message_value_filters
-                        )
-
-                        if not match:
-                            continue
-                        elif matched_keys:
-                            # remove header keys from filters
-                            message_value_filters = {
-                                k: v for k, v in message_value_filters.items() if k not in matched_keys
-                            }
-
-                message["skipExtraKeyAttributes"] = 1
-
-                if add_data or message_value_filters or message_required_columns:
-                    message["unpack"] = 1
-
-                observation: Dict[str, Any] = {}
-
-                for observation in extract_message(
-                    message,
-                    message_value_filters,
-                    observation,
-                    message_required_columns,
-                    header_keys,
-                ):
-                    if header_keys:
-                        if not add_header:
-                            for key in header_keys:
-                                observation.pop(key, None)
-                        if not add_data:
-                            data_keys = set(observation.keys()) - header_keys
-                            for key in data_keys:
-                                observation.pop(key, None)
-
-                    if observation and test_computed_keys(observation, value_filters, "#1#"):
-                        if column_info is not None and column_info.first_count == 0:
-                            column_info.first_count = len(observation)
-                        yield observation
-
-                # optimisation: skip decoding messages above max_count
-                if max_count is not None and count >= max_count:
-                    break
+        return ReadState(
+            max_count=max_count,
+            add_header=add_header,
+            add_data=add_data,
+            required_columns=required_columns,
+            prefilter_headers=prefilter_headers,
+            value_filters=value_filters,
+            value_filters_without_computed=value_filters_without_computed,
+            count_filter=count_filter,
+            column_info=column_info,
+        )
+
+    def message_records(self, state: ReadState, count: int, message: Any) -> Iterator[Dict[str, Any]]:
+        # count filter
+        if state.count_filter is not None and not state.count_filter.match(count):
+            return
+
+        add_header = state.add_header
+        add_data = state.add_data
+        message_value_filters = state.value_filters_without_computed
+        message_required_columns = state.required_columns
+
+        header_keys = set()
+
+        if not add_header or state.prefilter_headers or message_value_filters or message_required_columns:
+            header_keys = set(message)
+
+            if message_required_columns:
+                message_required_columns = message_required_columns - header_keys
+
+            # test filters on header keys before unpacking
+            if state.prefilter_headers and message_value_filters:
+                # we assume that computed keys are not in headers
+                match, matched_keys = filters_match_header(message, header_keys, message_value_filters)
+
+                if not match:
+                    return
+                elif matched_keys:
+                    # remove header keys from filters
+                    message_value_filters = {
+                        k: v for k, v in message_value_filters.items() if k not in matched_keys
+                    }
+
+        message["skipExtraKeyAttributes"] = 1
+
+        unpacked = bool(add_data or message_value_filters or message_required_columns)
+        if unpacked:
+            message["unpack"] = 1
+
+        observation: Dict[str, Any] = {}
+        column_info = state.column_info
+
+        for observation in extract_message(
+            message,
+            message_value_filters,
+            observation,
+            message_required_columns,
+            header_keys,
+            keys_cache=self.structure_cache.flat_plans,
+            unpacked=unpacked,
+        ):
+            if header_keys:
+                if not add_header:
+                    for key in header_keys:
+                        observation.pop(key, None)
+                if not add_data:
+                    data_keys = set(observation.keys()) - header_keys
+                    for key in data_keys:
+                        observation.pop(key, None)
+
+            if observation and test_computed_keys(observation, state.value_filters, "#1#"):
+                if column_info is not None and column_info.first_count == 0:
+                    column_info.first_count = len(observation)
+                yield observation
 
     def adjust_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         return df
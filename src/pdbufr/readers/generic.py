@@ -10,28 +10,25 @@ import collections
 from typing import Any
 from typing import Container
 from typing import Dict
-from typing import Hashable
 from typing import Iterable
 from typing import Iterator
 from typing import List
 from typing import Mapping
-from typing import MutableMapping
 from typing import Optional
 from typing import Sequence
-from typing import Tuple
 from typing import Union
 
-import eccodes  # type: ignore
-import numpy as np
-
+from pdbufr.core.columns import intern_strings
 from pdbufr.core.filters import BufrFilter
 from pdbufr.core.filters import filters_match_header
 from pdbufr.core.keys import COMPUTED_KEYS
 from pdbufr.core.keys import BufrKey
-from pdbufr.core.structure import MessageWrapper
+from pdbufr.core.missing import ARRAY_TYPES
+from pdbufr.core.missing import normalise_missing
 from pdbufr.core.structure import filter_keys_cached
 
 from . import Reader
+from . import ReadState
 
 
 def extract_observations(
@@ -78,24 +75,20 @@ def extract_observations(
                 current_levels.pop()
 
             if bufr_key.key not in value_cache:
-                value_cache[bufr_key.key] = message.get(bufr_key.key)
+                # the missing values of all the subsets are replaced in one step
+                value_cache[bufr_key.key] = intern_strings(normalise_missing(message.get(bufr_key.key)))
             value = value_cache[bufr_key.key]
 
-            # extract compressed BUFR values. They are either numpy arrays (for numeric types)
+            # extract compressed BUFR values. They are either arrays (for numeric types)
             # or lists of strings
             if (
                 is_compressed
                 and name != "unexpandedDescriptors"
-                and isinstance(value, (np.ndarray, list))
+                and isinstance(value, ARRAY_TYPES)
                 and len(value) == subset_count
             ):
                 value = value[subset]
 
-            if isinstance(value, float) and value == eccodes.CODES_MISSING_DOUBLE:
-                value = None
-            elif isinstance(value, int) and value == eccodes.CODES_MISSING_LONG:
-                value = None
-
             if name in filters:
                 if filters[name].match(value):
                     failed_match_level = None
@@ -165,6 +158,8 @@ def test_computed_keys(
 
 
 class GenericReader(Reader):
+    extra_attributes = False
+
     def _stream_bufr(self, *args, **kwargs):
         return self._read(self.bufr_obj, *args, **kwargs)
 
@@ -187,15 +182,13 @@ class GenericReader(Reader):
         """
         super().__init__(path_or_messages, columns=columns, **kwargs)
 
-    def read_records(
+    def prepare(
         self,
-        bufr_obj: Iterable[MutableMapping[str, Any]],
         columns: Union[Sequence[str], str] = [],
         filters: Mapping[str, Any] = {},
         required_columns: Union[bool, Iterable[str]] = True,
         prefilter_headers: bool = False,
-    ) -> Iterator[Dict[str, Any]]:
-
+    ) -> ReadState:
         if isinstance(columns, str):
             columns = (columns,)
 
@@ -227,54 +220,60 @@ class GenericReader(Reader):
         else:
             max_count = None
 
-        keys_cache: Dict[Tuple[Hashable, ...], List[BufrKey]] = {}
-        for count, msg in enumerate(bufr_obj, 1):
-            # we use a context manager to automatically delete the handle of the BufrMessage.
-            # We have to use a wrapper object here because a message can also be a dict
-            with MessageWrapper.wrap_context(msg) as message:
-                if count_filter and not count_filter.match(count):
-                    continue
-
-                message_value_filters = value_filters_without_computed
-
-                # test filters on header keys before unpacking
-                if prefilter_headers and message_value_filters:
-                    header_keys = set(message)
-
-                    # we assume that computed keys are not in headers
-                    match, matched_keys = filters_match_header(message, header_keys, message_value_filters)
-
-                    if not match:
-                        continue
-                    elif matched_keys:
-                        # remove header keys from filters
-                        message_value_filters = {
-                            k: v for k, v in message_value_filters.items() if k not in matched_keys
-                        }
-
-                message["skipExtraKeyAttributes"] = 1
-                message["unpack"] = 1
-
-                filtered_keys = filter_keys_cached(message, keys_cache, included_keys)
-                if "count" in included_keys:
-                    observation = {"count": count}
-                else:
-                    observation = {}
-
-                for observation in extract_observations(
-                    message,
-                    filtered_keys,
-                    message_value_filters,
-                    observation,
-                ):
-                    augmented_observation = add_computed_keys(observation, included_keys, value_filters)
-                    data = {k: v for k, v in augmented_observation.items() if k in columns}
-                    if required_columns.issubset(data):
-                        yield data
-
-                # optimisation: skip decoding messages above max_count
-                if max_count is not None and count >= max_count:
-                    break
+        return ReadState(
+            max_count=max_count,
+            columns=columns,
+            required_columns=required_columns,
+            prefilter_headers=prefilter_headers,
+            value_filters=value_filters,
+            value_filters_without_computed=value_filters_without_computed,
+            included_keys=included_keys,
+            count_filter=count_filter,
+        )
+
+    def message_records(self, state: ReadState, count: int, message: Any) -> Iterator[Dict[str, Any]]:
+        if state.count_filter and not state.count_filter.match(count):
+            return
+
+        message_value_filters = state.value_filters_without_computed
+
+        # test filters on header keys before unpacking
+        if state.prefilter_headers and message_value_filters:
+            header_keys = set(message)
+
+            # we assume that computed keys are not in headers
+            match, matched_keys = filters_match_header(message, header_keys, message_value_filters)
+
+            if not match:
+                return
+            elif matched_keys:
+                # remove header keys from filters
+                message_value_filters = {
+                    k: v for k, v in message_value_filters.items() if k not in matched_keys
+                }
+
+        message["skipExtraKeyAttributes"] = 1
+        message["unpack"] = 1
+
+        included_keys = state.included_keys
+        filtered_keys = filter_keys_cached(message, self.structure_cache.filtered_keys, included_keys)
+        if "count" in included_keys:
+            observation = {"count": count}
+        else:
+            observation = {}
+
+        columns = state.columns
+        required_columns = state.required_columns
+        for observation in extract_observations(
+            message,
+            filtered_keys,
+            message_value_filters,
+            observation,
+        ):
+            augmented_observation = add_computed_keys(observation, included_keys, state.value_filters)
+            data = {k: v for k, v in augmented_observation.items() if k in columns}
+            if required_columns.issubset(data):
+                yield data
 
     def adjust_dataframe(self, df):
         return df
@@ -7,7 +7,14 @@
 # nor does it submit to any jurisdiction.
 
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import List
+
+import numpy as np
+
+from pdbufr.core.missing import float_array
+from pdbufr.core.missing import is_missing
 
 Z = "z"
 ZH = "zh"
@@ -16,9 +23,9 @@ G = 9.80665  # m/s^2, standard acceleration of gravity
 
 def compute_z(d: Dict[str, Any]) -> Dict[str, Any]:
     z = d.get(Z, None)
-    if z is None:
+    if is_missing(z):
         zh = d.get(ZH, None)
-        if zh is not None:
+        if not is_missing(zh):
             z = zh * G
             d[Z] = z
         else:
@@ -29,9 +36,9 @@ def compute_z(d: Dict[str, Any]) -> Dict[str, Any]:
 
 def compute_zh(d: Dict[str, Any]) -> Dict[str, Any]:
     zh = d.get(ZH, None)
-    if zh is None:
+    if is_missing(zh):
         z = d.get(Z, None)
-        if z is not None:
+        if not is_missing(z):
             zh = z / G
             d[ZH] = zh
         else:
@@ -40,6 +47,52 @@ def compute_zh(d: Dict[str, Any]) -> Dict[str, Any]:
     return d
 
 
+def derive_column(data: Dict[str, Any], target: str, source: str, func: Callable[[Any], Any]) -> None:
+    """Fill the missing values of the ``target`` column from the ``source`` column in one
+    step for all the rows
+    """
+    src = data.get(source)
+    if src is None:
+        return
+
+    src = float_array(src)
+    if target in data:
+        res = float_array(data[target])
+    else:
+        res = np.full(len(src), np.nan)
+
+    mask = np.isnan(res)
+    if mask.any() or target not in data:
+        res[mask] = func(src[mask])
+        data[target] = res
+
+
+def derive_z(data: Dict[str, Any]) -> Dict[str, Any]:
+    derive_column(data, Z, ZH, lambda zh: zh * G)
+    return data
+
+
+def derive_zh(data: Dict[str, Any]) -> Dict[str, Any]:
+    derive_column(data, ZH, Z, lambda z: z / G)
+    return data
+
+
+COLUMN_METHODS = {
+    "z": derive_z,
+    "zh": derive_zh,
+    "both": lambda d: derive_zh(derive_z(d)),
+    "raw": None,
+}
+
+#: The columns not needed in the result
+DROP = {
+    "z": (ZH, ZH + "_units"),
+    "zh": (Z, Z + "_units"),
+    "both": (),
+    "raw": (),
+}
+
+
 METHODS = {
     "z": compute_z,
     "zh": compute_zh,
@@ -53,6 +106,16 @@ class GeopotentialHandler:
         if mode not in METHODS:
             raise ValueError(f"Invalid mode '{mode}'. Valid modes are: {list(METHODS.keys())}")
         self.method = METHODS[mode]
+        self.column_method = COLUMN_METHODS[mode]
+        self.drop = DROP[mode]
 
     def __call__(self, d: Dict[str, Any]) -> Dict[str, Any]:
         return self.method(d) if self.method else d
+
+    def adjust_columns(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Derive the geopotential columns for all the rows in one step and remove the
+        columns not needed in the result
+        """
+        if self.column_method is not None:
+            data = self.column_method(dict(data))
+        return {k: v for k, v in data.items() if k not in self.drop}
@@ -0,0 +1,247 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import logging
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+import pdbufr.core.param as PARAMS
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.filters import ParamFilter
+from pdbufr.core.missing import float_array
+from pdbufr.core.profiles import ProfileBlock
+from pdbufr.core.profiles import Profiles
+from pdbufr.core.subset import subset_info
+from pdbufr.core.template import TIME_KEYS
+from pdbufr.core.template import TemplatePlan
+
+from .custom import BlockReader
+from .custom import CustomReader
+
+LOG = logging.getLogger(__name__)
+
+#: The keys of the per-observation parameters. The first one found in the message is used.
+OBSERVATION_KEYS: Dict[str, Tuple[str, ...]] = {
+    PARAMS.STATION_NAME.label: ("stationOrSiteName",),
+    PARAMS.LAT.label: ("latitude", "latitudeHighAccuracy"),
+    PARAMS.LON.label: ("longitude", "longitudeHighAccuracy"),
+    PARAMS.ELEVATION.label: ("heightOfStation", "heightOfStationGroundAboveMeanSeaLevel"),
+    PARAMS.PRESSURE.label: ("nonCoordinatePressure",),
+    PARAMS.T.label: ("airTemperature",),
+    PARAMS.RH.label: ("relativeHumidity",),
+    PARAMS.ZWD.label: ("componentOfZenithPathDelayDueToWaterVapour",),
+    PARAMS.PWV.label: ("precipitableWater",),
+}
+
+#: The key starting the data of a signal path. Each occurrence starts a new path.
+PATH_KEY = "satelliteClassification"
+
+#: The keys of the per-path parameters
+PATH_VALUE_KEYS: Dict[str, str] = {
+    PARAMS.SATELLITE_CLASS.label: PATH_KEY,
+    PARAMS.TRANSMITTER_ID.label: "platformTransmitterIdNumber",
+    PARAMS.AZIMUTH.label: "bearingOrAzimuth",
+    PARAMS.ELEVATION_ANGLE.label: "elevation",
+    PARAMS.PATH_DELAY.label: "atmosphericPathDelayInSatelliteSignal",
+    PARAMS.PATH_DELAY_ERROR.label: "estimatedErrorInAtmosphericPathDelay",
+}
+
+TIME = PARAMS.TIME.label
+PATH_DELAY = PARAMS.PATH_DELAY.label
+
+OBSERVATION_PARAMS = (*list(OBSERVATION_KEYS)[:1], TIME, *list(OBSERVATION_KEYS)[1:])
+
+
+class PathPlan(TemplatePlan):
+    """The keys to extract from a message template.
+
+    Each occurrence of :data:`PATH_KEY` starts a new signal path and the path value keys
+    following it belong to that path. Only the first occurrence of the observation keys
+    outside the paths is used.
+    """
+
+    def __init__(self, message: Mapping[str, Any]) -> None:
+        # the observation keys by name, e.g. "latitude" -> "#1#latitude"
+        self.observation_keys: Dict[str, str] = {}
+        # the number of paths
+        self.n_path = 0
+        # the path value keys and the path index of each of them by name
+        self.value_keys: Dict[str, List[str]] = {}
+        self.value_paths: Dict[str, List[int]] = {}
+
+        observation_names = {k for keys in OBSERVATION_KEYS.values() for k in keys}
+        observation_names.update(TIME_KEYS)
+        value_names = set(PATH_VALUE_KEYS.values())
+
+        for key in message:
+            if "->" in key:
+                continue
+            name = key.rpartition("#")[2]
+
+            if name == PATH_KEY:
+                self.n_path += 1
+
+            if self.n_path and name in value_names:
+                path = self.n_path - 1
+                paths = self.value_paths.setdefault(name, [])
+                # only the first value of a path is used
+                if not paths or paths[-1] != path:
+                    paths.append(path)
+                    self.value_keys.setdefault(name, []).append(key)
+            elif name in observation_names and name not in self.observation_keys:
+                self.observation_keys[name] = key
+
+    def values(self, message: Mapping[str, Any], name: str, n: int) -> Optional[np.ndarray]:
+        """Return the values of a path value key as a 2-D array (subset × path).
+
+        The values of all the paths are read in one step and reshaped, since ecCodes
+        returns all the occurrences of a key one after the other. Paths without a value
+        are NaN.
+        """
+        keys = self.value_keys.get(name)
+        if not keys:
+            return None
+
+        n_value = len(keys)
+        v = message.get(name)
+        if isinstance(v, np.ndarray) and v.size == n_value * n:
+            v = v.reshape(n_value, n).T
+        elif isinstance(v, np.ndarray) and v.size == n_value:
+            # the same values for all the subsets
+            v = np.broadcast_to(v, (n, n_value))
+        else:
+            # some of the occurrences have the same value for all the subsets of a
+            # compressed message, so the paths are read one by one
+            v = np.column_stack([np.broadcast_to(message.get(k), n) for k in keys])
+
+        v = float_array(v)
+        if n_value == self.n_path:
+            return v
+
+        res = np.full((n, self.n_path), np.nan)
+        res[:, self.value_paths[name]] = v
+        return res
+
+
+class GnssReader(BlockReader):
+    """Reader for ground-based GNSS data with per-path values, e.g. the slant delays of
+    the satellite signals received by a station.
+
+    Each subset is a profile containing its signal paths. The values of a path value
+    key are extracted from the message in one step for all the subsets and paths, then
+    the paths without a path delay are dropped. ``nrows`` limits the number of signal
+    paths, the "profiles" and "xarray" outputs only contain the profiles of these paths.
+    The result is generated from the per-message blocks:
+
+    - "pandas", "arrow": one row per signal path
+    - "profiles": a :class:`pdbufr.core.profiles.Profiles` object storing the paths in
+      a ragged array layout
+    - "xarray": an xarray Dataset with "profile" and "level" dimensions
+    """
+
+    OUTPUTS = CustomReader.OUTPUTS + ("profiles", "xarray")
+    BLOCK_OUTPUTS = ("profiles", "xarray")
+    NAME = "gnss"
+
+    def __init__(
+        self,
+        *args: Any,
+        columns: Optional[Union[str, List[str]]] = "default",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        if columns in (None, [], "default"):
+            columns = [*OBSERVATION_PARAMS, *PATH_VALUE_KEYS]
+        elif isinstance(columns, str):
+            columns = [columns]
+
+        for name in columns:
+            if name not in OBSERVATION_PARAMS and name not in PATH_VALUE_KEYS:
+                raise ValueError(
+                    f"Unknown parameter={name}. Available: {[*OBSERVATION_PARAMS, *PATH_VALUE_KEYS]}"
+                )
+
+        self.observation_params = [p for p in OBSERVATION_PARAMS if p in columns]
+        self.path_params = [p for p in PATH_VALUE_KEYS if p in columns]
+
+        param_filters = {}
+        for name in list(self.bufr_filters):
+            if name in PATH_VALUE_KEYS:
+                raise ValueError(f"Parameter={name} cannot be used in filters")
+            if name in OBSERVATION_PARAMS:
+                if name not in self.observation_params:
+                    raise ValueError(f"Parameter={name} cannot be used in filters unless it is in columns")
+                param_filters[name] = self.bufr_filters.pop(name)
+
+        self.param_filters = ParamFilter(param_filters)
+
+    def read_message(
+        self,
+        message: Mapping[str, Any],
+        bufr_filters: Optional[Dict[str, Any]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        n, is_uncompressed, _ = subset_info(message)
+        if is_uncompressed:
+            LOG.warning("Messages with multiple uncompressed subsets are not supported by the gnss reader")
+            return
+
+        plan = PathPlan.from_message(message, self.structure_cache.gnss_plans)
+        if not plan.n_path:
+            return
+
+        # the subsets to keep
+        selected = self.select_subsets(message, bufr_filters, n)
+        if selected is None:
+            return
+
+        observations = {}
+        for name in self.observation_params:
+            if name == TIME:
+                v = plan.time(message, n)
+            else:
+                v = plan.first_observation(message, OBSERVATION_KEYS[name], n)
+            if v is not None:
+                observations[name] = v
+
+        if self.param_filters:
+            selected &= self.param_filters.mask(observations)
+
+        if not selected.any():
+            return
+
+        values = {}
+        for name in dict.fromkeys([*self.path_params, PATH_DELAY]):
+            v = plan.values(message, PATH_VALUE_KEYS[name], n)
+            if v is not None:
+                values[name] = v[selected]
+
+        # the replications without a path delay are empty
+        delay = values.get(PATH_DELAY) if PATH_DELAY in self.path_params else values.pop(PATH_DELAY, None)
+        if delay is not None:
+            present = ~np.isnan(delay)
+        else:
+            present = np.ones((int(selected.sum()), plan.n_path), dtype=bool)
+
+        observations = {k: v[selected] for k, v in observations.items()}
+        levels = {k: v[present] for k, v in values.items()}
+        yield {self.BLOCK: ProfileBlock(observations, levels, present.sum(axis=1))}
+
+    def block_data(self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None) -> Profiles:
+        return Profiles.from_blocks(store.column_data().get(self.BLOCK, []), dtypes=dtypes)
+
+
+reader = GnssReader
@@ -0,0 +1,274 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import logging
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+import pdbufr.core.param as PARAMS
+from pdbufr.core.channels import ChannelBlock
+from pdbufr.core.channels import ChannelData
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.filters import ParamFilter
+from pdbufr.core.missing import float_array
+from pdbufr.core.subset import subset_info
+from pdbufr.core.template import TIME_KEYS
+from pdbufr.core.template import TemplatePlan
+
+from .custom import BlockReader
+from .custom import CustomReader
+
+LOG = logging.getLogger(__name__)
+
+#: The keys of the per-observation parameters. The first one found in the message is used.
+OBSERVATION_KEYS: Dict[str, Tuple[str, ...]] = {
+    PARAMS.SATELLITE_ID.label: ("satelliteIdentifier",),
+    PARAMS.LAT.label: ("latitude", "latitudeHighAccuracy"),
+    PARAMS.LON.label: ("longitude", "longitudeHighAccuracy"),
+    PARAMS.SCANLINE.label: ("scanLineNumber",),
+    PARAMS.FOV.label: ("fieldOfViewNumber",),
+    PARAMS.SAT_ZENITH.label: ("satelliteZenithAngle",),
+    PARAMS.SAT_AZIMUTH.label: ("bearingOrAzimuth",),
+    PARAMS.SOLAR_ZENITH.label: ("solarZenithAngle",),
+    PARAMS.SOLAR_AZIMUTH.label: ("solarAzimuth",),
+}
+
+#: The keys containing the channel numbers. Each occurrence starts a new channel.
+CHANNEL_KEYS = (
+    "tovsOrAtovsOrAvhrrInstrumentationChannelNumber",
+    "satelliteChannelNumber",
+    "channelNumber",
+)
+
+#: The keys of the per-channel parameters
+CHANNEL_VALUE_KEYS: Dict[str, str] = {
+    PARAMS.TB.label: "brightnessTemperature",
+    PARAMS.RADIANCE.label: "channelRadiance",
+}
+
+TIME = PARAMS.TIME.label
+CHANNEL = PARAMS.CHANNEL.label
+
+OBSERVATION_PARAMS = (PARAMS.SATELLITE_ID.label, TIME, *list(OBSERVATION_KEYS)[1:])
+
+# the keys after these ones (e.g. quality information, statistics) are not used
+STOP_KEYS = ("dataPresentIndicator", "firstOrderStatistics")
+
+
+class ChannelPlan(TemplatePlan):
+    """The keys to extract from a message template.
+
+    Each occurrence of a channel number key starts a new channel and the channel value
+    keys following it belong to that channel. Only the first occurrence of the
+    observation keys before the first channel is used.
+    """
+
+    def __init__(self, message: Mapping[str, Any]) -> None:
+        # the observation keys by name, e.g. "latitude" -> "#1#latitude"
+        self.observation_keys: Dict[str, str] = {}
+        # the channel number keys
+        self.channel_keys: List[str] = []
+        # the channel value keys and the channel index of each of them by name
+        self.value_keys: Dict[str, List[str]] = {}
+        self.value_channels: Dict[str, List[int]] = {}
+
+        observation_names = {k for keys in OBSERVATION_KEYS.values() for k in keys}
+        observation_names.update(TIME_KEYS)
+        value_names = set(CHANNEL_VALUE_KEYS.values())
+
+        for key in message:
+            name = key.rpartition("#")[2]
+            if name.startswith(STOP_KEYS):
+                break
+            if "->" in key:
+                continue
+
+            if name in CHANNEL_KEYS:
+                self.channel_keys.append(key)
+            elif self.channel_keys:
+                if name in value_names:
+                    channel = len(self.channel_keys) - 1
+                    channels = self.value_channels.setdefault(name, [])
+                    # only the first value of a channel is used
+                    if not channels or channels[-1] != channel:
+                        channels.append(channel)
+                        self.value_keys.setdefault(name, []).append(key)
+            elif name in observation_names and name not in self.observation_keys:
+                self.observation_keys[name] = key
+
+        # the values of all the channels can only be read in one step when they all
+        # use the same key
+        names = {k.rpartition("#")[2] for k in self.channel_keys}
+        self.channel_name = names.pop() if len(names) == 1 else None
+
+    def channels(self, message: Mapping[str, Any], n: int) -> np.ndarray:
+        """Return the channel numbers. When they vary by subset the values of the first
+        subset are used.
+        """
+        n_channel = len(self.channel_keys)
+        if self.channel_name is not None:
+            v = message.get(self.channel_name)
+            if isinstance(v, np.ndarray) and v.size in (n_channel, n_channel * n):
+                return v.reshape(n_channel, -1)[:, 0]
+
+        return np.array([np.atleast_1d(message.get(k))[0] for k in self.channel_keys])
+
+    def values(self, message: Mapping[str, Any], name: str, n: int) -> Optional[np.ndarray]:
+        """Return the values of a channel value key as a 2-D array (subset × channel).
+
+        The values of all the channels are read in one step and reshaped, since ecCodes
+        returns all the occurrences of a key one after the other. Channels without a value
+        are NaN.
+        """
+        keys = self.value_keys.get(name)
+        if not keys:
+            return None
+
+        n_value = len(keys)
+        v = message.get(name)
+        if isinstance(v, np.ndarray) and v.size == n_value * n:
+            v = v.reshape(n_value, n).T
+        else:
+            # the key has other occurrences than the ones in the plan, e.g. in the
+            # quality information. The channels are read one by one.
+            v = np.column_stack([np.broadcast_to(message.get(k), n) for k in keys])
+
+        v = float_array(v)
+        if n_value == len(self.channel_keys):
+            return v
+
+        res = np.full((n, len(self.channel_keys)), np.nan)
+        res[:, self.value_channels[name]] = v
+        return res
+
+
+class SatelliteReader(BlockReader):
+    """Reader for satellite data with per-channel values, e.g. brightness temperatures.
+
+    The values are extracted directly from the arrays of the compressed messages, one
+    array per parameter. ``nrows`` limits the number of rows of the "pandas" output, the
+    other outputs only contain the channels of these rows. The result is generated from
+    the per-message blocks:
+
+    - "pandas", "arrow": one row per observation (subset) and channel
+    - "channels": a :class:`pdbufr.core.channels.ChannelData` object with the per-channel
+      values as 2-D arrays (observation × channel)
+    - "xarray": an xarray Dataset with "observation" and "channel" dimensions
+    """
+
+    OUTPUTS = CustomReader.OUTPUTS + ("channels", "xarray")
+    BLOCK_OUTPUTS = ("channels", "xarray")
+    NAME = "satellite"
+
+    def __init__(
+        self,
+        *args: Any,
+        columns: Optional[Union[str, List[str]]] = "default",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        if columns in (None, [], "default"):
+            columns = [*OBSERVATION_PARAMS, *CHANNEL_VALUE_KEYS]
+        elif isinstance(columns, str):
+            columns = [columns]
+
+        for name in columns:
+            if name not in OBSERVATION_PARAMS and name not in CHANNEL_VALUE_KEYS:
+                raise ValueError(
+                    f"Unknown parameter={name}. Available: {[*OBSERVATION_PARAMS, *CHANNEL_VALUE_KEYS]}"
+                )
+
+        self.observation_params = [p for p in OBSERVATION_PARAMS if p in columns]
+        self.channel_params = [p for p in CHANNEL_VALUE_KEYS if p in columns]
+
+        param_filters = {}
+        for name in list(self.bufr_filters):
+            if name in CHANNEL_VALUE_KEYS:
+                raise ValueError(f"Parameter={name} cannot be used in filters")
+            if name in OBSERVATION_PARAMS:
+                if name not in self.observation_params:
+                    raise ValueError(f"Parameter={name} cannot be used in filters unless it is in columns")
+                param_filters[name] = self.bufr_filters.pop(name)
+
+        self.param_filters = ParamFilter(param_filters)
+        self.channel_filter = self.bufr_filters.pop(CHANNEL, None)
+
+    def read_message(
+        self,
+        message: Mapping[str, Any],
+        bufr_filters: Optional[Dict[str, Any]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        n, is_uncompressed, _ = subset_info(message)
+        if is_uncompressed:
+            LOG.warning(
+                "Messages with multiple uncompressed subsets are not supported by the satellite reader"
+            )
+            return
+
+        plan = ChannelPlan.from_message(message, self.structure_cache.channel_plans)
+        if not plan.channel_keys:
+            return
+
+        # the subsets and channels to keep
+        selected = self.select_subsets(message, bufr_filters, n)
+        if selected is None:
+            return
+
+        observations = {}
+        for name in self.observation_params:
+            if name == TIME:
+                v = plan.time(message, n)
+            else:
+                v = plan.first_observation(message, OBSERVATION_KEYS[name], n)
+            if v is not None:
+                observations[name] = v
+
+        if self.param_filters:
+            selected &= self.param_filters.mask(observations)
+
+        channels = plan.channels(message, n)
+        channel_selected = (
+            self.channel_filter.match_array(channels)
+            if self.channel_filter is not None
+            else np.ones(len(channels), dtype=bool)
+        )
+
+        if not selected.any() or not channel_selected.any():
+            return
+
+        values = {}
+        for name in self.channel_params:
+            v = plan.values(message, CHANNEL_VALUE_KEYS[name], n)
+            if v is not None:
+                values[name] = v
+
+        if not selected.all():
+            observations = {k: v[selected] for k, v in observations.items()}
+            values = {k: v[selected] for k, v in values.items()}
+        if not channel_selected.all():
+            channels = channels[channel_selected]
+            values = {k: v[:, channel_selected] for k, v in values.items()}
+
+        yield {self.BLOCK: ChannelBlock(observations, channels, values, int(selected.sum()))}
+
+    def block_data(
+        self, store: ColumnStore, dtypes: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> ChannelData:
+        return ChannelData.from_blocks(store.column_data().get(self.BLOCK, []), dtypes=dtypes)
+
+
+reader = SatelliteReader
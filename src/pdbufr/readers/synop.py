@@ -14,10 +14,9 @@ from typing import Generator
 from typing import List
 from typing import Mapping
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
-import pandas as pd
-
 import pdbufr.core.param as PARAMS
 from pdbufr.core.accessor import Accessor
 from pdbufr.core.accessor import AccessorManager
@@ -599,6 +598,10 @@ class SynopReader(StationReader):
                     self.param_filters[key] = self.bufr_filters.pop(key)
         self.param_filters = ParamFilter(self.param_filters, period=True)
 
+        # see column_schema()
+        self._column_ranks: Dict[str, int] = {}
+        self._schemas: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+
     def filter_header(self, message: Mapping[str, Any]) -> bool:
         c = message["dataCategory"]
         return c == 0 or c == 1
@@ -611,10 +614,11 @@ class SynopReader(StationReader):
 
         bufr_filters = bufr_filters or {}
         filtered_keys = self.get_filtered_keys(message, self.accessors, bufr_filters)
-        reader = BufrSubsetReader(message, filtered_keys)
+        reader = BufrSubsetReader(message, filtered_keys, plans=self.structure_cache.accessor_plans)
 
         for subset in reader.subsets():
             d = {}
+            station = {}
 
             # check generic filters first, this should be BUFR key filters
             if bufr_filters:
@@ -626,9 +630,9 @@ class SynopReader(StationReader):
                     continue
 
             # extract the parameters
-            for ac in self.accessors.values():
+            for name, ac in self.accessors.items():
                 r = ac.collect(
-                    subset,
+                    subset.restrict(ac.needed_keys),
                     add_coord=self.add_level,
                     units_converter=self.units_converter,
                     add_units=self.add_units,
@@ -640,60 +644,69 @@ class SynopReader(StationReader):
                     r = r_1
 
                 if self.param_filters.match(r):
-                    d.update(r)
+                    if self.is_station_param(name):
+                        station.update(r)
+                    else:
+                        d.update(r)
                 else:
                     d = {}
+                    station = {}
                     break
 
+            if self.stations is not None and (d or station):
+                d = {self.STATION_KEY: self.stations.add(station), **d}
+
             if d:
                 yield d
 
         # print(f"d={d}")
 
+    def column_rank(self, column: str) -> int:
+        """Return the position of the accessor generating the column"""
+        rank = self._column_ranks.get(column)
+        if rank is None:
+            # We assume that all the column names start with the accessor name.
+            # TODO: find a better solution to handle accessors like "latlon" where the column
+            # names do not start with the accessor name
+            for i, name in enumerate(self.accessors):
+                if name == "latlon" and column in ("lat", "lon", "lat_units", "lon_units"):
+                    rank = i
+                    break
+                elif column == name or column.startswith(name + "_"):
+                    rank = i
+                    break
+            else:
+                # TODO: make it less rigid
+                raise AssertionError(f"Column={column} does not belong to any accessor")
+            self._column_ranks[column] = rank
+        return rank
+
     def reorder_columns(self, columns: List[str]) -> List[str]:
         """Reorder the columns according to the accessors."""
-        r = []
-        # LOG.debug(f"reorder_columns: columns={columns}")
-
-        # We assume that all the column names start with the accessor name.
-        # TODO: find a better solution to handle accessors like "latlon" where the column
-        # names do not start with the accessor name
-        for name in self.accessors:
-            for i, c in enumerate(columns):
-                if c is None:
-                    continue
-                if name == "latlon" and c in ("lat", "lon", "lat_units", "lon_units"):
-                    r.append(c)
-                    columns[i] = None
-                elif c == name or c.startswith(name + "_"):
-                    r.append(c)
-                    columns[i] = None
-
-        # LOG.debug(f" -> after accessors: columns={columns}")
-        # TODO: make it less rigid
-        assert len(r) == len(columns), f"Expected {len(columns)} columns, got {len(r)}"
-
-        # LOG.debug(f" -> r={r}")
-
-        return r
-
-    def adjust_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        columns = df.columns.tolist()
-        from pdbufr.core.accessor import resolve_period_key
-
-        keys = {}
-        for c in columns:
-            name = resolve_period_key(c)
-
-            if name != c:
-                keys[c] = name
-
-        if keys:
-            df = df.rename(columns=keys)
-
-        col = self.reorder_columns(df.columns.tolist())
-        df = df[col]
-        return df
+        # the sort is stable so the columns of the same accessor keep their order
+        return sorted(columns, key=self.column_rank)
+
+    def column_schema(self, columns: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        """Return the pairs of the collected and final column names in the final order.
+        Since the same columns are generated for most of the messages it is only computed
+        once for each distinct set of columns.
+        """
+        schema = self._schemas.get(columns)
+        if schema is None:
+            from pdbufr.core.accessor import resolve_period_key
+
+            final = {resolve_period_key(c): c for c in columns if c != self.STATION_KEY}
+            schema = [(final[c], c) for c in self.reorder_columns(list(final))]
+            if self.STATION_KEY in columns:
+                schema.insert(0, (self.STATION_KEY, self.STATION_KEY))
+            self._schemas[columns] = schema
+        return schema
+
+    def adjust_columns(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        return {target: data[c] for c, target in self.column_schema(tuple(data))}
+
+    def adjust_station_columns(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        return self.adjust_columns(data)
 
 
 reader = SynopReader
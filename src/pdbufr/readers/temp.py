@@ -16,7 +16,7 @@ from typing import Mapping
 from typing import Optional
 from typing import Union
 
-import pandas as pd
+import pandas as pd  # type: ignore
 
 import pdbufr.core.param as PARAMS
 from pdbufr.core.accessor import Accessor
@@ -28,17 +28,28 @@ from pdbufr.core.accessor import LatLonAccessor
 from pdbufr.core.accessor import SidAccessor
 from pdbufr.core.accessor import SimpleAccessor
 from pdbufr.core.accessor import StationNameAccessor
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.columns import columns_to_dataframe
 from pdbufr.core.filters import ParamFilter
+from pdbufr.core.missing import float_array
+from pdbufr.core.missing import is_missing
 from pdbufr.core.param import Parameter
+from pdbufr.core.profiles import Profiles
 from pdbufr.core.subset import BufrSubsetReader
-from pdbufr.utils.convert import period_to_timedelta
+from pdbufr.utils.convert import PERIOD_UNITS
 from pdbufr.utils.units import UnitsConverter
 
 from .custom import StationReader
+from .geopot import ZH
 from .geopot import GeopotentialHandler
+from .geopot import Z
 
 LOG = logging.getLogger(__name__)
 
+TIME_OFFSET = PARAMS.TIME_OFFSET.label
+LAT_OFFSET = PARAMS.LAT_OFFSET.label
+LON_OFFSET = PARAMS.LON_OFFSET.label
+
 
 class PressureLevelAccessor(SimpleAccessor):
     keys: Dict[str, Optional[Parameter]] = {
@@ -122,12 +133,11 @@ class OffsetPressureLevelAccessor(PressureLevelAccessor):
 
                 v, units = value.get(key, (None, None))
 
-                if v is not None and units_converter is not None and param.units:
+                if not is_missing(v) and units_converter is not None and param.units:
                     v, units = units_converter.convert(label, v, units)
 
-                if param.is_period():
-                    v = period_to_timedelta(v, units)
-
+                # the time offsets are kept as numbers and converted into timedeltas
+                # for all the levels in one step, see TempReader.adjust_offset_columns()
                 res[label] = v
 
                 if add_units and param.units:
@@ -150,10 +160,9 @@ class OffsetPressureLevelAccessor(PressureLevelAccessor):
     ) -> List[Any]:
         mandatory = ["extendedVerticalSoundingSignificance", "pressure"]
 
-        units_keys = []
+        # the units of the time offsets are resolved once per message by the reader
         if add_offsets:
-            skip = [self.lat_offset, self.lon_offset]
-            units_keys = ["timePeriod"]
+            skip = []
         else:
             skip = [self.time_offset, self.lat_offset, self.lon_offset]
 
@@ -164,7 +173,6 @@ class OffsetPressureLevelAccessor(PressureLevelAccessor):
             raise_on_missing=raise_on_missing,
             units_converter=units_converter,
             add_units=add_units,
-            units_keys=units_keys,
             first=False,
             **kwargs,
         )
@@ -206,6 +214,21 @@ UPPER_ACCESSORS: Dict[str, Accessor] = {
 
 
 class TempReader(StationReader):
+    """Reader for TEMP-like data.
+
+    When the output is "profiles" the result is a :class:`pdbufr.core.profiles.Profiles`
+    object containing one row of station data per sounding and the levels of all the
+    soundings in a ragged array layout. When the output is "xarray" the profiles are
+    converted into an xarray Dataset with "profile" and "level" dimensions. In both cases
+    a record is generated for each sounding, so ``nrows`` limits the number of soundings.
+    """
+
+    OUTPUTS = StationReader.OUTPUTS + ("profiles", "xarray")
+    PROFILE_OUTPUTS = ("profiles", "xarray")
+
+    #: The record field holding the levels of a sounding when the output is "profiles"
+    LEVELS = "levels"
+
     def __init__(
         self,
         *args: Any,
@@ -213,11 +236,12 @@ class TempReader(StationReader):
         stnid_keys: Optional[Union[str, List[str]]] = None,
         bufr_filters: Optional[Dict[str, Any]] = None,
         geopotential: str = "z",
+        offsets: bool = False,
         **kwargs: Any,
     ) -> None:
         super().__init__(*args, **kwargs)
 
-        self.add_offsets = False
+        self.add_offsets = offsets
 
         if columns == []:
             columns = "default"
@@ -251,9 +275,10 @@ class TempReader(StationReader):
         self.upper_accessors = self.upper_accessors or None
 
         self.geopotential = geopotential
-        self.geopot_handler = None
-        if self.upper_accessors:
-            self.geopot_handler = GeopotentialHandler(self.geopotential)
+        self.geopot_handler = GeopotentialHandler(self.geopotential)
+        # the geopotential is derived column-wise when the table is generated unless
+        # the filters need it for each level
+        self.level_geopot = Z in self.param_filters or ZH in self.param_filters
 
     def filter_header(self, message: Mapping[str, Any]) -> bool:
         return message["dataCategory"] == 2
@@ -287,15 +312,24 @@ class TempReader(StationReader):
         else:
             upper_accessor = None
 
-        reader = BufrSubsetReader(message, filtered_keys)
+        time_scale = None
+        if upper_accessor and self.add_offsets:
+            time_scale = self.time_offset_scale(message)
+
+        reader = BufrSubsetReader(message, filtered_keys, plans=self.structure_cache.accessor_plans)
 
         for subset in reader.subsets():
+            # the station parameters are only extracted once per subset
             station = {}
+            dim = {}
             match = True
             for ac in self.station_accessors:
-                r = ac.collect(subset)
+                r = ac.collect(subset.restrict(ac.needed_keys))
                 if self.param_filters.match(r):
-                    station.update(r)
+                    if self.is_station_param(ac.param.label):
+                        dim.update(r)
+                    else:
+                        station.update(r)
                 else:
                     match = False
                     break
@@ -303,19 +337,23 @@ class TempReader(StationReader):
             if not match:
                 continue
 
+            if self.stations is not None:
+                station = {self.STATION_KEY: self.stations.add(dim), **station}
+
+            if self.output in self.PROFILE_OUTPUTS:
+                levels = self.read_levels(subset, upper_accessor, time_scale)
+                if levels is not None:
+                    yield {**station, self.LEVELS: levels}
+                continue
+
             if upper_accessor:
-                r = upper_accessor.collect(
-                    subset,
-                    add_offsets=self.add_offsets,
-                    units_converter=self.units_converter,
-                    add_units=self.add_units,
-                    # filters=self.filters,
-                )
+                r = self.collect_levels(subset, upper_accessor, time_scale)
 
                 if r:
                     for x in r:
                         if x:
-                            x = self.geopot_handler(x)
+                            if self.level_geopot:
+                                x = self.geopot_handler(x)
                             if self.param_filters.match(x):
                                 d = {**station, **x}
                                 yield d
@@ -326,13 +364,97 @@ class TempReader(StationReader):
             else:
                 yield station
 
-    def adjust_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        if self.geopotential == "z":
-            df.drop(columns=["zh", "zh_units"], inplace=True, errors="ignore")
-        elif self.geopotential == "zh":
-            df.drop(columns=["z", "z_units"], inplace=True, errors="ignore")
+    @staticmethod
+    def time_offset_scale(message: Mapping[str, Any]) -> Optional[int]:
+        """Return the factor converting the time offsets into seconds or None if the units
+        are unknown. The units are the same for all the levels so they are only resolved
+        once per message.
+        """
+        try:
+            units = message["timePeriod->units"]
+        except Exception:
+            return None
+        if isinstance(units, (list, tuple)):
+            units = units[0] if units else None
+        return PERIOD_UNITS.get(units, None)
+
+    def collect_levels(self, subset: Any, upper_accessor: Accessor, time_scale: Optional[int]) -> List[Any]:
+        r = upper_accessor.collect(
+            subset.restrict(upper_accessor.needed_keys),
+            add_offsets=self.add_offsets,
+            units_converter=self.units_converter,
+            add_units=self.add_units,
+        )
+
+        # the time offsets are stored in seconds
+        if time_scale != 1 and self.add_offsets and isinstance(upper_accessor, OffsetPressureLevelAccessor):
+            for x in r:
+                v = x.get(TIME_OFFSET)
+                x[TIME_OFFSET] = v * time_scale if not is_missing(v) and time_scale is not None else None
+
+        return r
+
+    def read_levels(
+        self, subset: Any, upper_accessor: Optional[Accessor], time_scale: Optional[int]
+    ) -> Optional[ColumnStore]:
+        """Collect the levels of a sounding into columns. Return None if levels were found
+        but none of them matched the filters.
+        """
+        levels = ColumnStore()
+        if not upper_accessor:
+            return levels
+
+        r = self.collect_levels(subset, upper_accessor, time_scale)
+
+        for x in r:
+            if x:
+                if self.level_geopot:
+                    x = self.geopot_handler(x)
+                levels.append(x)
 
-        return df
+        if self.param_filters:
+            levels = levels.filter(self.param_filters.mask)
+
+        if r and not levels:
+            return None
+        return levels
+
+    def finalise(
+        self,
+        store: ColumnStore,
+        output: str = "pandas",
+        dtypes: Optional[Union[str, Dict[str, Any]]] = None,
+        nrows: Optional[int] = None,
+    ) -> Any:
+        if output not in self.PROFILE_OUTPUTS:
+            return super().finalise(store, output=output, dtypes=dtypes, nrows=nrows)
+
+        data = store.column_data()
+        levels = [self.adjust_columns(x.column_data()) for x in data.pop(self.LEVELS, [])]
+        stations = columns_to_dataframe(data, dtypes=dtypes)
+        profiles = Profiles.from_stores(stations, levels, dtypes=dtypes)
+        if output == "xarray":
+            return profiles.to_xarray()
+        return profiles
+
+    def adjust_columns(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        data = self.geopot_handler.adjust_columns(data)
+        if self.add_offsets:
+            data = self.adjust_offset_columns(data)
+        return data
+
+    @staticmethod
+    def adjust_offset_columns(data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Convert the time offsets (in seconds) into a timedelta64 array and the position
+        offsets into float arrays for all the levels in one step
+        """
+        data = dict(data)
+        if TIME_OFFSET in data:
+            data[TIME_OFFSET] = pd.to_timedelta(float_array(data[TIME_OFFSET]), unit="s").to_numpy()
+        for name in (LAT_OFFSET, LON_OFFSET):
+            if name in data:
+                data[name] = float_array(data[name])
+        return data
 
 
 reader = TempReader
@@ -0,0 +1,271 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 2 * 1024**3
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class UncacheableError(Exception):
+    pass
+
+
+def default_cache_dir() -> str:
+    d = os.environ.get("PDBUFR_CACHE_DIR")
+    if d:
+        return d
+    return os.path.join(os.path.expanduser("~"), ".cache", "pdbufr")
+
+
+def versions() -> Tuple[str, str]:
+    import eccodes  # type: ignore
+
+    from pdbufr import __version__
+
+    return (__version__, eccodes.codes_get_api_version())
+
+
+def file_identity(path: Union[str, "os.PathLike[Any]"], hash_content: bool = False) -> List[Any]:
+    """Return the identity of the file. Either the modification time or the hash of the
+    contents is used to detect when the file was changed.
+    """
+    path = os.path.abspath(os.fspath(path))
+    st = os.stat(path)
+    if hash_content:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                h.update(block)
+        return [path, st.st_size, h.hexdigest()]
+    return [path, st.st_size, st.st_mtime_ns]
+
+
+def normalise(value: Any) -> Any:
+    """Convert a reader argument into a JSON serialisable form. Raise UncacheableError when
+    it is not possible to represent the value in a deterministic way (e.g. callables).
+    """
+    from pdbufr.core.filters import WIGOSId
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {"dict": sorted([str(k), normalise(v)] for k, v in value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalise(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {"set": sorted((normalise(v) for v in value), key=repr)}
+    if isinstance(value, slice):
+        return {"slice": [normalise(value.start), normalise(value.stop), normalise(value.step)]}
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+        return {type(value).__name__: str(value)}
+    if isinstance(value, WIGOSId):
+        return {"wigos": value.as_str()}
+    raise UncacheableError(f"Cannot use value={value!r} of type={type(value)} in a cache key")
+
+
+class ResultCache:
+    """Persistent cache of the results of :func:`read_bufr` on local files.
+
+    Each entry is keyed by the file identity (path, size and modification time or the hash
+    of the contents), the normalised reader arguments and the pdbufr/ecCodes versions.
+    The results are stored as Parquet files when ``pyarrow`` is available, otherwise they
+    are pickled. When the total size of the entries exceeds ``max_size`` bytes the least
+    recently used ones are removed.
+
+    Parameters
+    ----------
+    directory: str, None
+        The cache directory. When None, the ``PDBUFR_CACHE_DIR`` environment variable or
+        ``~/.cache/pdbufr`` is used.
+    max_size: int
+        The maximum total size of the cache in bytes.
+    hash_content: bool
+        Identify the files by the hash of their contents instead of their modification time.
+    """
+
+    SUFFIXES = (".parquet", ".pickle")
+
+    def __init__(
+        self, directory: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE, hash_content: bool = False
+    ) -> None:
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_size = max_size
+        self.hash_content = hash_content
+
+    def make_key(self, path: Any, **kwargs: Any) -> Optional[str]:
+        """Return the cache key or None if the result cannot be cached"""
+        if not isinstance(path, (str, os.PathLike)) or not os.path.isfile(path):
+            return None
+
+        try:
+            args = normalise(kwargs)
+        except UncacheableError as e:
+            LOG.debug(f"Result not cached: {e}")
+            return None
+
+        key = dict(file=file_identity(path, self.hash_content), args=args, versions=versions())
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str, output: str) -> str:
+        return os.path.join(self.directory, f"{key}-{output}")
+
+    def get(self, key: str, output: str = "pandas") -> Optional[Any]:
+        """Return the cached result or None if not found"""
+        entry = self._entry(key, output)
+        for suffix in self.SUFFIXES:
+            path = entry + suffix
+            if not os.path.exists(path):
+                continue
+            try:
+                res = self._load(path, output)
+            except Exception as e:
+                LOG.warning(f"Removing unreadable cache entry={path}: {e}")
+                self._remove(path)
+                return None
+
+            # the modification time tracks the last use for the LRU eviction
+            os.utime(path)
+            return res
+        return None
+
+    def put(self, key: str, result: Any, output: str = "pandas") -> None:
+        """Store the result in the cache"""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self._entry(key, output)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            suffix = self._store(tmp, result, output)
+            os.replace(tmp, entry + suffix)
+        except Exception as e:
+            LOG.warning(f"Could not write cache entry={entry}: {e}")
+            self._remove(tmp)
+            return
+
+        self.evict()
+
+    def _load(self, path: str, output: str) -> Any:
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq  # type: ignore
+
+            table = pq.read_table(path)
+            return table if output == "arrow" else table.to_pandas()
+        return pd.read_pickle(path)
+
+    def _store(self, path: str, result: Any, output: str) -> str:
+        if output not in ("pandas", "arrow"):
+            # e.g. the station and observation tables of the normalized output are stored together
+            pd.to_pickle(result, path)
+            return ".pickle"
+
+        try:
+            import pyarrow as pa  # type: ignore
+            import pyarrow.parquet as pq  # type: ignore
+        except ImportError:
+            pd.to_pickle(result, path)
+            return ".pickle"
+
+        try:
+            table = result if output == "arrow" else pa.Table.from_pandas(result)
+            pq.write_table(table, path)
+            return ".parquet"
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # e.g. object columns with mixed types
+            pd.to_pickle(result, path)
+            return ".pickle"
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """Return the (path, size, mtime) of the cache entries"""
+        if not os.path.isdir(self.directory):
+            return []
+
+        res = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIXES):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                res.append((path, st.st_size, st.st_mtime))
+        return res
+
+    def size(self) -> int:
+        return sum(e[1] for e in self.entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the size is within ``max_size``"""
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(e[1] for e in entries)
+        for path, size, _ in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def get_result_cache(cache: Union[bool, str, "os.PathLike[Any]", ResultCache]) -> ResultCache:
+    if isinstance(cache, ResultCache):
+        return cache
+    if cache is True:
+        return ResultCache()
+    if isinstance(cache, (str, os.PathLike)):
+        return ResultCache(os.fspath(cache))
+    raise ValueError(f"Invalid cache={cache!r}")
+
+
+def cached_result(
+    cache: Union[bool, str, "os.PathLike[Any]", ResultCache],
+    path_or_messages: Any,
+    output: str,
+    compute: Any,
+    **kwargs: Any,
+) -> Any:
+    """Return the result of ``compute()`` using the result cache when possible"""
+    rc = get_result_cache(cache)
+    key = rc.make_key(path_or_messages, output=output, **kwargs)
+    if key is None:
+        return compute()
+
+    res = rc.get(key, output)
+    if res is not None:
+        LOG.debug(f"Result cache hit key={key}")
+        return res
+
+    res = compute()
+    rc.put(key, res, output)
+    return res
@@ -10,13 +10,15 @@ import datetime
 from typing import Optional
 from typing import Union
 
+from pdbufr.core.missing import is_missing
+
 PERIOD_UNITS = {"s": 1, "m": 60, "h": 24 * 60, "d": 86400}
 
 
 def period_to_timedelta(
     period: Optional[Union[int, float]], units: Optional[str]
 ) -> Optional[datetime.timedelta]:
-    if period is None or units is None:
+    if is_missing(period) or units is None:
         return None
 
     scaling = PERIOD_UNITS.get(units, None)
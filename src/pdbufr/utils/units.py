@@ -14,6 +14,8 @@ from typing import Optional
 from typing import Tuple
 from typing import Union
 
+from pdbufr.core.missing import is_missing
+
 # Mapping from BUFR units str to Pint units str.
 # The rest of the units are handled by Pint.
 # See https://github.com/hgrecco/pint/blob/db0247017fd9bd2445db13b694d766880b7e3c20/pint/default_en.txt
@@ -119,7 +121,7 @@ class DefaultUnitsConverter(UnitsConverter):
                 p_src_units = self.pint_units(units)
                 p_target_units = self.pint_units(default_units)
                 print(f"DefaultUnitsConverter: {label=} {units=}{p_src_units=} {p_target_units=}")
-                if value is None or p_target_units == p_src_units:
+                if is_missing(value) or p_target_units == p_src_units:
                     return value, default_units
                 return self._Q(value, p_src_units).to(p_target_units).magnitude, default_units
         return value, units
@@ -146,7 +148,7 @@ class UserUnitsConverter(DefaultUnitsConverter):
                 return value, units
             else:
                 p_src_units = self.pint_units(units)
-                if value is None or p_target_units == p_src_units:
+                if is_missing(value) or p_target_units == p_src_units:
                     return value, b_target_units
                 return self._Q(value, p_src_units).to(p_target_units).magnitude, b_target_units
         elif self.base is not None:
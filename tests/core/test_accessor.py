@@ -8,8 +8,19 @@
 
 import pytest
 
+import pdbufr
 from pdbufr.core.accessor import parse_period_key
 from pdbufr.core.accessor import resolve_period_key
+from pdbufr.core.structure import MessageWrapper
+from pdbufr.core.structure import StructureCache
+from pdbufr.core.structure import filter_keys_cached
+from pdbufr.core.subset import BufrSubsetReader
+from pdbufr.high_level_bufr.bufr import BufrFile
+from pdbufr.readers.synop import MANAGER
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("pgps_110.bufr")
+TEST_DATA_2 = sample_test_data_path("synop_multi_subset_uncompressed.bufr")
 
 
 @pytest.mark.parametrize(
@@ -46,3 +57,45 @@ def test_resolve_period_key(key, excepted_value):
 )
 def test_parse_period_key(key, excepted_value):
     assert parse_period_key(key) == excepted_value
+
+
+@pytest.mark.parametrize("path", [TEST_DATA_1, TEST_DATA_2])
+def test_accessor_restricted_collector(path):
+    accessors = MANAGER.get("default")
+    keys = set(["subsetNumber"])
+    for ac in accessors.values():
+        keys |= set(ac.needed_keys)
+
+    cache = StructureCache()
+    with BufrFile(path) as bufr_file:
+        for msg in bufr_file:
+            with MessageWrapper.wrap_context(msg) as message:
+                message["unpack"] = 1
+                filtered_keys = filter_keys_cached(message, cache.filtered_keys, keys)
+                for plans in (None, cache.accessor_plans):
+                    reader = BufrSubsetReader(message, filtered_keys, plans=plans)
+                    for subset in reader.subsets():
+                        for ac in accessors.values():
+                            sub = subset.restrict(ac.needed_keys)
+                            assert sub.filtered_keys == [
+                                k for k in subset.filtered_keys if k.name in ac.needed_keys
+                            ]
+                            assert ac.collect(sub) == ac.collect(subset)
+
+    # the plans are compiled once per template and subset structure
+    assert cache.accessor_plans
+
+
+def test_accessor_plans_reused():
+    cache = StructureCache()
+    df_ref = pdbufr.read_bufr(TEST_DATA_2, reader="synop")
+    r = pdbufr.readers.get_reader("synop", TEST_DATA_2)
+    r.structure_cache = cache
+    df = r.execute()
+    n = len(cache.accessor_plans)
+    assert n > 0
+
+    # the same templates need no new plans
+    df = r.execute()
+    assert len(cache.accessor_plans) == n
+    assert df.equals(df_ref)
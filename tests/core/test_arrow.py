@@ -0,0 +1,133 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import numpy as np
+import pytest
+
+import pdbufr
+from pdbufr.utils.testing import sample_test_data_path
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+TEST_DATA_1 = sample_test_data_path("obs_3day.bufr")
+TEST_DATA_2 = sample_test_data_path("synop_multi_subset_uncompressed.bufr")
+
+
+def test_arrow_output_generic() -> None:
+    columns = ["stationNumber", "stationOrSiteName", "latitude", "airTemperature"]
+    res = pdbufr.read_bufr(TEST_DATA_2, columns=columns, output="arrow")
+    ref = pdbufr.read_bufr(TEST_DATA_2, columns=columns)
+
+    assert isinstance(res, pa.Table)
+    assert res.column_names == columns
+    assert res.num_rows == len(ref) == 12
+    assert pa.types.is_dictionary(res.schema.field("stationOrSiteName").type)
+    assert res.column("stationOrSiteName").to_pylist() == ref["stationOrSiteName"].tolist()
+    assert np.allclose(res.column("airTemperature").to_numpy(), ref["airTemperature"].values)
+
+
+def test_arrow_output_synop() -> None:
+    res = pdbufr.read_bufr(TEST_DATA_2, reader="synop", output="arrow")
+    ref = pdbufr.read_bufr(TEST_DATA_2, reader="synop")
+
+    assert res.column_names == ref.columns.tolist()
+    assert res.num_rows == len(ref)
+    assert pa.types.is_dictionary(res.schema.field("stnid").type)
+
+
+def test_arrow_output_invalid() -> None:
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_1, columns=["latitude"], output="invalid")
+
+
+def test_to_parquet(tmp_path) -> None:
+    columns = ["stationNumber", "latitude", "longitude", "airTemperature"]
+    target = tmp_path / "res.parquet"
+    n = pdbufr.to_parquet(TEST_DATA_2, target, columns=columns, row_group_size=5)
+    ref = pdbufr.read_bufr(TEST_DATA_2, columns=columns)
+
+    assert n == len(ref) == 12
+    f = pq.ParquetFile(target)
+    assert f.metadata.num_rows == n
+    assert f.metadata.num_row_groups == 3
+
+    res = pq.read_table(target).to_pandas()
+    assert res.columns.tolist() == columns
+    assert np.allclose(res["airTemperature"].values, ref["airTemperature"].values)
+
+
+def test_to_parquet_empty(tmp_path) -> None:
+    target = tmp_path / "res.parquet"
+    n = pdbufr.to_parquet(TEST_DATA_1, target, columns=["latitude"], filters={"latitude": 1000})
+    assert n == 0
+    assert pq.ParquetFile(target).metadata.num_rows == 0
+
+
+def test_to_parquet_varying_columns(tmp_path) -> None:
+    # the columns only present in the later row groups are kept
+    target = tmp_path / "res.parquet"
+    n = pdbufr.to_parquet(TEST_DATA_1, target, reader="flat", row_group_size=5)
+    ref = pdbufr.read_bufr(TEST_DATA_1, reader="flat")
+
+    assert n == len(ref)
+    assert pq.ParquetFile(target).metadata.num_row_groups == 10
+    res = pq.read_table(target).to_pandas()
+    assert res.columns.tolist() == ref.columns.tolist()
+    assert "#1#totalPrecipitationPast24Hours" in res.columns
+    np.testing.assert_array_equal(
+        res["#1#totalPrecipitationPast24Hours"].to_numpy(dtype=float),
+        ref["#1#totalPrecipitationPast24Hours"].to_numpy(dtype=float),
+    )
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_parquet_stream_writer_promote(tmp_path) -> None:
+    from pdbufr.core.arrow import ParquetStreamWriter
+
+    target = tmp_path / "res.parquet"
+    with ParquetStreamWriter(target) as writer:
+        writer.write(pa.table({"a": [1, 2], "b": [None, None]}))
+        writer.write(pa.table({"a": [1.5], "b": ["x"], "c": [3]}))
+
+    res = pq.read_table(target)
+    assert res.schema.field("a").type == pa.float64()
+    assert res.column("a").to_pylist() == [1.0, 2.0, 1.5]
+    assert res.column("b").to_pylist() == [None, None, "x"]
+    assert res.column("c").to_pylist() == [None, None, 3]
+
+
+def test_parquet_stream_writer_mixed_types(tmp_path) -> None:
+    from pdbufr.core.arrow import ParquetStreamWriter
+    from pdbufr.core.arrow import columns_to_table
+
+    target = tmp_path / "res.parquet"
+    with ParquetStreamWriter(target) as writer:
+        writer.write(columns_to_table({"a": [1, 2], "b": ["x", "y"]}))
+        writer.write(columns_to_table({"a": ["s"], "b": [3]}))
+        writer.write(columns_to_table({"a": [4], "b": ["z"]}))
+
+    res = pq.read_table(target)
+    assert pa.types.is_dictionary(res.schema.field("a").type)
+    assert res.column("a").to_pylist() == ["1", "2", "s", "4"]
+    assert res.column("b").to_pylist() == ["x", "y", "3", "z"]
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_parquet_stream_writer_error(tmp_path) -> None:
+    from pdbufr.core.arrow import ParquetStreamWriter
+
+    target = tmp_path / "res.parquet"
+    with pytest.raises(RuntimeError):
+        with ParquetStreamWriter(target) as writer:
+            writer.write(pa.table({"a": [1, 2]}))
+            writer.write(pa.table({"b": [1.5]}))
+            raise RuntimeError("failed")
+
+    # neither the target nor the part files are left behind
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,102 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import os
+import shutil
+
+import pandas as pd
+
+import pdbufr
+from pdbufr.utils.cache import ResultCache
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("synop_multi_subset_uncompressed.bufr")
+TEST_DATA_2 = sample_test_data_path("temp.bufr")
+
+COLUMNS = ["stationNumber", "latitude", "airTemperature"]
+
+
+def test_result_cache(tmp_path) -> None:
+    cache = ResultCache(str(tmp_path / "cache"))
+    ref = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS)
+
+    res = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, cache=cache)
+    pd.testing.assert_frame_equal(res, ref)
+    assert len(cache.entries()) == 1
+
+    # hit
+    path = cache.entries()[0][0]
+    os.utime(path, (0, 0))
+    res = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, cache=cache)
+    pd.testing.assert_frame_equal(res, ref)
+    assert len(cache.entries()) == 1
+    assert cache.entries()[0][2] > 0
+
+    # different arguments
+    pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, filters={"stationNumber": 27}, cache=cache)
+    pdbufr.read_bufr(TEST_DATA_1, reader="synop", cache=cache)
+    assert len(cache.entries()) == 3
+
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_result_cache_key(tmp_path) -> None:
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    k1 = cache.make_key(TEST_DATA_1, columns=COLUMNS, filters={"a": 1, "b": slice(1, 2)})
+    k2 = cache.make_key(TEST_DATA_1, filters={"b": slice(1, 2), "a": 1}, columns=COLUMNS)
+    assert k1 is not None
+    assert k1 == k2
+    assert k1 != cache.make_key(TEST_DATA_1, columns=COLUMNS, filters={"a": 2, "b": slice(1, 2)})
+
+    # not cacheable
+    assert cache.make_key(TEST_DATA_1, columns=COLUMNS, filters={"a": lambda x: x > 1}) is None
+    assert cache.make_key([{"a": 1}], columns=COLUMNS) is None
+
+
+def test_result_cache_file_changed(tmp_path) -> None:
+    path = str(tmp_path / "data.bufr")
+    shutil.copyfile(TEST_DATA_1, path)
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    key = cache.make_key(path, columns=COLUMNS)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.make_key(path, columns=COLUMNS) != key
+
+    cache = ResultCache(str(tmp_path / "cache"), hash_content=True)
+    key = cache.make_key(path, columns=COLUMNS)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    assert cache.make_key(path, columns=COLUMNS) == key
+
+    # the result is recomputed when the contents change
+    res = pdbufr.read_bufr(path, columns=COLUMNS, cache=cache)
+    assert len(res) == 12
+    shutil.copyfile(TEST_DATA_2, path)
+    res = pdbufr.read_bufr(path, columns=COLUMNS, cache=cache)
+    pd.testing.assert_frame_equal(res, pdbufr.read_bufr(TEST_DATA_2, columns=COLUMNS))
+
+
+def test_result_cache_eviction(tmp_path) -> None:
+    cache = ResultCache(str(tmp_path / "cache"))
+    pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, cache=cache)
+    size = cache.size()
+    assert size > 0
+
+    # only one entry fits
+    cache.max_size = int(size * 1.5)
+    pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS[:2], cache=cache)
+    assert len(cache.entries()) == 1
+    assert cache.size() <= cache.max_size
+
+
+def test_result_cache_default_dir(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("PDBUFR_CACHE_DIR", str(tmp_path / "env_cache"))
+    pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, cache=True)
+    assert len(os.listdir(tmp_path / "env_cache")) == 1
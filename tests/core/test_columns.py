@@ -0,0 +1,169 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import numpy as np
+import pytest
+
+import pdbufr
+from pdbufr.core.columns import ColumnStore
+from pdbufr.core.columns import intern_strings
+from pdbufr.utils.testing import sample_test_data_path
+
+pd = pytest.importorskip("pandas")
+
+
+def test_column_store_single_template() -> None:
+    rows = [{"a": 1, "b": "x"}, {"a": 2, "b": None}]
+    store = ColumnStore().extend(rows)
+
+    assert len(store) == 2
+    assert len(store.blocks) == 1
+    assert store.first_count == 2
+
+    df = store.to_dataframe()
+    pd.testing.assert_frame_equal(df, pd.DataFrame.from_records(rows))
+
+
+def test_column_store_mixed_templates() -> None:
+    rows = [
+        {"a": 1, "b": 1.5},
+        {"a": 2, "c": "x", "b": None},
+        {"a": 3, "b": 2.5},
+        {"d": 4},
+    ]
+    store = ColumnStore().extend(rows)
+
+    assert len(store.blocks) == 3
+    assert store.first_count == 2
+    assert store.columns() == ["a", "b", "c", "d"]
+
+    df = store.to_dataframe()
+    pd.testing.assert_frame_equal(df, pd.DataFrame.from_records(rows))
+    assert df["a"].tolist()[:3] == [1, 2, 3]
+    assert np.isnan(df["a"].iloc[3])
+
+
+def test_column_store_filter() -> None:
+    rows = [
+        {"a": 1, "b": 1.5},
+        {"a": 2, "c": "x", "b": None},
+        {"a": 3, "b": 2.5},
+        {"d": 4},
+        {"a": 5, "c": "y", "b": 3.5},
+    ]
+    store = ColumnStore().extend(rows)
+
+    def select(data):
+        return np.array([v is not None and v > 2 for v in data.get("b", data.get("d"))])
+
+    res = store.filter(select)
+    expected = rows[2:]
+    assert len(res) == 3
+    assert res.columns() == ["a", "b", "d", "c"]
+    pd.testing.assert_frame_equal(res.to_dataframe(), ColumnStore().extend(expected).to_dataframe())
+
+    assert len(store.filter(lambda data: np.zeros(len(next(iter(data.values()))), dtype=bool))) == 0
+
+
+def test_column_store_empty() -> None:
+    df = ColumnStore().to_dataframe()
+    assert df.empty
+    assert len(df.columns) == 0
+
+
+def test_column_store_dtypes_compact() -> None:
+    rows = [
+        {"stnid": "01001", "elevation": 10, "t": 280.1, "flag": True},
+        {"stnid": "01001", "elevation": None, "t": None, "flag": None},
+        {"stnid": "01002", "elevation": 300, "t": 281.5, "flag": False},
+    ]
+    store = ColumnStore().extend(rows)
+
+    df = store.to_dataframe(dtypes="compact")
+    assert df["stnid"].dtype == "category"
+    assert df["elevation"].dtype == "Int16"
+    assert df["elevation"].isna().tolist() == [False, True, False]
+    assert df["t"].dtype == "float64"
+    assert df["flag"].dtype == "boolean"
+
+    df = store.to_dataframe(dtypes="compact_float32")
+    assert df["t"].dtype == "float32"
+
+
+def test_column_store_dtypes_overrides() -> None:
+    rows = [{"stnid": "01001", "elevation": 10, "t": 280.1}, {"stnid": "01002", "elevation": 300, "t": 281.5}]
+    store = ColumnStore().extend(rows)
+
+    df = store.to_dataframe(dtypes={"t": "float32"})
+    assert df["stnid"].dtype == object
+    assert df["elevation"].dtype == "int64"
+    assert df["t"].dtype == "float32"
+
+    df = store.to_dataframe(dtypes={"*": "compact", "elevation": "Int64"})
+    assert df["stnid"].dtype == "category"
+    assert df["elevation"].dtype == "Int64"
+
+    with pytest.raises(ValueError):
+        store.to_dataframe(dtypes="invalid")
+
+
+def test_column_store_dtypes_categorical() -> None:
+    rows = [{"stnid": "01001", "elevation": 10}, {"stnid": "01002", "elevation": None}]
+    store = ColumnStore().extend(rows)
+
+    df = store.to_dataframe(dtypes="categorical")
+    assert df["stnid"].dtype == "category"
+    assert df["elevation"].dtype == "float64"
+
+
+def test_column_store_missing_values() -> None:
+    # the missing values as returned by normalise_missing()
+    rows = [
+        {"elevation": 10, "t": 280.1, "flag": pd.NA, "stnid": "01001"},
+        {"elevation": pd.NA, "t": pd.NA, "flag": pd.NA, "stnid": pd.NA},
+        {"elevation": 300, "t": 281, "flag": pd.NA, "stnid": "01002"},
+    ]
+    store = ColumnStore().extend(rows)
+
+    for dtypes in (None, "categorical", {"t": "float32"}):
+        df = store.to_dataframe(dtypes=dtypes)
+        assert df["elevation"].dtype == "Int64"
+        assert df["elevation"].isna().tolist() == [False, True, False]
+        assert df["t"].dtype == ("float32" if isinstance(dtypes, dict) else "float64")
+        assert df["t"].isna().tolist() == [False, True, False]
+        assert df["flag"].dtype == "float64"
+        assert df["flag"].isna().all()
+
+    df = store.to_dataframe(dtypes="compact")
+    assert df["elevation"].dtype == "Int16"
+    assert df["t"].dtype == "float64"
+
+
+def test_intern_strings() -> None:
+    # separate objects with the same value as returned by ecCodes
+    values = ["".join(["AB", "C"]) for _ in range(3)] + [None]
+    assert values[0] is not values[1]
+
+    res = intern_strings(values)
+    assert res == values
+    assert res[0] is res[1] is res[2]
+    assert intern_strings("".join(["AB", "C"])) is res[0]
+
+    v = np.array([1, 2])
+    assert intern_strings(v) is v
+    assert intern_strings([]) == []
+
+
+def test_intern_strings_compressed() -> None:
+    res = pdbufr.read_bufr(
+        sample_test_data_path("aircraft_mrar_compressed.bufr"),
+        columns=["aircraftRegistrationNumberOrOtherIdentification", "latitude"],
+    )
+    col = res["aircraftRegistrationNumberOrOtherIdentification"]
+    assert len(col) == 186
+    assert len({id(v) for v in col}) == col.nunique()
@@ -0,0 +1,119 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import eccodes  # type: ignore
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("syn_new.bufr")
+
+COLUMNS = ["stationNumber", "latitude", "airTemperature"]
+
+
+@pytest.fixture
+def duplicated(tmp_path):
+    """The messages of TEST_DATA_1 followed by their retransmissions, where the
+    first one only differs in the receipt time stored in the local section.
+    """
+    target = tmp_path / "dup.bufr"
+    with open(TEST_DATA_1, "rb") as f_in, open(target, "wb") as f_out:
+        messages = []
+        while True:
+            h = eccodes.codes_bufr_new_from_file(f_in)
+            if h is None:
+                break
+            messages.append(eccodes.codes_get_message(h))
+            if len(messages) == 1:
+                eccodes.codes_set(h, "rectimeSecond", 1)
+                retransmitted = eccodes.codes_get_message(h)
+            eccodes.codes_release(h)
+
+        for m in messages:
+            f_out.write(m)
+        f_out.write(retransmitted)
+        for m in messages[1:]:
+            f_out.write(m)
+
+    return target
+
+
+@pytest.mark.parametrize("mode,skipped", [("message", 2), ("header", 3)])
+def test_dedup_messages(duplicated, mode, skipped) -> None:
+    ref = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS)
+
+    res = pdbufr.read_bufr(duplicated, columns=COLUMNS, dedup=mode)
+    assert res.attrs["duplicates"] == {"messages": skipped, "rows": 0}
+    assert len(res) == len(ref) + 3 - skipped
+    pd.testing.assert_frame_equal(res.head(len(ref)), ref)
+
+
+@pytest.mark.parametrize(
+    "path,kwargs",
+    [
+        ("synop_wigos.bufr", {"reader": "synop"}),
+        (
+            "Z__C_EDZW_20210516120400_bda01,synop_bufr_GER_999999_999999__MW_466.bufr",
+            {"reader": "synop"},
+        ),
+        ("perf_aircraft.bufr", {"columns": ["latitude", "longitude", "airTemperature"]}),
+    ],
+)
+def test_dedup_header_distinct_messages(path, kwargs) -> None:
+    # the messages sharing the section 1 keys but containing different data are kept
+    path = sample_test_data_path(path)
+    ref = pdbufr.read_bufr(path, **kwargs)
+
+    res = pdbufr.read_bufr(path, dedup="header", **kwargs)
+    assert res.attrs["duplicates"] == {"messages": 0, "rows": 0}
+    pd.testing.assert_frame_equal(res, ref)
+
+
+def test_dedup_keys(duplicated) -> None:
+    ref = pdbufr.read_bufr(TEST_DATA_1, reader="synop")
+
+    res = pdbufr.read_bufr(duplicated, reader="synop", dedup_keys=["stnid", "time"])
+    assert res.attrs["duplicates"] == {"messages": 0, "rows": 3}
+    pd.testing.assert_frame_equal(res, ref)
+
+    res = pdbufr.read_bufr(duplicated, reader="synop", dedup="message", dedup_keys="stnid")
+    assert res.attrs["duplicates"] == {"messages": 2, "rows": 1}
+    pd.testing.assert_frame_equal(res, ref)
+
+
+def test_dedup_message_list() -> None:
+    header = {"edition": 4, "masterTableNumber": 0, "numberOfSubsets": 1, "unexpandedDescriptors": 0}
+    messages = [
+        {**header, "latitude": 1.0},
+        {**header, "latitude": 2.0},
+        {**header, "latitude": 1.0},
+    ]
+    res = pdbufr.read_bufr(messages, columns=["latitude"], dedup="message")
+    assert res["latitude"].tolist() == [1.0, 2.0]
+    assert res.attrs["duplicates"] == {"messages": 1, "rows": 0}
+
+
+def test_dedup_read_bufr_many(duplicated) -> None:
+    specs = [
+        {"columns": COLUMNS, "dedup": "message"},
+        {"reader": "synop", "dedup_keys": ["stnid", "time"]},
+        {"columns": COLUMNS},
+    ]
+    res = pdbufr.read_bufr_many(duplicated, specs)
+    for r, spec in zip(res, specs):
+        pd.testing.assert_frame_equal(r, pdbufr.read_bufr(duplicated, **spec))
+
+
+def test_dedup_invalid() -> None:
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, dedup="subset")
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, dedup_keys=[])
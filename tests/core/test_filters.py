@@ -11,6 +11,8 @@ import typing as T
 import numpy as np
 
 from pdbufr.core.filters import BufrFilter
+from pdbufr.core.filters import NotValueBufrFilter
+from pdbufr.core.filters import ParamFilter
 from pdbufr.core.filters import filters_match
 
 
@@ -90,3 +92,41 @@ def test_is_match() -> None:
 
     message.update({"level": 1, "height": 1.5})
     assert filters_match(message, compile_filters) is True
+
+
+def test_BufrFilter_match_array() -> None:
+    values = [1.0, np.nan, 2.0, 3.5, 10.0]
+    for f in (
+        BufrFilter.from_user(slice(2, 4)),
+        BufrFilter.from_user(slice(None, 3)),
+        BufrFilter.from_user([1, 10]),
+        BufrFilter.from_user(lambda x: x > 2),
+        NotValueBufrFilter([2, 3.5]),
+    ):
+        expected = [f.match(v) for v in values]
+        assert f.match_array(np.array(values)).tolist() == expected
+        assert f.match_array(values).tolist() == expected
+
+    # non-numeric values are matched one by one
+    values = ["a", None, "b"]
+    assert BufrFilter.from_user(["a", "c"]).match_array(values).tolist() == [True, False, False]
+    assert BufrFilter.from_user(slice("a", "a")).match_array(values).tolist() == [True, False, False]
+
+
+def test_ParamFilter() -> None:
+    f = ParamFilter({"t": BufrFilter.from_user(slice(250, None)), "p": BufrFilter.from_user([500, 850])})
+
+    assert f.match({"t": 260.0, "p": 500, "z": 1})
+    assert not f.match({"t": 240.0, "p": 500, "z": 1})
+    # keys without a record value are not checked
+    assert f.match({"t": 260.0})
+    assert not f.match({"t": None})
+    assert f.get_checks(("t", "p", "z")) == [("t", f["t"]), ("p", f["p"])]
+    assert len(f.checks) == 2
+
+    data = {"t": [260.0, 240.0, np.nan, 270.0], "p": [500, 500, 850, 700], "z": [1, 2, 3, 4]}
+    assert f.mask(data).tolist() == [True, False, False, False]
+    assert f.mask(data).tolist() == [f.match(dict(zip(data, r))) for r in zip(*data.values())]
+
+    assert ParamFilter({}).match({"t": 1})
+    assert ParamFilter({}).mask(data).tolist() == [True] * 4
@@ -0,0 +1,90 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.handles import HANDLE_CACHE
+from pdbufr.high_level_bufr.bufr import BufrFile
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("temp.bufr")
+TEST_DATA_2 = sample_test_data_path("syn_new.bufr")
+
+COLUMNS = ["stationNumber", "pressure", "airTemperature"]
+FILTERS = {"count": slice(1, 5)}
+
+
+@pytest.fixture
+def handle_cache():
+    pdbufr.enable_handle_cache()
+    yield HANDLE_CACHE
+    pdbufr.disable_handle_cache()
+
+
+def test_handle_cache(handle_cache) -> None:
+    pdbufr.disable_handle_cache()
+    ref = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, filters=FILTERS)
+    pdbufr.enable_handle_cache()
+
+    res = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, filters=FILTERS)
+    pd.testing.assert_frame_equal(res, ref)
+    assert len(handle_cache) == 5
+    assert handle_cache.hits == 0
+
+    res = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, filters=FILTERS)
+    pd.testing.assert_frame_equal(res, ref)
+    assert len(handle_cache) == 5
+    assert handle_cache.hits == 5
+
+    pdbufr.disable_handle_cache()
+    assert len(handle_cache) == 0
+    assert handle_cache.memory == 0
+
+
+def test_handle_cache_extra_attributes(handle_cache) -> None:
+    pdbufr.disable_handle_cache()
+    ref_synop = pdbufr.read_bufr(TEST_DATA_2, reader="synop", units_columns=True)
+    ref = pdbufr.read_bufr(TEST_DATA_2, columns=["stationNumber", "airTemperature"])
+    pdbufr.enable_handle_cache()
+
+    # the handles unpacked without the attributes cannot be used by the synop reader
+    pdbufr.read_bufr(TEST_DATA_2, columns=["stationNumber", "airTemperature"])
+    res = pdbufr.read_bufr(TEST_DATA_2, reader="synop", units_columns=True)
+    pd.testing.assert_frame_equal(res, ref_synop)
+    assert handle_cache.hits == 0
+
+    # the handles with the attributes can be used by any reader
+    res = pdbufr.read_bufr(TEST_DATA_2, columns=["stationNumber", "airTemperature"])
+    pd.testing.assert_frame_equal(res, ref)
+    res = pdbufr.read_bufr(TEST_DATA_2, reader="synop", units_columns=True)
+    pd.testing.assert_frame_equal(res, ref_synop)
+    assert handle_cache.hits == 2 * len(handle_cache)
+
+
+def test_handle_cache_eviction(handle_cache) -> None:
+    pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, filters=FILTERS)
+    size = handle_cache.memory // len(handle_cache)
+
+    pdbufr.enable_handle_cache(max_memory=int(size * 2.5))
+    assert len(handle_cache) == 2
+    assert handle_cache.memory <= handle_cache.max_memory
+
+    with BufrFile(TEST_DATA_1) as f:
+        messages = [next(f) for _ in range(5)]
+        # the most recently used handles are kept
+        messages[4]["skipExtraKeyAttributes"] = 1
+        messages[4]["unpack"] = 1
+        assert messages[4]._handle_entry is not None
+
+        # a borrowed handle is only released when given back
+        pdbufr.enable_handle_cache(max_memory=0)
+        assert len(handle_cache) == 0
+        assert messages[4]._handle_entry.evicted
+        assert len(messages[4]["pressure"]) > 0
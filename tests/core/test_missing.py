@@ -0,0 +1,116 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import eccodes  # type: ignore
+import numpy as np
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.channels import ChannelBlock
+from pdbufr.core.channels import ChannelData
+from pdbufr.core.filters import BufrFilter
+from pdbufr.core.missing import float_array
+from pdbufr.core.missing import is_missing
+from pdbufr.core.missing import normalise_missing
+from pdbufr.core.missing import numeric_array
+from pdbufr.core.structure import filter_keys
+from pdbufr.readers.generic import extract_observations
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("aircraft_mrar_compressed.bufr")
+
+
+def test_normalise_missing() -> None:
+    v = np.array([1.0, eccodes.CODES_MISSING_DOUBLE, 3.0])
+    res = normalise_missing(v)
+    assert res.dtype == np.float64
+    np.testing.assert_equal(res, [1.0, np.nan, 3.0])
+    # the input is not modified
+    assert v[1] == eccodes.CODES_MISSING_DOUBLE
+
+    # arrays without missing values are returned as they are
+    v = np.array([1, 2, 3])
+    assert normalise_missing(v) is v
+
+    assert np.isnan(normalise_missing(eccodes.CODES_MISSING_DOUBLE))
+    assert normalise_missing(eccodes.CODES_MISSING_LONG) is pd.NA
+    assert normalise_missing(np.int64(eccodes.CODES_MISSING_LONG)) is pd.NA
+    assert normalise_missing(2.0) == 2.0
+    assert normalise_missing("abc") == "abc"
+
+    assert is_missing(None)
+    assert is_missing(np.nan)
+    assert is_missing(np.float64("nan"))
+    assert not is_missing(0.0)
+    assert not is_missing("")
+
+
+def test_missing_compressed_integers() -> None:
+    message = {
+        "compressedData": 1,
+        "numberOfSubsets": 3,
+        "#1#stationNumber": np.array([1, eccodes.CODES_MISSING_LONG, 3]),
+        "#1#temperature": np.array([300.0, 290.0, eccodes.CODES_MISSING_DOUBLE]),
+    }
+    filtered_keys = list(filter_keys(message))
+    res = list(extract_observations(message, filtered_keys))
+    assert [r["stationNumber"] for r in res] == [1, pd.NA, 3]
+    np.testing.assert_equal([r["temperature"] for r in res], [300.0, 290.0, np.nan])
+
+    filters = {"temperature": BufrFilter.from_user(slice(None, 295.0))}
+    res = list(extract_observations(message, filtered_keys, filters))
+    assert [r["stationNumber"] for r in res] == [pd.NA]
+
+
+def test_missing_float_columns_numeric() -> None:
+    res = pdbufr.read_bufr(TEST_DATA_1, columns="data", flat=True)
+    col = res["#1#aircraftTrueAirspeed"]
+    assert col.dtype == np.float64
+    assert col.isna().all()
+
+
+def test_missing_nullable_integers() -> None:
+    v = np.array([1, eccodes.CODES_MISSING_LONG, 3])
+    res = normalise_missing(v)
+    assert res.dtype == "Int64"
+    assert res.tolist() == [1, pd.NA, 3]
+    np.testing.assert_equal(numeric_array(res), [1.0, np.nan, 3.0])
+
+    # 2-D arrays cannot be nullable
+    v = np.array([[1, eccodes.CODES_MISSING_LONG]])
+    assert normalise_missing(v) is v
+    np.testing.assert_equal(float_array(v), [[1.0, np.nan]])
+
+    assert is_missing(pd.NA)
+    assert BufrFilter.from_user(slice(2, None)).match_array(res).tolist() == [False, False, True]
+    assert BufrFilter.from_user([1, 2]).match_array(res).tolist() == [True, False, False]
+
+
+def test_missing_nullable_integer_columns() -> None:
+    b1 = ChannelBlock(
+        {"fov": normalise_missing(np.array([1, eccodes.CODES_MISSING_LONG]))},
+        np.array([1]),
+        {"tb": np.array([[1.0], [2.0]])},
+        2,
+    )
+    b2 = ChannelBlock({"fov": np.array([3])}, np.array([1]), {"tb": np.array([[3.0]])}, 1)
+    b3 = ChannelBlock({}, np.array([1]), {"tb": np.array([[4.0]])}, 1)
+    res = ChannelData.from_blocks([b1, b2, b3])
+    assert res.observations["fov"].dtype == "Int64"
+
+    df = res.to_dataframe()
+    assert df["fov"].dtype == "Int64"
+    assert df["fov"].tolist() == [1, pd.NA, 3, pd.NA]
+
+    pa = pytest.importorskip("pyarrow")
+    from pdbufr.core.arrow import columns_to_table
+
+    table = columns_to_table(res.to_columns())
+    assert table["fov"].type == pa.int64()
+    assert table["fov"].to_pylist() == [1, None, 3, None]
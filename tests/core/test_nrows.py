@@ -0,0 +1,102 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.high_level_bufr.bufr import BufrFile
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("syn_new.bufr")
+TEST_DATA_2 = sample_test_data_path("temp.bufr")
+TEST_DATA_3 = sample_test_data_path("compress_3.bufr")
+
+
+@pytest.mark.parametrize(
+    "path,kwargs",
+    [
+        (TEST_DATA_1, {"columns": ["stationNumber", "latitude", "airTemperature"]}),
+        (TEST_DATA_1, {"reader": "synop"}),
+        (TEST_DATA_2, {"reader": "temp", "filters": {"count": slice(1, 3)}}),
+        (TEST_DATA_2, {"columns": "data", "flat": True, "filters": {"count": slice(1, 3)}}),
+        (TEST_DATA_3, {"columns": ["latitude", "longitude"]}),
+    ],
+)
+@pytest.mark.parametrize("nrows", [0, 1, 7, 100000])
+def test_nrows(path, kwargs, nrows) -> None:
+    ref = pdbufr.read_bufr(path, **kwargs)
+    res = pdbufr.read_bufr(path, nrows=nrows, **kwargs)
+
+    assert len(res) == min(nrows, len(ref))
+    if nrows > 0:
+        # the columns only present in later rows are missing
+        ref = ref.head(nrows)
+        assert ref.drop(columns=res.columns).isna().all().all()
+        pd.testing.assert_frame_equal(res, ref[res.columns], check_dtype=False)
+
+
+def test_nrows_stops_decoding() -> None:
+    decoded = []
+
+    def _messages():
+        with BufrFile(TEST_DATA_3) as bufr_file:
+            for msg in bufr_file:
+                decoded.append(msg)
+                yield msg
+
+    # each message contains 128 compressed subsets
+    res = pdbufr.read_bufr(_messages(), columns=["latitude", "longitude"], nrows=10)
+    assert len(res) == 10
+    assert len(decoded) == 1
+
+
+def test_nrows_head() -> None:
+    ref = pdbufr.read_bufr(TEST_DATA_1, columns=["stationNumber", "latitude"], nrows=5)
+    res = pdbufr.read_bufr(TEST_DATA_1, columns=["stationNumber", "latitude"], head=5)
+    pd.testing.assert_frame_equal(res, ref)
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_1, columns=["latitude"], nrows=5, head=5)
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_1, columns=["latitude"], nrows=-1)
+
+
+def test_nrows_to_parquet(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+
+    target = tmp_path / "res.parquet"
+    n = pdbufr.to_parquet(
+        TEST_DATA_3, target, columns=["latitude", "longitude"], nrows=150, row_group_size=64
+    )
+    assert n == 150
+
+    ref = pdbufr.read_bufr(TEST_DATA_3, columns=["latitude", "longitude"], nrows=150)
+    res = pd.read_parquet(target)
+    assert res["latitude"].tolist() == ref["latitude"].tolist()
+
+
+def test_nrows_read_bufr_many() -> None:
+    specs = [
+        {"reader": "synop", "nrows": 2},
+        {"columns": ["stationNumber", "latitude"], "head": 3},
+        {"columns": ["stationNumber"], "nrows": 0},
+    ]
+    res = pdbufr.read_bufr_many(TEST_DATA_1, specs)
+    for r, spec in zip(res, specs):
+        ref = pdbufr.read_bufr(TEST_DATA_1, **spec)
+        assert len(r) == len(ref)
+        if len(ref) > 0:
+            pd.testing.assert_frame_equal(r, ref)
+
+
+def test_nrows_scan_bufr() -> None:
+    ref = pdbufr.read_bufr(TEST_DATA_3, columns=["latitude"], nrows=20)
+    res = pdbufr.scan_bufr(TEST_DATA_3).select("latitude").head(20).collect()
+    pd.testing.assert_frame_equal(res, ref)
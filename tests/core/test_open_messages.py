@@ -0,0 +1,71 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import gc
+import tracemalloc
+import weakref
+
+import pdbufr
+from pdbufr.high_level_bufr.bufr import BufrFile
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("syn_new.bufr")
+
+
+def replicate(path, target, n):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(target, "wb") as f:
+        for _ in range(n):
+            f.write(data)
+    return target
+
+
+def test_open_messages_released(tmp_path) -> None:
+    path = replicate(TEST_DATA_1, tmp_path / "rep.bufr", 100)
+
+    refs = []
+    with BufrFile(path) as bufr_file:
+        for msg in bufr_file:
+            with msg:
+                assert len(bufr_file.open_messages) == 1
+                refs.append(weakref.ref(msg))
+            assert len(bufr_file.open_messages) == 0
+        del msg
+
+    gc.collect()
+    assert len(refs) == 300
+    assert all(r() is None for r in refs)
+
+
+def test_open_messages_closed_with_file() -> None:
+    with BufrFile(TEST_DATA_1) as bufr_file:
+        messages = [bufr_file.next(), bufr_file.next()]
+        assert len(bufr_file.open_messages) == 2
+
+    assert len(bufr_file.open_messages) == 0
+    assert all(m.codes_id == -1 for m in messages)
+
+
+def test_open_messages_memory(tmp_path) -> None:
+    # the memory used while reading must not depend on the number of messages
+    def _read(n):
+        path = replicate(TEST_DATA_1, tmp_path / f"rep_{n}.bufr", n)
+        tracemalloc.start()
+        try:
+            res = pdbufr.read_bufr(path, columns=["stationNumber"], filters={"stationNumber": -1})
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert len(res) == 0
+        return peak
+
+    _read(10)
+    small = _read(100)
+    large = _read(1000)
+    assert large < small * 2
@@ -0,0 +1,143 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("temp.bufr")
+TEST_DATA_2 = sample_test_data_path("synop_multi_subset_uncompressed.bufr")
+
+
+def test_scan_bufr_collect() -> None:
+    columns = ["stationNumber", "pressure", "airTemperature"]
+    filters = dict(stationNumber=[907, 823], count=slice(1, 10))
+
+    q = pdbufr.scan_bufr(TEST_DATA_1).select(*columns).filter(filters)
+    res = q.collect()
+    ref = pdbufr.read_bufr(TEST_DATA_1, columns=columns, filters=filters)
+    pd.testing.assert_frame_equal(res, ref)
+
+    # the query is not modified by the derived queries
+    assert len(q.head(5).collect()) == 5
+    pd.testing.assert_frame_equal(q.collect(), ref)
+
+    # the structure cache is shared
+    assert len(q.structure_cache) > 0
+    assert "structure cache: 0 " not in q.explain()
+
+
+def test_scan_bufr_filter_merge() -> None:
+    q = pdbufr.scan_bufr(TEST_DATA_1).select("stationNumber").filter(count=slice(1, 10))
+    q = q.filter(stationNumber=907)
+    assert q.filters == {"count": slice(1, 10), "stationNumber": 907}
+
+    res = q.collect()
+    assert len(res) > 0
+    assert set(res["stationNumber"]) == {907}
+
+    # the same key can only be filtered again with the same condition
+    assert q.filter(stationNumber=907).filters == q.filters
+    with pytest.raises(ValueError):
+        q.filter(stationNumber=823)
+    with pytest.raises(ValueError):
+        q.filter({"count": slice(1, 5)})
+
+
+def test_scan_bufr_filter_options() -> None:
+    # the filters passed to scan_bufr() are combined with the ones of the query
+    q = pdbufr.scan_bufr(TEST_DATA_1, filters={"stationNumber": 907}).select("stationNumber", "pressure")
+    res = q.filter(pressure=50000).collect()
+    ref = pdbufr.read_bufr(
+        TEST_DATA_1, columns=["stationNumber", "pressure"], filters={"stationNumber": 907, "pressure": 50000}
+    )
+    assert len(res) == 1
+    pd.testing.assert_frame_equal(res, ref)
+
+    with pytest.raises(ValueError):
+        q.filter(stationNumber=823).collect()
+
+
+def test_scan_bufr_head() -> None:
+    q = pdbufr.scan_bufr(TEST_DATA_1).select("pressure", "airTemperature")
+    ref = q.collect()
+
+    res = q.head(7).collect()
+    pd.testing.assert_frame_equal(res, ref.head(7))
+
+    assert q.head(7).head(3).limit == 3
+    assert len(q.head(0).collect()) == 0
+
+    with pytest.raises(ValueError):
+        q.head(-1)
+
+
+def test_scan_bufr_iter_chunks() -> None:
+    q = pdbufr.scan_bufr(TEST_DATA_1).select("stationNumber", "pressure").filter(count=slice(1, 5))
+    ref = q.collect()
+
+    chunks = list(q.iter_chunks(50))
+    assert all(len(c) <= 50 for c in chunks)
+    res = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(res, ref)
+
+
+def test_scan_bufr_agg() -> None:
+    q = (
+        pdbufr.scan_bufr(TEST_DATA_1)
+        .filter(count=slice(1, 10))
+        .group_by("stationNumber")
+        .agg(t_mean=("airTemperature", "mean"))
+    )
+
+    plan = q.plan()
+    assert plan.columns == ["stationNumber", "airTemperature"]
+    assert "derived from aggregation" in q.explain()
+
+    res = q.collect()
+    ref = pdbufr.read_bufr(
+        TEST_DATA_1, columns=["stationNumber", "airTemperature"], filters=dict(count=slice(1, 10))
+    )
+    ref = ref.groupby("stationNumber", sort=False).agg(t_mean=("airTemperature", "mean")).reset_index()
+    pd.testing.assert_frame_equal(res, ref)
+
+    with pytest.raises(ValueError):
+        list(q.iter_chunks(10))
+
+    # group_by() without agg()
+    q = pdbufr.scan_bufr(TEST_DATA_1).select("stationNumber", "airTemperature").group_by("stationNumber")
+    with pytest.raises(ValueError):
+        q.collect()
+    with pytest.raises(ValueError):
+        list(q.iter_chunks(10))
+
+
+def test_scan_bufr_explain() -> None:
+    q = pdbufr.scan_bufr(TEST_DATA_1).select("stationNumber").filter(dataCategory=2, count=slice(1, 3))
+    plan = q.plan()
+    assert plan.options["prefilter_headers"]
+    assert plan.header_filters == ["dataCategory"]
+    assert plan.max_count == 3
+
+    s = q.explain()
+    assert "header pushdown: dataCategory" in s
+    assert "key walking" not in s
+    assert "early termination: after message 3" in s
+
+    # header pushdown can be disabled
+    q = pdbufr.scan_bufr(TEST_DATA_1, prefilter_headers=False).filter(dataCategory=2)
+    assert not q.plan().options["prefilter_headers"]
+    assert "header pushdown: -" in q.explain()
+
+
+def test_scan_bufr_custom_reader() -> None:
+    ref = pdbufr.read_bufr(TEST_DATA_2, reader="synop", filters={"count": 1})
+    res = pdbufr.scan_bufr(TEST_DATA_2, reader="synop").filter(count=1).collect()
+    pd.testing.assert_frame_equal(res, ref)
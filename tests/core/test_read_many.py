@@ -0,0 +1,77 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.structure import SharedMessage
+from pdbufr.high_level_bufr.bufr import BufrFile
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("syn_new.bufr")
+TEST_DATA_2 = sample_test_data_path("temp.bufr")
+
+
+@pytest.mark.parametrize(
+    "path,specs",
+    [
+        (
+            TEST_DATA_1,
+            [
+                {"reader": "synop"},
+                {"columns": ["stationNumber", "latitude", "airTemperature"]},
+                {"reader": "synop", "columns": ["t2m", "td2m"], "units_columns": True},
+                {"columns": "data", "flat": True, "filters": {"count": 2}},
+            ],
+        ),
+        (
+            TEST_DATA_2,
+            [
+                {"reader": "temp", "filters": {"count": slice(1, 4)}},
+                {"columns": ["stationNumber", "pressure", "airTemperature"], "filters": {"pressure": 50000}},
+                {"reader": "flat", "columns": "header", "filters": {"count": slice(2, 3)}},
+            ],
+        ),
+    ],
+)
+def test_read_bufr_many(path, specs) -> None:
+    res = pdbufr.read_bufr_many(path, specs)
+    assert len(res) == len(specs)
+    for r, spec in zip(res, specs):
+        ref = pdbufr.read_bufr(path, **spec)
+        pd.testing.assert_frame_equal(r, ref)
+
+
+def test_read_bufr_many_empty() -> None:
+    assert pdbufr.read_bufr_many(TEST_DATA_1, []) == []
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr_many(TEST_DATA_1, [{"columns": ["latitude"], "output": "invalid"}])
+
+
+def test_shared_message() -> None:
+    with BufrFile(TEST_DATA_1) as f:
+        message = next(f)
+        header_keys = list(message)
+
+        shared = SharedMessage(message)
+        shared["skipExtraKeyAttributes"] = 1
+        shared["unpack"] = 1
+        assert shared.unpacked
+        keys = list(shared)
+        assert len(keys) > len(header_keys)
+        # the attributes are kept
+        assert shared["#1#airTemperature->units"] == "K"
+
+        # a new reader only sees the header keys until it unpacks
+        shared.reset()
+        assert list(shared) == header_keys
+        shared["unpack"] = 1
+        assert list(shared) == keys
+        assert [k.key for k in shared.bufr_keys()] == keys
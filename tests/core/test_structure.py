@@ -10,6 +10,7 @@ import typing as T
 
 import eccodes  # type: ignore
 import numpy as np
+import pandas as pd
 import pytest
 
 from pdbufr import stream_bufr
@@ -234,12 +235,14 @@ def test_extract_observations_simple() -> None:
     filtered_keys = list(filter_keys(message))[:-2]
     expected = [
         {"pressure": 100, "temperature": 300.0},
-        {"pressure": None, "temperature": None},
+        {"pressure": pd.NA, "temperature": np.nan},
     ]
 
-    res = extract_observations(message, filtered_keys)
+    res = list(extract_observations(message, filtered_keys))
 
-    assert list(res) == expected
+    assert res[0] == expected[0]
+    assert res[1]["pressure"] is pd.NA
+    assert np.isnan(res[1]["temperature"])
 
     filters = {"pressure": BufrFilter.from_user(slice(95, None))}
 
@@ -261,12 +264,12 @@ def test_extract_observations_medium() -> None:
     filters = {"count": BufrFilter.from_user({1})}
     expected = [
         {"count": 1, "pressure": 100, "temperature": 300.0},
-        {"count": 1, "pressure": 90, "temperature": None},
+        {"count": 1, "pressure": 90, "temperature": np.nan},
     ]
 
     res = extract_observations(message, filtered_keys, filters, {"count": 1})
 
-    assert list(res) == expected
+    np.testing.assert_equal(list(res), expected)
 
     filters = {"pressure": BufrFilter.from_user(slice(95, 100))}
 
@@ -292,7 +295,7 @@ def test_extract_observations_complex() -> None:
     filtered_keys = list(filter_keys(message))[:-2]
     expected = [
         {"latitude": 42, "pressure": 100, "temperature": 300.0},
-        {"latitude": 42, "pressure": 90, "temperature": None},
+        {"latitude": 42, "pressure": 90, "temperature": np.nan},
         {
             "latitude": 43,
             "temperature": 290.0,
@@ -304,12 +307,12 @@ def test_extract_observations_complex() -> None:
 
     res = extract_observations(message, filtered_keys, {})
 
-    assert list(res) == expected
+    np.testing.assert_equal(list(res), expected)
 
     filters = {"latitude": BufrFilter.from_user(slice(None))}
     expected = [
         {"latitude": 42, "pressure": 100, "temperature": 300.0},
-        {"latitude": 42, "pressure": 90, "temperature": None},
+        {"latitude": 42, "pressure": 90, "temperature": np.nan},
         {
             "latitude": 43,
             "temperature": 290.0,
@@ -321,7 +324,7 @@ def test_extract_observations_complex() -> None:
 
     res = extract_observations(message, filtered_keys, filters)
 
-    assert list(res) == expected
+    np.testing.assert_equal(list(res), expected)
 
 
 def test_extract_observations_subsets_simple() -> None:
@@ -344,13 +347,13 @@ def test_extract_observations_subsets_simple() -> None:
             "compressedData": 1,
             "numberOfSubsets": 2,
             "pressure": 90,
-            "temperature": None,
+            "temperature": np.nan,
         },
     ]
 
     res = extract_observations(message, filtered_keys)
 
-    assert list(res) == expected
+    np.testing.assert_equal(list(res), expected)
 
     filters = {"pressure": BufrFilter.from_user(slice(95, None))}
 
@@ -0,0 +1,121 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr import __main__
+from pdbufr.bufr_tail import Checkpoint
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_1 = sample_test_data_path("temp.bufr")
+
+COLUMNS = ["count", "stationNumber", "pressure", "airTemperature"]
+
+
+def message_offsets(path):
+    import eccodes
+
+    r = []
+    with open(path, "rb") as f:
+        while True:
+            h = eccodes.codes_bufr_new_from_file(f)
+            if h is None:
+                break
+            eccodes.codes_release(h)
+            r.append(f.tell())
+    return r
+
+
+def test_read_bufr_tail(tmp_path) -> None:
+    with open(TEST_DATA_1, "rb") as f:
+        data = f.read()
+    offsets = message_offsets(TEST_DATA_1)
+
+    path = str(tmp_path / "growing.bufr")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    filters = {"count": slice(1, 10)}
+    ref = pdbufr.read_bufr(TEST_DATA_1, columns=COLUMNS, filters=filters)
+
+    # 3 messages + an incomplete one
+    with open(path, "wb") as f:
+        f.write(data[: offsets[2] + 100])
+
+    res_1 = pdbufr.read_bufr_tail(path, checkpoint, columns=COLUMNS, filters=filters)
+    assert set(res_1["count"]) == {1, 2, 3}
+    cp = Checkpoint.load(checkpoint)
+    assert cp.offset == offsets[2]
+    assert cp.count == 3
+
+    # nothing new
+    res = pdbufr.read_bufr_tail(path, checkpoint, columns=COLUMNS, filters=filters)
+    assert len(res) == 0
+
+    # the file grows
+    with open(path, "wb") as f:
+        f.write(data)
+
+    res_2 = pdbufr.read_bufr_tail(path, checkpoint, columns=COLUMNS, filters=filters)
+    assert min(res_2["count"]) == 4
+
+    res = pd.concat([res_1, res_2], ignore_index=True)
+    pd.testing.assert_frame_equal(res, ref)
+
+
+def test_read_bufr_tail_file_replaced(tmp_path) -> None:
+    path = str(tmp_path / "data.bufr")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    with open(TEST_DATA_1, "rb") as f:
+        data = f.read()
+    offsets = message_offsets(TEST_DATA_1)
+
+    with open(path, "wb") as f:
+        f.write(data[: offsets[4]])
+    res = pdbufr.read_bufr_tail(path, checkpoint, columns=COLUMNS)
+    assert max(res["count"]) == 5
+
+    # truncated file
+    with open(path, "wb") as f:
+        f.write(data[: offsets[1]])
+    res = pdbufr.read_bufr_tail(path, checkpoint, columns=COLUMNS)
+    assert set(res["count"]) == {1, 2}
+
+
+def test_tail_cli(tmp_path) -> None:
+    path = str(tmp_path / "data.bufr")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    output = str(tmp_path / "out.csv")
+    with open(TEST_DATA_1, "rb") as f:
+        data = f.read()
+    offsets = message_offsets(TEST_DATA_1)
+
+    argv = ["tail", path, "--checkpoint", checkpoint, "--columns", "count,stationNumber", "--output", output]
+    argv += ["--filters", json.dumps({"pressure": 50000})]
+
+    with open(path, "wb") as f:
+        f.write(data[: offsets[1]])
+    __main__.main(argv=argv)
+
+    with open(path, "wb") as f:
+        f.write(data[: offsets[3]])
+    __main__.main(argv=argv)
+
+    assert os.path.exists(checkpoint)
+    df = pd.read_csv(output)
+    assert list(df.columns) == ["count", "stationNumber"]
+    assert list(df["count"]) == [1, 2, 3, 4]
+
+
+def test_read_bufr_tail_nrows(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr_tail(TEST_DATA_1, tmp_path / "cp.json", columns=["latitude"], nrows=5)
+    assert not os.path.exists(tmp_path / "cp.json")
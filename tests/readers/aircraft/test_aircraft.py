@@ -0,0 +1,155 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_SMALL = sample_test_data_path("aircraft_small.bufr")
+TEST_DATA_COMPRESSED = sample_test_data_path("aircraft_mrar_compressed.bufr")
+
+
+def test_aircraft_default():
+    df = pdbufr.read_bufr(TEST_DATA_SMALL, reader="aircraft")
+    assert df.columns.tolist() == [
+        "flight_id",
+        "aircraft_id",
+        "time",
+        "lat",
+        "lon",
+        "flight_level",
+        "pressure",
+        "t",
+        "td",
+        "rh",
+        "mixing_ratio",
+        "wind_speed",
+        "wind_dir",
+    ]
+    assert len(df) == 10
+    assert df["flight_id"].tolist()[:3] == ["QGOBTRRA", "QGOBTRRA", "UOZDOZ2S"]
+    assert df["aircraft_id"].iloc[0] == "HGSKJFBA"
+    assert df["time"].iloc[1] == pd.Timestamp("2009-01-23 13:01:00")
+    np.testing.assert_allclose(df["pressure"].to_numpy()[:2], [96750.0, 99350.0])
+    np.testing.assert_allclose(df["t"].to_numpy()[:2], [283.4, 285.0])
+    assert df["wind_dir"].tolist()[:2] == [213, 209]
+    assert df["flight_level"].isna().all()
+
+
+@pytest.mark.parametrize(
+    "path,columns,ref_columns",
+    [
+        (
+            TEST_DATA_SMALL,
+            ["time", "latlon", "pressure", "t", "wind"],
+            [
+                "data_datetime",
+                "latitude",
+                "longitude",
+                "pressure",
+                "airTemperature",
+                "windSpeed",
+                "windDirection",
+            ],
+        ),
+        (
+            TEST_DATA_COMPRESSED,
+            ["time", "latlon", "flight_level", "t", "wind"],
+            [
+                "data_datetime",
+                "latitude",
+                "longitude",
+                "flightLevel",
+                "airTemperature",
+                "windSpeed",
+                "windDirection",
+            ],
+        ),
+    ],
+)
+def test_aircraft_generic(path, columns, ref_columns):
+    df = pdbufr.read_bufr(path, reader="aircraft", columns=columns)
+    ref = pdbufr.read_bufr(path, columns=ref_columns)
+    assert len(df) == len(ref)
+    for name, ref_name in zip(df.columns, ref_columns):
+        np.testing.assert_array_equal(df[name].to_numpy(), ref[ref_name].to_numpy())
+
+
+def test_aircraft_compressed():
+    df = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="aircraft")
+    assert len(df) == 186
+    assert df["aircraft_id"].tolist()[:3] == ["M87670b", "M519140", "M519140"]
+    assert df["time"].tolist()[:2] == [
+        pd.Timestamp("2021-09-09 15:00:00"),
+        pd.Timestamp("2021-09-09 15:00:02"),
+    ]
+    assert df["flight_level"].tolist()[:3] == [1387, 3848, 3840]
+    np.testing.assert_allclose(df["t"].to_numpy()[:3], [288.9, 273.65, 273.65])
+
+    # the values are the same as when the subsets are collected one by one
+    ref = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="aircraft", units={"t": "K"})
+    pd.testing.assert_frame_equal(df, ref)
+
+
+@pytest.mark.parametrize("units", [None, {"t": "K"}])
+def test_aircraft_missing_columns(units):
+    # the parameters not in the messages are NaN columns, so the columns are the same
+    # for all the files
+    columns = None
+    for path in (TEST_DATA_SMALL, TEST_DATA_COMPRESSED):
+        df = pdbufr.read_bufr(path, reader="aircraft", units=units)
+        if columns is None:
+            columns = df.columns.tolist()
+        assert df.columns.tolist() == columns
+        assert df["time"].dtype.kind == "M"
+        for name in ("flight_level", "pressure", "t", "td", "rh", "mixing_ratio", "wind_speed"):
+            assert df[name].dtype.kind in "fi", name
+
+    df = pdbufr.read_bufr(TEST_DATA_SMALL, reader="aircraft", units=units)
+    assert df["flight_level"].dtype == "float64"
+    assert df["flight_level"].isna().all()
+    assert df["mixing_ratio"].dtype == "float64"
+    assert df["mixing_ratio"].isna().all()
+
+    df = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="aircraft", units=units)
+    assert df["pressure"].dtype == "float64"
+    assert df["pressure"].isna().all()
+    assert df["td"].dtype == "float64"
+    assert df["td"].isna().all()
+
+    table = pdbufr.read_bufr(TEST_DATA_SMALL, reader="aircraft", output="arrow")
+    assert str(table.schema.field("flight_level").type) == "double"
+    assert str(table.schema.field("mixing_ratio").type) == "double"
+
+
+def test_aircraft_filters():
+    df = pdbufr.read_bufr(
+        TEST_DATA_COMPRESSED,
+        reader="aircraft",
+        columns=["aircraft_id", "t"],
+        filters={"aircraft_id": "M519140", "t": slice(273, 274)},
+    )
+    assert df["aircraft_id"].tolist() == ["M519140", "M519140"]
+    np.testing.assert_allclose(df["t"].to_numpy(), [273.65, 273.65])
+
+    df = pdbufr.read_bufr(
+        TEST_DATA_SMALL, reader="aircraft", columns=["latlon", "t"], filters={"lat": slice(40, 42)}
+    )
+    np.testing.assert_allclose(df["t"].to_numpy(), [216.7, 217.2, 222.4, 222.7])
+
+
+def test_aircraft_normalized():
+    stations, df = pdbufr.read_bufr(TEST_DATA_SMALL, reader="aircraft", output="normalized")
+    assert stations["flight_id"].tolist() == ["QGOBTRRA", "UOZDOZ2S", "VUVTEWZQ", "4IPASOZA", "WSSASKBA"]
+    assert df.columns[0] == "station_key"
+    assert "flight_id" not in df.columns
+    assert df["station_key"].tolist() == [0, 0, 1, 1, 1, 1, 2, 3, 4, 4]
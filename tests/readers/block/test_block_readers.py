@@ -0,0 +1,105 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.template import TemplatePlan
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_HIRS = sample_test_data_path(
+    "M02-HIRS-HIRxxx1B-NA-1.0-20181122114854.000000000Z-20181122132602-1304602.bufr"
+)
+TEST_DATA_GNSS = sample_test_data_path("pgps_110.bufr")
+TEST_DATA_ENS = sample_test_data_path("ens_multi_subset_compressed.bufr")
+
+# the readers generating a block per message with the options limiting the data size
+BLOCK_READERS = [
+    ("satellite", TEST_DATA_HIRS, {"filters": {"count": slice(1, 2)}}),
+    ("gnss", TEST_DATA_GNSS, {}),
+    ("ensemble", TEST_DATA_ENS, {}),
+]
+
+
+@pytest.mark.parametrize("reader,path,kwargs", BLOCK_READERS)
+def test_block_reader_arrow(reader, path, kwargs):
+    pytest.importorskip("pyarrow")
+
+    df = pdbufr.read_bufr(path, reader=reader, **kwargs)
+    table = pdbufr.read_bufr(path, reader=reader, output="arrow", **kwargs)
+    assert table.column_names == df.columns.tolist()
+    # the strings are dictionary encoded
+    pd.testing.assert_frame_equal(table.to_pandas().astype(df.dtypes.to_dict()), df)
+
+
+@pytest.mark.parametrize("reader,path,kwargs", BLOCK_READERS)
+def test_block_reader_errors(reader, path, kwargs):
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(path, reader=reader, dedup_keys=["lat"], **kwargs)
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(path, reader=reader, columns=["unknown"], **kwargs)
+
+
+@pytest.mark.parametrize("reader,path,kwargs", BLOCK_READERS)
+@pytest.mark.parametrize("nrows", [1, 5, 100])
+def test_block_reader_nrows(reader, path, kwargs, nrows):
+    # a message generates many rows, the result is truncated to nrows
+    df = pdbufr.read_bufr(path, reader=reader, **kwargs)
+    assert len(df) > 100
+
+    res = pdbufr.read_bufr(path, reader=reader, nrows=nrows, **kwargs)
+    assert len(res) == nrows
+    pd.testing.assert_frame_equal(res, df.iloc[:nrows])
+
+    res = pdbufr.read_bufr_many(path, [{"reader": reader, "head": nrows, **kwargs}])[0]
+    pd.testing.assert_frame_equal(res, df.iloc[:nrows])
+
+    assert len(pdbufr.read_bufr(path, reader=reader, nrows=0, **kwargs)) == 0
+    assert len(pdbufr.read_bufr(path, reader=reader, nrows=len(df) + 1, **kwargs)) == len(df)
+
+
+@pytest.mark.parametrize("reader,path,kwargs", BLOCK_READERS)
+def test_block_reader_nrows_arrow(reader, path, kwargs, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    table = pdbufr.read_bufr(path, reader=reader, output="arrow", nrows=5, **kwargs)
+    assert table.num_rows == 5
+
+    target = tmp_path / "res.parquet"
+    assert pdbufr.to_parquet(path, target, reader=reader, nrows=5, row_group_size=1, **kwargs) == 5
+    assert pq.read_table(target).num_rows == 5
+
+
+def test_template_plan_cache():
+    class KeyPlan(TemplatePlan):
+        def __init__(self, message):
+            self.observation_keys = {k: k for k in message}
+
+    message = {
+        "edition": 4,
+        "masterTableNumber": 0,
+        "unexpandedDescriptors": [1001],
+        "numberOfSubsets": 1,
+        "compressedData": 0,
+        "year": 2020,
+        "month": 1,
+        "day": 2,
+        "hour": 3,
+    }
+    cache = {}
+    plan = KeyPlan.from_message(message, cache)
+    assert KeyPlan.from_message(message, cache) is plan
+    assert len(cache) == 1
+    assert KeyPlan.from_message(message) is not plan
+
+    assert list(plan.time(message, 2)) == [pd.Timestamp("2020-01-02 03:00").to_datetime64()] * 2
+    assert plan.first_observation(message, ("unknown", "day"), 1).tolist() == [2]
+    assert plan.first_observation(message, ("unknown",), 1) is None
@@ -0,0 +1,165 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.ensemble import EnsembleBlock
+from pdbufr.core.ensemble import EnsembleData
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_COMPRESSED = sample_test_data_path("ens_multi_subset_compressed.bufr")
+TEST_DATA_UNCOMPRESSED = sample_test_data_path("ens_multi_subset_uncompressed.bufr")
+
+
+@pytest.mark.parametrize(
+    "path,param",
+    [(TEST_DATA_COMPRESSED, "cape"), (TEST_DATA_UNCOMPRESSED, "airTemperatureAt2M")],
+)
+def test_ensemble_data(path, param):
+    res = pdbufr.read_bufr(path, reader="ensemble", output="ensemble")
+    assert isinstance(res, EnsembleData)
+    assert len(res) == 1
+    assert res.members.tolist() == list(range(51))
+    assert res.steps.tolist() == list(range(0, 361, 6))
+    assert list(res.values) == [param]
+    assert res.values[param].shape == (1, 51, 61)
+    assert res.mask.all()
+
+    assert res.stations["time"].iloc[0] == pd.Timestamp("2018-07-01 12:00")
+    np.testing.assert_allclose(res.stations["lat"], [51.52])
+    np.testing.assert_allclose(res.stations["lon"], [0.97])
+
+    ref = pdbufr.read_bufr(path, columns=("ensembleMemberNumber", "timePeriod", param))
+    ref = ref.sort_values(["ensembleMemberNumber", "timePeriod"], kind="stable")
+    np.testing.assert_array_equal(res.values[param][0].ravel(), ref[param].to_numpy())
+
+
+def test_ensemble_pandas():
+    df = pdbufr.read_bufr(TEST_DATA_UNCOMPRESSED, reader="ensemble", columns=["lat", "airTemperatureAt2M"])
+    assert df.columns.tolist() == ["lat", "member", "step", "airTemperatureAt2M"]
+    assert len(df) == 51 * 61
+    assert df["step"].tolist()[:3] == [0, 6, 12]
+    np.testing.assert_allclose(df["airTemperatureAt2M"].to_numpy()[:3], [292.7, 291.6, 291.0])
+    np.testing.assert_allclose(df["airTemperatureAt2M"].to_numpy()[61], 292.8)
+
+
+def test_ensemble_filters():
+    df = pdbufr.read_bufr(
+        TEST_DATA_COMPRESSED,
+        reader="ensemble",
+        columns=["lat", "cape"],
+        filters={"member": [0, 1], "step": slice(None, 12), "lat": slice(50, 55)},
+    )
+    assert df["member"].tolist() == [0, 0, 0, 1, 1, 1]
+    assert df["step"].tolist() == [0, 6, 12] * 2
+    np.testing.assert_allclose(df["cape"].to_numpy(), [0.1, 147.0, 6.4, 0.0, 18.3, 3.6])
+
+    # BUFR keys with a value per subset
+    df = pdbufr.read_bufr(TEST_DATA_UNCOMPRESSED, reader="ensemble", filters={"dataType": 10})
+    assert df["member"].unique().tolist() == [0]
+
+    df = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", filters={"lat": slice(0, 10)})
+    assert df.empty
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", columns=["cape"], filters={"cape": 1})
+
+
+def test_ensemble_columns():
+    df = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", columns=["member", "step", "cape"])
+    assert df.columns.tolist() == ["member", "step", "cape"]
+
+    # the forecast parameters are checked against the keys found in the messages
+    with pytest.raises(ValueError, match="airTemperatureAt2M"):
+        pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", columns=["cape", "airTemperatureAt2M"])
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", columns=["lat", "timePeriod"])
+
+    # no error without ensemble messages
+    df = pdbufr.read_bufr(
+        sample_test_data_path("synop_wigos.bufr"), reader="ensemble", columns=["lat", "unknown"]
+    )
+    assert df.empty
+
+
+def test_ensemble_xarray(tmp_path):
+    pytest.importorskip("xarray")
+
+    path = tmp_path / "ens.bufr"
+    with open(path, "wb") as f:
+        for p in (TEST_DATA_COMPRESSED, TEST_DATA_UNCOMPRESSED):
+            with open(p, "rb") as g:
+                f.write(g.read())
+
+    ds = pdbufr.read_bufr(path, reader="ensemble", output="xarray")
+    # the parameters of the same station are combined
+    assert ds.sizes == {"station": 1, "member": 51, "step": 61}
+    assert ds["cape"].dims == ("station", "member", "step")
+    assert ds["airTemperatureAt2M"].dims == ("station", "member", "step")
+    assert ds["lat"].dims == ("station",)
+
+
+def test_ensemble_nrows():
+    # a message contains 51 members with 61 steps
+    df = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", nrows=5)
+    assert len(df) == 5
+    assert df["step"].tolist() == [0, 6, 12, 18, 24]
+
+    res = pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", output="ensemble", nrows=65)
+    assert res.mask.sum() == 65
+    assert res.mask[0, 1, :4].all() and not res.mask[0, 1, 4:].any()
+    assert np.isnan(res.values["cape"][0, 1, 4:]).all()
+    pd.testing.assert_frame_equal(
+        res.to_dataframe(), pdbufr.read_bufr(TEST_DATA_COMPRESSED, reader="ensemble", nrows=65)
+    )
+
+
+def test_ensemble_data_from_blocks():
+    b1 = EnsembleBlock(
+        {"lat": np.array([1.0, 1.0])},
+        np.array([0, 1]),
+        np.array([[0.0, 6.0], [0.0, 6.0]]),
+        {"t": np.array([[1.0, 2.0], [3.0, 4.0]])},
+    )
+    b2 = EnsembleBlock(
+        {"lat": np.array([2.0])}, np.array([1]), np.array([[6.0, 12.0]]), {"t": np.array([[5.0, 6.0]])}
+    )
+    assert b2.rows == 2
+    res = EnsembleData.from_blocks([b1, b2])
+
+    assert len(res) == 2
+    assert res.members.tolist() == [0, 1]
+    assert res.steps.tolist() == [0, 6, 12]
+    np.testing.assert_array_equal(
+        res.values["t"],
+        [
+            [[1.0, 2.0, np.nan], [3.0, 4.0, np.nan]],
+            [[np.nan, np.nan, np.nan], [np.nan, 5.0, 6.0]],
+        ],
+    )
+
+    # the steps missing from the messages are omitted
+    df = res.to_dataframe()
+    assert df["lat"].tolist() == [1.0, 1.0, 1.0, 1.0, 2.0, 2.0]
+    assert df["member"].tolist() == [0, 0, 1, 1, 1, 1]
+    assert df["step"].tolist() == [0, 6, 0, 6, 6, 12]
+    assert df["t"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    # the cells of the last station are masked out
+    h = res.head(5)
+    assert len(h) == 2
+    assert h.mask.sum() == 5
+    assert h.to_dataframe()["t"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert np.isnan(h.values["t"][1, 1, 2])
+    assert len(res.head(3)) == 1
+    assert res.head(6) is res
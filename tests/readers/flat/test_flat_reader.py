@@ -416,12 +416,6 @@ def test_read_flat_bufr_uncompressed_subsets(_kwargs: dict) -> None:
         dtype={
             "typicalDate": str,
             "typicalTime": str,
-            "#1#heightOfBarometerAboveMeanSeaLevel": str,
-            "#1#nonCoordinatePressure": str,
-            "#1#pressureReducedToMeanSeaLevel": str,
-            "#1#3HourPressureChange": str,
-            "#1#characteristicOfPressureTendency": str,
-            "#1#24HourPressureChange": str,
         },
     )
 
@@ -623,6 +617,11 @@ def test_read_flat_bufr_warning() -> None:
         assert len(res) == 50
         assert len(w) > 0
         assert _find_warning(w)
+        msg = [str(item.message) for item in w if _find_warning([item])][0]
+        first = len(pdbufr.read_bufr(TEST_DATA_1, flat=True, filters={"count": 1}).columns)
+        assert f"column[{first}] = {res.columns[first]})" in msg
+        assert "{" not in msg
+        assert "dataframe altering" in msg
 
     # non-overlapping messages: warning disabled
     warnings.filterwarnings("ignore", module="pdbufr")
@@ -647,3 +646,59 @@ def test_read_flat_bufr_warning() -> None:
         assert len(res.columns) == 101
         assert len(res) == 12
         assert not _find_warning(w)
+
+
+def test_read_flat_bufr_key_plan() -> None:
+    from pdbufr.high_level_bufr.bufr import BufrFile
+    from pdbufr.readers.flat import FlatKeyPlan
+
+    # uncompressed subsets: keys are ranked relative to the start of the subset
+    with BufrFile(TEST_DATA_2) as bufr_obj:
+        message = next(bufr_obj)
+        message["skipExtraKeyAttributes"] = 1
+        message["unpack"] = 1
+
+        cache: T.Dict[T.Any, T.Any] = {}
+        plan = FlatKeyPlan.from_message(message, True, cache=cache)
+        assert len(cache) == 1
+        assert len(plan.subset_start) == 12
+        assert FlatKeyPlan.from_message(message, True, cache=cache) is plan
+
+        ranges = plan.subset_ranges()
+        first = plan.out_keys[ranges[0][0] : ranges[0][1]]
+        last = plan.out_keys[ranges[-1][0] : ranges[-1][1]]
+        assert first[0] == "subsetNumber"
+        assert "#1#airTemperature" in first
+        assert "#1#airTemperature" in last
+
+
+def test_read_flat_bufr_key_plan_compression(tmp_path) -> None:
+    import eccodes  # type: ignore
+
+    # messages with the same template but a different compression
+    path = tmp_path / "mixed.bufr"
+    with open(path, "wb") as f:
+        for compressed in (1, 0, 1):
+            h = eccodes.codes_bufr_new_from_samples("BUFR4")
+            eccodes.codes_set(h, "numberOfSubsets", 2)
+            eccodes.codes_set(h, "compressedData", compressed)
+            eccodes.codes_set_array(h, "unexpandedDescriptors", [1001, 1002, 12101])
+            for key, values in (("blockNumber", [1, 2]), ("stationNumber", [10, 20])):
+                if compressed:
+                    eccodes.codes_set_array(h, key, values)
+                else:
+                    for i, v in enumerate(values):
+                        eccodes.codes_set(h, f"#{i + 1}#{key}", v)
+            if compressed:
+                eccodes.codes_set_array(h, "airTemperature", [280.5, 281.5])
+            else:
+                eccodes.codes_set(h, "#1#airTemperature", 280.5)
+                eccodes.codes_set(h, "#2#airTemperature", 281.5)
+            eccodes.codes_set(h, "pack", 1)
+            eccodes.codes_write(h, f)
+            eccodes.codes_release(h)
+
+    res = pdbufr.read_bufr(path, flat=True)
+    assert len(res) == 6
+    assert res["#1#stationNumber"].tolist() == [10, 20] * 3
+    assert res["#1#airTemperature"].tolist() == [280.5, 281.5] * 3
@@ -198,6 +198,9 @@ def test_read_bufr_one_subsets_multiple_observations_data() -> None:
         ]
     )
 
+    # the station height is missing in some of the subsets
+    expected_first_rows = expected_first_rows.astype({"heightOfStation": "Int64"})
+
     res = pdbufr.read_bufr(TEST_DATA_3, columns=columns, filters={"pressure": 100000})
 
     assert len(res) == 408
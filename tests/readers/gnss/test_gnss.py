@@ -0,0 +1,125 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.profiles import ProfileBlock
+from pdbufr.core.profiles import Profiles
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA = sample_test_data_path("pgps_110.bufr")
+
+
+def test_gnss_profiles():
+    res = pdbufr.read_bufr(TEST_DATA, reader="gnss", output="profiles")
+    assert isinstance(res, Profiles)
+    assert len(res) == 128
+    # only the zenith path is present in the replications
+    assert res.counts.tolist() == [1] * 128
+
+    assert res.stations["station_name"].iloc[0] == "ARD2-LPTR"
+    assert res.stations["time"].tolist()[:2] == [
+        pd.Timestamp("2012-10-31 00:02"),
+        pd.Timestamp("2012-10-31 00:07"),
+    ]
+    assert res.stations["elevation"].iloc[0] == 1497
+
+    p = res.profile(0)
+    np.testing.assert_allclose(p["elevation_angle"], [90.0])
+    np.testing.assert_allclose(p["path_delay"], [1.9442])
+
+    ref = pdbufr.read_bufr(TEST_DATA, columns=("stationOrSiteName", "atmosphericPathDelayInSatelliteSignal"))
+    ref = ref.dropna(subset=["atmosphericPathDelayInSatelliteSignal"])
+    np.testing.assert_array_equal(
+        res.levels["path_delay"], ref["atmosphericPathDelayInSatelliteSignal"].to_numpy()
+    )
+    assert res.stations["station_name"].tolist() == ref["stationOrSiteName"].tolist()
+
+
+def test_gnss_pandas():
+    df = pdbufr.read_bufr(TEST_DATA, reader="gnss", columns=["station_name", "lat", "azimuth", "path_delay"])
+    assert df.columns.tolist() == ["station_name", "lat", "azimuth", "path_delay"]
+    assert len(df) == 128
+    np.testing.assert_allclose(df["lat"].to_numpy()[:2], [46.77639, 46.77639])
+    np.testing.assert_allclose(df["path_delay"].to_numpy()[:3], [1.9442, 1.9451, 1.9455])
+
+    # the paths are selected by the path delay even when it is not extracted
+    df = pdbufr.read_bufr(TEST_DATA, reader="gnss", columns=["station_name", "elevation_angle"])
+    assert len(df) == 128
+
+
+def test_gnss_filters():
+    df = pdbufr.read_bufr(
+        TEST_DATA,
+        reader="gnss",
+        columns=["station_name", "time", "path_delay"],
+        filters={
+            "station_name": "ETH2-LPTR",
+            "time": slice(pd.Timestamp("2012-10-31 00:10"), pd.Timestamp("2012-10-31 00:20")),
+        },
+    )
+    assert df["station_name"].tolist() == ["ETH2-LPTR"] * 2
+    assert df["time"].dt.minute.tolist() == [12, 17]
+
+    df = pdbufr.read_bufr(TEST_DATA, reader="gnss", filters={"minute": 2})
+    assert len(df) == 12
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA, reader="gnss", filters={"path_delay": 1})
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA, reader="gnss", columns=["path_delay"], filters={"lat": 1})
+
+
+def test_gnss_xarray():
+    pytest.importorskip("xarray")
+
+    ds = pdbufr.read_bufr(TEST_DATA, reader="gnss", output="xarray")
+    assert ds.sizes == {"profile": 128, "level": 1}
+    assert ds["path_delay"].dims == ("profile", "level")
+    assert ds["station_name"].dims == ("profile",)
+
+
+def test_gnss_nrows():
+    res = pdbufr.read_bufr(TEST_DATA, reader="gnss", output="profiles", nrows=5)
+    assert len(res) == 5
+    assert len(res.to_dataframe()) == 5
+
+
+def test_profiles_from_blocks():
+    b1 = ProfileBlock(
+        {"name": np.array(["a", "b"], dtype=object)},
+        {"v": np.array([1.0, 2.0, 3.0])},
+        np.array([2, 1]),
+    )
+    b2 = ProfileBlock({"name": np.array(["c"], dtype=object)}, {"w": np.array([])}, np.array([0]))
+    assert b1.rows == 3
+    res = Profiles.from_blocks([b1, b2])
+
+    assert len(res) == 3
+    assert res.counts.tolist() == [2, 1, 0]
+    assert res.stations["name"].tolist() == ["a", "b", "c"]
+    np.testing.assert_array_equal(res.levels["w"], [np.nan, np.nan, np.nan])
+
+    # the profiles without levels are omitted
+    df = res.to_dataframe()
+    assert df["name"].tolist() == ["a", "a", "b"]
+    assert df["v"].tolist() == [1.0, 2.0, 3.0]
+
+    # the levels of the last profile are truncated
+    h = res.head(1)
+    assert h.counts.tolist() == [1]
+    assert h.stations["name"].tolist() == ["a"]
+    assert h.to_dataframe()["v"].tolist() == [1.0]
+    assert res.head(2).counts.tolist() == [2]
+    assert res.head(0).counts.tolist() == []
+    assert res.head(3) is res
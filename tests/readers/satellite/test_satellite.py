@@ -0,0 +1,133 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pdbufr
+from pdbufr.core.channels import ChannelBlock
+from pdbufr.core.channels import ChannelData
+from pdbufr.utils.testing import sample_test_data_path
+
+TEST_DATA_HIRS = sample_test_data_path(
+    "M02-HIRS-HIRxxx1B-NA-1.0-20181122114854.000000000Z-20181122132602-1304602.bufr"
+)
+
+
+def test_satellite_channels():
+    res = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", output="channels", filters={"count": 1})
+    assert isinstance(res, ChannelData)
+    assert len(res) == 1008
+    assert res.channels.tolist() == list(range(1, 21))
+    assert res.values["tb"].shape == (1008, 20)
+    assert res.values["radiance"].shape == (1008, 20)
+
+    # channel 20 only has a radiance
+    assert np.isnan(res.values["tb"][:, 19]).all()
+    assert np.isnan(res.values["radiance"][:, :19]).all()
+
+    ref = pdbufr.read_bufr(
+        TEST_DATA_HIRS,
+        columns=("latitude", "longitude", "brightnessTemperature"),
+        filters={"count": 1},
+    )
+    np.testing.assert_array_equal(
+        res.values["tb"][:, :19], ref["brightnessTemperature"].to_numpy().reshape(-1, 19)
+    )
+    np.testing.assert_array_equal(res.observations["lat"], ref["latitude"].to_numpy()[::19])
+    np.testing.assert_array_equal(res.observations["lon"], ref["longitude"].to_numpy()[::19])
+
+    assert res.observations["time"].iloc[0] == pd.Timestamp("2018-11-22 11:48:54.396")
+    assert res.observations["satellite_id"].iloc[0] == 4
+
+
+def test_satellite_pandas():
+    df = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", columns=["lat", "tb"], filters={"count": 1})
+    assert df.columns.tolist() == ["lat", "channel", "tb"]
+    assert len(df) == 1008 * 20
+    assert df["channel"].tolist()[:21] == list(range(1, 21)) + [1]
+    np.testing.assert_allclose(df["tb"].to_numpy()[:3], [220.23, 218.76, 219.02])
+
+    res = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", output="channels", filters={"count": 1})
+    np.testing.assert_array_equal(df["tb"].to_numpy(), res.values["tb"].ravel())
+
+
+def test_satellite_filters():
+    df = pdbufr.read_bufr(
+        TEST_DATA_HIRS,
+        reader="satellite",
+        columns=["lat", "fov", "tb"],
+        filters={"count": 1, "channel": [1, 2], "lat": slice(50, 55), "fieldOfViewNumber": 3},
+    )
+    assert len(df) > 0
+    assert df["channel"].unique().tolist() == [1, 2]
+    assert df["fov"].unique().tolist() == [3]
+    assert df["lat"].between(50, 55).all()
+
+    df = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", filters={"count": 1, "satelliteIdentifier": 5})
+    assert df.empty
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", filters={"tb": slice(200, None)})
+
+
+def test_satellite_xarray():
+    pytest.importorskip("xarray")
+
+    ds = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", output="xarray", filters={"count": slice(1, 2)})
+    assert ds.sizes == {"observation": 1008 + 840, "channel": 20}
+    assert ds["tb"].dims == ("observation", "channel")
+    assert ds["lat"].dims == ("observation",)
+    assert ds["channel"].values.tolist() == list(range(1, 21))
+
+
+def test_satellite_nrows():
+    # a message contains 1008 observations with 20 channels
+    df = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", nrows=5)
+    assert len(df) == 5
+    assert df["channel"].tolist() == [1, 2, 3, 4, 5]
+
+    res = pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", output="channels", nrows=25)
+    assert len(res) == 2
+    assert res.mask.sum() == 25
+    assert np.isnan(res.values["tb"][1, 5:]).all()
+    pd.testing.assert_frame_equal(
+        res.to_dataframe(), pdbufr.read_bufr(TEST_DATA_HIRS, reader="satellite", nrows=25)
+    )
+
+
+def test_channel_data_from_blocks():
+    b1 = ChannelBlock(
+        {"lat": np.array([1.0, 2.0])}, np.array([1, 2]), {"tb": np.array([[1.0, 2.0], [3.0, 4.0]])}, 2
+    )
+    b2 = ChannelBlock({"lat": np.array([3.0])}, np.array([2, 3]), {"tb": np.array([[5.0, 6.0]])}, 1)
+    assert b1.rows == 4
+    res = ChannelData.from_blocks([b1, b2])
+
+    assert len(res) == 3
+    assert res.channels.tolist() == [1, 2, 3]
+    np.testing.assert_array_equal(
+        res.values["tb"], [[1.0, 2.0, np.nan], [3.0, 4.0, np.nan], [np.nan, 5.0, 6.0]]
+    )
+
+    # the channels missing from a message are omitted
+    df = res.to_dataframe()
+    assert df["lat"].tolist() == [1.0, 1.0, 2.0, 2.0, 3.0, 3.0]
+    assert df["channel"].tolist() == [1, 2, 1, 2, 2, 3]
+    assert df["tb"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    # the channels of the last observation are masked out
+    h = res.head(3)
+    assert len(h) == 2
+    assert h.mask.tolist() == [[True, True, False], [True, False, False]]
+    assert h.to_dataframe()["tb"].tolist() == [1.0, 2.0, 3.0]
+    assert np.isnan(h.values["tb"][1, 1])
+    assert len(res.head(0)) == 0
+    assert res.head(6) is res
@@ -751,3 +751,68 @@ def test_synop_radiation(columns, expected_values):
     except Exception as e:
         print("e=", e)
         raise
+
+
+def test_synop_dtypes_compact():
+    path = sample_test_data_path("syn_new.bufr")
+    df_ref = pdbufr.read_bufr(path, reader="synop")
+    df = pdbufr.read_bufr(path, reader="synop", dtypes="compact")
+
+    assert df.columns.tolist() == df_ref.columns.tolist()
+    assert df["stnid"].dtype == "category"
+    assert df["stnid"].tolist() == df_ref["stnid"].tolist()
+    assert df.memory_usage(deep=True).sum() < df_ref.memory_usage(deep=True).sum()
+
+
+def test_synop_normalized():
+    path = sample_test_data_path("syn_new.bufr")
+    df_ref = pdbufr.read_bufr(path, reader="synop", columns=["default", "station_name"])
+    stations, obs = pdbufr.read_bufr(
+        path, reader="synop", columns=["default", "station_name"], output="normalized"
+    )
+
+    assert stations.columns.tolist()[:5] == ["station_key", "stnid", "lat", "lon", "elevation"]
+    assert stations["station_key"].tolist() == list(range(len(stations)))
+    assert "stnid" not in obs.columns
+    assert obs.columns.tolist()[:2] == ["station_key", "time"]
+
+    df = obs.merge(stations, on="station_key", how="left")[df_ref.columns]
+    pd.testing.assert_frame_equal(df, df_ref)
+
+
+def test_synop_normalized_repeated_stations(tmp_path):
+    path = sample_test_data_path("syn_new.bufr")
+    target = tmp_path / "rep.bufr"
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(target, "wb") as f:
+        f.write(data * 3)
+
+    stations, obs = pdbufr.read_bufr(target, reader="synop", output="normalized")
+    assert len(stations) == 3
+    assert len(obs) == 9
+    assert obs["station_key"].tolist() == [0, 1, 2] * 3
+
+    with pytest.raises(ValueError):
+        pdbufr.read_bufr(path, reader="synop", output="normalized", dedup_keys=["stnid"])
+
+
+def test_synop_column_schema():
+    from pdbufr.readers.synop import SynopReader
+
+    reader = SynopReader(sample_test_data_path("syn_new.bufr"), columns=["stnid", "latlon", "precipitation"])
+    columns = ("precipitation_<1h>", "lat", "precipitation_<1h>_units", "station_key", "stnid", "lon")
+    schema = reader.column_schema(columns)
+    assert schema == [
+        ("station_key", "station_key"),
+        ("stnid", "stnid"),
+        ("lat", "lat"),
+        ("lon", "lon"),
+        ("precipitation_<1h>", "precipitation_1h"),
+        ("precipitation_<1h>_units", "precipitation_1h_units"),
+    ]
+    # the schema is only computed once for the same columns
+    assert reader.column_schema(columns) is schema
+
+    with pytest.raises(AssertionError):
+        reader.column_schema(("stnid", "unknown"))
@@ -9,6 +9,7 @@
 
 import numpy as np
 import pandas as pd
+import pytest
 
 import pdbufr
 from pdbufr.utils.testing import sample_test_data_path
@@ -111,3 +112,131 @@ def test_temp_columns_location():
     except Exception as e:
         print("e=", e)
         raise
+
+
+def test_temp_normalized():
+    df_ref = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp")
+    stations, obs = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", output="normalized")
+
+    assert stations.columns.tolist() == ["station_key", "stnid", "lat", "lon", "elevation"]
+    assert len(stations) == df_ref["stnid"].nunique()
+    assert obs.columns.tolist()[:3] == ["station_key", "time", "pressure"]
+    assert len(obs) == len(df_ref)
+
+    df = obs.merge(stations, on="station_key", how="left")[df_ref.columns]
+    pd.testing.assert_frame_equal(df, df_ref)
+
+
+def test_temp_normalized_filters():
+    filters = {"stnid": "71823", "pressure": 50000}
+    df_ref = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", filters=filters)
+    stations, obs = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", filters=filters, output="normalized")
+
+    assert len(df_ref) > 0
+    assert stations["stnid"].tolist() == ["71823"]
+    assert obs["station_key"].tolist() == [0] * len(df_ref)
+    assert obs["t"].tolist() == df_ref["t"].tolist()
+
+
+@pytest.mark.parametrize("path", [TEST_DATA_CLASSIC, sample_test_data_path("temp_hires.bufr")])
+def test_temp_profiles(path):
+    df_ref = pdbufr.read_bufr(path, reader="temp")
+    res = pdbufr.read_bufr(path, reader="temp", output="profiles")
+
+    station_cols = ["stnid", "lat", "lon", "elevation", "time"]
+    assert res.stations.columns.tolist() == station_cols
+    assert res.offsets[0] == 0
+    assert res.offsets[-1] == len(df_ref)
+    assert list(res.levels) == [c for c in df_ref.columns if c not in station_cols]
+
+    # the levels of a profile are views into the level arrays
+    for i in range(len(res)):
+        start, end = res.offsets[i], res.offsets[i + 1]
+        ref = df_ref.iloc[start:end]
+        assert (ref[station_cols].nunique() <= 1).all()
+        assert ref["stnid"].iloc[0] == res.stations["stnid"].iloc[i]
+        for name, v in res.profile(i).items():
+            np.testing.assert_allclose(v, ref[name].to_numpy(dtype=float))
+
+
+def test_temp_profiles_xarray():
+    pytest.importorskip("xarray")
+
+    res = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", output="profiles")
+    ds = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", output="xarray")
+
+    assert ds.sizes == {"profile": len(res), "level": res.counts.max()}
+    assert ds["stnid"].dims == ("profile",)
+    assert ds["t"].dims == ("profile", "level")
+    assert ds["stnid"].values.tolist() == res.stations["stnid"].tolist()
+
+    i = int(np.argmin(res.counts))
+    n = res.counts[i]
+    np.testing.assert_allclose(ds["t"].values[i, :n], res.profile(i)["t"])
+    assert np.isnan(ds["t"].values[i, n:]).all()
+
+
+def test_temp_profiles_filters():
+    filters = {"pressure": 50000}
+    df_ref = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", filters=filters)
+    res = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", filters=filters, output="profiles")
+
+    assert res.counts.tolist() == [1] * len(df_ref)
+    assert res.stations["stnid"].tolist() == df_ref["stnid"].tolist()
+    np.testing.assert_allclose(res.levels["t"], df_ref["t"])
+
+    res = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", output="profiles", nrows=2)
+    assert len(res) == 2
+
+
+def test_temp_geopotential_columns():
+    from pdbufr.readers.geopot import G
+    from pdbufr.readers.geopot import GeopotentialHandler
+
+    data = {
+        "pressure": [1000, 900, 800],
+        "z": [100.0, None, None],
+        "zh": [None, 20.0, None],
+        "zh_units": ["m"] * 3,
+    }
+
+    res = GeopotentialHandler("z").adjust_columns(data)
+    assert list(res) == ["pressure", "z"]
+    np.testing.assert_allclose(res["z"], [100.0, 20.0 * G, np.nan])
+
+    res = GeopotentialHandler("zh").adjust_columns(data)
+    assert list(res) == ["pressure", "zh", "zh_units"]
+    np.testing.assert_allclose(res["zh"], [100.0 / G, 20.0, np.nan])
+
+    res = GeopotentialHandler("both").adjust_columns(data)
+    np.testing.assert_allclose(res["z"], [100.0, 20.0 * G, np.nan])
+    np.testing.assert_allclose(res["zh"], [100.0 / G, 20.0, np.nan])
+
+    assert GeopotentialHandler("raw").adjust_columns(data) == data
+    # the input is not modified
+    assert data["z"] == [100.0, None, None]
+
+
+def test_temp_offsets():
+    path = sample_test_data_path("temp_hires.bufr")
+    df_ref = pdbufr.read_bufr(path, reader="temp")
+    df = pdbufr.read_bufr(path, reader="temp", offsets=True)
+
+    assert len(df) == len(df_ref)
+    assert df["time_offset"].dtype == "timedelta64[ns]"
+    assert df["lat_offset"].dtype == np.float64
+    assert df["lon_offset"].dtype == np.float64
+    pd.testing.assert_frame_equal(df[df_ref.columns], df_ref)
+
+    assert pd.isna(df["time_offset"].iloc[0])
+    assert df["time_offset"].iloc[1:4].tolist() == [pd.Timedelta(seconds=s) for s in (0, 2, 4)]
+    np.testing.assert_allclose(df["lat_offset"].iloc[1:4], [0.0, -0.00107, -0.00121])
+    np.testing.assert_allclose(df["lon_offset"].iloc[1:4], [0.0, 0.00662, 0.00718])
+
+    res = pdbufr.read_bufr(path, reader="temp", offsets=True, output="profiles")
+    assert res.levels["time_offset"].dtype == "timedelta64[ns]"
+    np.testing.assert_array_equal(res.levels["time_offset"], df["time_offset"].to_numpy())
+
+    # classic soundings have no offsets
+    df = pdbufr.read_bufr(TEST_DATA_CLASSIC, reader="temp", offsets=True)
+    assert "time_offset" not in df.columns
@@ -0,0 +1,60 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+# Check the memory usage does not grow while reading a very long file. The sample
+# file is replicated until the target size (in GB, default 2) is reached and the
+# RSS is printed while the file is being read.
+#
+# Usage: python mem_long_file.py [size_gb] [work_dir]
+
+import os
+import resource
+import sys
+import tempfile
+
+from pdbufr.high_level_bufr.bufr import BufrFile
+from pdbufr.readers import get_reader
+
+SAMPLE_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "..", "tests", "sample_data")
+TEST_DATA = os.path.join(SAMPLE_DATA_FOLDER, "perf_synop.bufr")
+
+size = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+work_dir = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024**2
+
+
+with open(TEST_DATA, "rb") as f:
+    data = f.read()
+
+path = os.path.join(work_dir, "pdbufr_mem_long_file.bufr")
+with open(path, "wb") as f:
+    for _ in range(int(size * 1024**3 / len(data)) + 1):
+        f.write(data)
+
+
+def messages(bufr_obj, every=100000):
+    for i, msg in enumerate(bufr_obj, 1):
+        if i % every == 0:
+            print(f"messages={i} open_messages={len(bufr_obj.open_messages)} rss={rss_mb():.1f}MB")
+        yield msg
+
+
+try:
+    # no rows are generated so only the memory used by the decoding is measured
+    reader = get_reader("generic", path, columns=["stationNumber"], filters={"stationNumber": -1})
+    with BufrFile(path) as bufr_obj:
+        for _ in reader.iter_records(messages(bufr_obj)):
+            pass
+finally:
+    os.remove(path)
+
+print(f"max_rss={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MB")
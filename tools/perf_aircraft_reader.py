@@ -0,0 +1,41 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import os
+import time
+
+import pdbufr
+
+SAMPLE_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "sample-data")
+TEST_DATA = [
+    os.path.join(SAMPLE_DATA_FOLDER, "perf_aircraft.bufr"),
+    os.path.join(SAMPLE_DATA_FOLDER, "aircraft_mrar_compressed.bufr"),
+]
+
+GENERIC_COLUMNS = [
+    "data_datetime",
+    "latitude",
+    "longitude",
+    "airTemperature",
+    "windSpeed",
+    "windDirection",
+]
+
+AIRCRAFT_COLUMNS = ["time", "latlon", "t", "wind"]
+
+
+def run(label, path, **kwargs):
+    start = time.perf_counter()
+    res = pdbufr.read_bufr(path, **kwargs)
+    print(f"{label:>10}: {time.perf_counter() - start:.3f} s rows={len(res)}")
+
+
+for path in TEST_DATA:
+    print(os.path.basename(path))
+    run("generic", path, columns=GENERIC_COLUMNS)
+    run("aircraft", path, reader="aircraft", columns=AIRCRAFT_COLUMNS)
@@ -0,0 +1,38 @@
+# (C) Copyright 2019- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+import os
+import time
+
+import pdbufr
+
+SAMPLE_DATA_FOLDER = os.path.join(os.path.dirname(__file__), "sample-data")
+TEST_DATA = os.path.join(SAMPLE_DATA_FOLDER, "pgps_110.bufr")
+
+REPEAT = 20
+
+
+def run(label, **kwargs):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        res = pdbufr.read_bufr(TEST_DATA, **kwargs)
+    print(f"{label:>8}: {(time.perf_counter() - start) / REPEAT:.4f} s rows={len(res)}")
+
+
+run(
+    "generic",
+    columns=[
+        "stationOrSiteName",
+        "latitude",
+        "longitude",
+        "bearingOrAzimuth",
+        "elevation",
+        "atmosphericPathDelayInSatelliteSignal",
+    ],
+)
+run("gnss", reader="gnss", columns=["station_name", "lat", "lon", "azimuth", "elevation_angle", "path_delay"])